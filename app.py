@@ -1,219 +1,371 @@
-# NOTE: This app requires 'plotly' to be installed for interactive image display.
-# pip install plotly
-import streamlit as st
-import pytesseract
-from PIL import Image
-from ocr.image_utils import enhance_image
-from ocr.ocr_engine import extract_text_from_image, clean_ocr_text
-from ocr.invoice_parser import get_pattern, set_pattern, remove_pattern, list_patterns
-from utils.session import get_or_init_fatura_df, reset_fatura_df
-import json
-import pandas as pd
-from typing import List, Optional
-
-# Tesseract yolunu ayarla
-pytesseract.pytesseract.tesseract_cmd = r"C:\\Program Files\\Tesseract-OCR\\tesseract.exe"
-
-st.set_page_config(page_title="Otomatik Fatura İşleme Sistemi", layout="centered")
-st.title("🧾 Otomatik Fatura İşleme Sistemi")
-st.markdown("""
-    <style>
-    .block-container { max-width: 700px !important; }
-    @media (max-width: 600px) {
-        .block-container { padding: 1rem !important; }
-    }
-    </style>
-""", unsafe_allow_html=True)
-
-lang_map = {"Türkçe": "tur", "İngilizce": "eng"}
-language = st.selectbox("OCR Dili", options=list(lang_map.keys()), index=0)
-ocr_lang = lang_map[language]
-enhance = st.checkbox("Görüntüyü iyileştir (kontrast & siyah-beyaz)")
-uploaded_files: Optional[List] = st.file_uploader(
-    "Fatura dosyalarını yükleyin (PDF, JPG, PNG)",
-    type=["pdf", "jpg", "jpeg", "png"],
-    accept_multiple_files=True
-)
-
-with st.expander("RegEx Desenlerini Yönet (JSON)"):
-    patterns = list_patterns()
-    st.markdown("**Mevcut Desenler:**")
-    st.table([{ 'Alan': k, 'Desen': v['pattern'] if isinstance(v, dict) else v, 'Örnek Veri': v.get('example', '') if isinstance(v, dict) else '', 'Tip': v.get('type', '') if isinstance(v, dict) else '' } for k, v in patterns.items()])
-    st.markdown("---")
-    regex_keys = list(patterns.keys())
-    pattern_types = ["tarih", "tutar", "fatura no", "satıcı", "vergi", "satın alım", "satış", "diğer"]
-    selected_key = st.selectbox("Düzenlenecek/Silinecek Alan", regex_keys + ["Yeni Alan Ekle"])
-    if selected_key == "Yeni Alan Ekle":
-        new_key = st.text_input("Yeni Alan Adı (ör: custom_field)")
-        new_pattern = st.text_input("Yeni RegEx Deseni")
-        new_example = st.text_input("Örnek Veri (isteğe bağlı)")
-        new_type = st.selectbox("Desen Tipi", pattern_types, index=len(pattern_types)-1)
-        if st.button("Desen Ekle"):
-            if new_key and new_pattern:
-                set_pattern(new_key, {"pattern": new_pattern, "example": new_example, "type": new_type})
-                st.success(f"{new_key} alanı eklendi.")
-                st.rerun()
-    else:
-        current = patterns[selected_key]
-        if isinstance(current, dict):
-            edit_pattern = st.text_input("Deseni Düzenle", value=current.get('pattern', ''))
-            edit_example = st.text_input("Örnek Veri Düzenle", value=current.get('example', ''))
-            edit_type = st.selectbox("Desen Tipi", pattern_types, index=pattern_types.index(current.get('type', 'diğer')) if current.get('type', 'diğer') in pattern_types else len(pattern_types)-1)
-        else:
-            edit_pattern = st.text_input("Deseni Düzenle", value=current)
-            edit_example = st.text_input("Örnek Veri Düzenle", value='')
-            edit_type = st.selectbox("Desen Tipi", pattern_types, index=len(pattern_types)-1)
-        col_edit, col_del = st.columns(2)
-        with col_edit:
-            if st.button("Deseni Kaydet", key="edit_save"):
-                set_pattern(selected_key, {"pattern": edit_pattern, "example": edit_example, "type": edit_type})
-                st.success(f"{selected_key} deseni güncellendi.")
-                st.rerun()
-        with col_del:
-            if st.button("Deseni Sil", key="edit_delete"):
-                remove_pattern(selected_key)
-                st.success(f"{selected_key} deseni silindi.")
-                st.rerun()
-
-fatura_df = get_or_init_fatura_df()
-
-# --- Toplu fatura yükleme ve işleme ---
-def process_files(files: List, ocr_lang: str, enhance: bool) -> pd.DataFrame:
-    """Yüklenen dosyaları işler ve DataFrame'e ekler."""
-    df = fatura_df.copy()
-    for uploaded_file in files:
-        try:
-            image = None
-            if uploaded_file.type == "application/pdf":
-                from pdf2image import convert_from_bytes
-                images = convert_from_bytes(uploaded_file.read())
-                image = images[0]
-            else:
-                image = Image.open(uploaded_file)
-            if not isinstance(image, Image.Image):
-                import numpy as np
-                if isinstance(image, np.ndarray):
-                    image = Image.fromarray(image)
-                else:
-                    raise ValueError("Desteklenmeyen görüntü formatı")
-            if image is not None and enhance:
-                image = enhance_image(image)
-            raw_text = extract_text_from_image(image, ocr_lang)
-            text = clean_ocr_text(raw_text)
-            # RegEx ile toplu işleme (tüm alanlar için)
-            patterns = list_patterns()
-            import re
-            result = {"dosya_adi": uploaded_file.name}
-            for key, pattern in patterns.items():
-                match = re.search(pattern, text)
-                result[key] = match.group(0) if match else "bulunamadı"
-            df = pd.concat([df, pd.DataFrame([result])], ignore_index=True)
-        except Exception as e:
-            st.error(f"{uploaded_file.name} işlenirken hata oluştu: {e}")
-    return df
-
-if uploaded_files:
-    fatura_df = process_files(uploaded_files, ocr_lang, enhance)
-    st.session_state['fatura_df'] = fatura_df
-    st.success(f"{len(uploaded_files)} fatura işlendi ve tabloya eklendi!")
-
-# --- Tablo ve dışa aktarma ---
-st.subheader("Fatura Tablosu (Geçmiş/Toplu İşlenenler)")
-st.dataframe(fatura_df)
-col1, col2, col3 = st.columns(3)
-with col1:
-    if st.button("Tabloyu Temizle"):
-        reset_fatura_df()
-        st.success("Tablo temizlendi!")
-with col2:
-    csv_data = fatura_df.to_csv(index=False) or ''
-    st.download_button("CSV Olarak Dışa Aktar", data=csv_data, file_name="faturalar.csv", mime="text/csv")
-with col3:
-    json_data = fatura_df.to_json(orient="records", indent=2) or '[]'
-    st.download_button("JSON Olarak Dışa Aktar", data=json_data, file_name="faturalar.json", mime="application/json")
-    # SQL dışa aktarma
-    def export_df_to_sql(df: pd.DataFrame, table_name: str = "fatura_df") -> str:
-        sql = f"CREATE TABLE {table_name} (" + ", ".join([f'{col} TEXT' for col in df.columns]) + ");\n"
-        for _, row in df.iterrows():
-            values = [str(row[col]).replace("'", "''") for col in df.columns]
-            sql += f"INSERT INTO {table_name} VALUES ('{', '.join(values)}');\n"
-        return sql
-    sql_export = export_df_to_sql(fatura_df)
-    st.download_button("SQL Olarak Dışa Aktar", data=sql_export, file_name="faturalar.sql", mime="text/plain")
-
-# --- Geçmişi göster ---
-if not fatura_df.empty:
-    st.markdown("#### Son İşlenen Faturalar")
-    st.table(fatura_df.tail(5))
-
-# --- Tekli fatura işlemleri (önizleme, koordinatla OCR ve RegEx) ---
-if uploaded_files and len(uploaded_files) == 1:
-    uploaded_file = uploaded_files[0]
-    try:
-        image = None
-        if uploaded_file.type == "application/pdf":
-            from pdf2image import convert_from_bytes
-            images = convert_from_bytes(uploaded_file.read())
-            image = images[0]
-        else:
-            image = Image.open(uploaded_file)
-        if not isinstance(image, Image.Image):
-            import numpy as np
-            if isinstance(image, np.ndarray):
-                image = Image.fromarray(image)
-            else:
-                raise ValueError("Desteklenmeyen görüntü formatı")
-        if image is not None and enhance:
-            image = enhance_image(image)
-        st.subheader("Fatura Önizlemesi ve Koordinat Seçimi")
-        zoom = st.slider("Yakınlaştırma (%)", min_value=10, max_value=400, value=100, step=10)
-        display_image = image.copy()
-        try:
-            import numpy as np
-            import plotly.express as px
-            img_np = np.array(display_image)
-            if zoom != 100:
-                new_size = (int(display_image.width * zoom / 100), int(display_image.height * zoom / 100))
-                display_image = display_image.resize(new_size)
-                img_np = np.array(display_image)
-            st.markdown("**Görsel üzerinde bir alan seçmek için kutu koordinatlarını girin.**")
-            colx1, colx2 = st.columns(2)
-            with colx1:
-                x = st.number_input("X (sol)", min_value=0, max_value=img_np.shape[1]-1, value=0)
-                w = st.number_input("Genişlik", min_value=1, max_value=img_np.shape[1]-x, value=img_np.shape[1])
-            with colx2:
-                y = st.number_input("Y (üst)", min_value=0, max_value=img_np.shape[0]-1, value=0)
-                h = st.number_input("Yükseklik", min_value=1, max_value=img_np.shape[0]-y, value=img_np.shape[0])
-            # Görsel üzerinde kutu çizimi (plotly ile)
-            fig = px.imshow(img_np)
-            fig.update_layout(margin=dict(l=0, r=0, t=0, b=0))
-            fig.add_shape(type="rect", x0=x, y0=y, x1=x+w, y1=y+h, line=dict(color="red", width=3))
-            st.plotly_chart(fig, use_container_width=True)
-            regex_keys = list_patterns().keys()
-            regex_key = st.selectbox("RegEx Alanı", list(regex_keys))
-            pattern = get_pattern(regex_key)
-            if st.button("Koordinattan OCR ve RegEx ile Değer Al"):
-                scale = image.width / img_np.shape[1]
-                crop_box = (int(x*scale), int(y*scale), int((x+w)*scale), int((y+h)*scale))
-                cropped = image.crop(crop_box)
-                st.image(cropped, caption="Kırpılan Alan", use_container_width=True)
-                with st.spinner("OCR ve RegEx uygulanıyor..."):
-                    try:
-                        ocr_text = extract_text_from_image(cropped, ocr_lang)
-                        st.text_area("OCR Sonucu (Kırpılan Alan)", ocr_text, height=100)
-                        import re
-                        if pattern is None or pattern == "":
-                            st.warning("Seçilen alan için RegEx deseni tanımlı değil.")
-                        else:
-                            match = re.search(pattern, ocr_text)
-                            if match:
-                                st.success(f"RegEx ile bulunan değer: {match.group(0)}")
-                            else:
-                                st.warning("RegEx ile eşleşen değer bulunamadı.")
-                    except Exception as e:
-                        st.error(f"OCR/RegEx Hatası: {e}")
-        except ModuleNotFoundError as e:
-            st.error("Plotly kütüphanesi yüklü değil. Lütfen terminalde 'pip install plotly' komutunu çalıştırın.")
-            st.stop()
-    except Exception as e:
+# NOTE: This app requires 'plotly' to be installed for interactive image display.
+# pip install plotly
+import streamlit as st
+from PIL import Image
+from ocr.image_utils import load_image
+from ocr.preprocess import PRESETS, DEFAULT_PRESET, preprocess
+from ocr.engines import get_engine
+from ocr.ocr_engine import extract_text_from_image
+from ocr.ocr_cache import get_default_cache
+from ocr.pdf_utils import PdfOptions, DEFAULT_DPI, DEFAULT_MAX_PAGES
+from ocr.geometry import image_transform, invert, map_box
+from ocr.pipeline import cached_document, document_cache_key
+from ocr.vendor_templates import get_template_registry, header_hash
+from ocr.word_index import MIN_REGION_CONFIDENCE, WordIndex, find_page
+from ocr.batch import DEFAULT_WORKERS
+from ocr.invoice_parser import get_pattern, set_pattern, remove_pattern, list_patterns, get_registry
+from db.export import DOWNLOAD_TARGETS, open_export
+from utils.invoice_jobs import process_invoice_files
+from utils.job_queue import DONE, FAILED, get_job_queue
+from utils.profiling import BatchProfile
+from utils.session import delete_fatura_history, get_fatura_store, get_table_page, reset_fatura_df, table_start
+import json
+import os
+import pandas as pd
+from typing import Dict, List, Optional, Tuple, Union
+
+st.set_page_config(page_title="Otomatik Fatura İşleme Sistemi", layout="centered")
+st.title("🧾 Otomatik Fatura İşleme Sistemi")
+st.markdown("""
+    <style>
+    .block-container { max-width: 700px !important; }
+    @media (max-width: 600px) {
+        .block-container { padding: 1rem !important; }
+    }
+    </style>
+""", unsafe_allow_html=True)
+
+lang_map = {"Türkçe": "tur", "İngilizce": "eng"}
+language = st.selectbox("OCR Dili", options=list(lang_map.keys()), index=0)
+ocr_lang = lang_map[language]
+enhance = st.checkbox("Görüntüyü iyileştir (ön işleme)")
+if enhance:
+    preset_names = list(PRESETS)
+    enhance = st.selectbox("Ön işleme ayarı", preset_names, index=preset_names.index(DEFAULT_PRESET),
+                           help="klasik: eski kontrast & siyah-beyaz · standart: boyut, kontrast, eğim düzeltme · "
+                                "tarama: + kenar kırpma, Otsu · fotograf: + gürültü, uyarlamalı eşik · hizli: düşük çözünürlük")
+use_templates = st.checkbox("Tedarikçi şablonlarını kullan", value=True,
+                            help="Şablonu olan tedarikçilerin faturalarında yalnızca şablon alanları OCR'lanır")
+skip_duplicates = st.checkbox("Mükerrer faturaları atla", value=True,
+                              help="Daha önce işlenen dosyalar ve aynı faturanın yeniden taranmış kopyaları OCR'lanmaz; "
+                                   "kapalıyken de olası mükerrerler işaretlenir")
+adaptive_ocr = st.checkbox("Kademeli OCR", value=True,
+                           help="Önce düşük çözünürlükte hızlı geçiş yapılır; tarih, tutar, fatura no veya vergi no "
+                                "bulunamazsa ya da OCR güveni düşükse daha yüksek çözünürlük ve ön işlemeyle tekrarlanır")
+deep_profile = st.checkbox("Ayrıntılı profil (cProfile + tracemalloc)", value=False,
+                           help="Bir sonraki işlem tek süreçte izlenir ve en çok süre/bellek harcayan fonksiyonlar "
+                                "raporlanır; işlem belirgin şekilde yavaşlar")
+ocr_workers = int(st.number_input("Paralel OCR işçi sayısı", min_value=1, max_value=max(os.cpu_count() or 1, DEFAULT_WORKERS), value=DEFAULT_WORKERS))
+with st.expander("PDF Ayarları"):
+    dpi_options = sorted({100, 150, 200, 300, 400, DEFAULT_DPI})
+    pdf_dpi = st.select_slider("Çözünürlük (DPI)", options=dpi_options, value=DEFAULT_DPI)
+    colp1, colp2 = st.columns(2)
+    with colp1:
+        pdf_first_page = st.number_input("İlk sayfa", min_value=1, value=1)
+    with colp2:
+        pdf_last_page = st.number_input("Son sayfa (0 = tümü)", min_value=0, value=DEFAULT_MAX_PAGES)
+    use_text_layer = st.checkbox("PDF metin katmanı varsa OCR yapma", value=True)
+pdf_options = PdfOptions(int(pdf_dpi), int(pdf_first_page), int(pdf_last_page) or None, use_text_layer)
+uploaded_files: Optional[List] = st.file_uploader(
+    "Fatura dosyalarını yükleyin (PDF, JPG, PNG)",
+    type=["pdf", "jpg", "jpeg", "png"],
+    accept_multiple_files=True
+)
+
+with st.expander("RegEx Desenlerini Yönet (JSON)"):
+    patterns = list_patterns()
+    st.markdown("**Mevcut Desenler:**")
+    st.table([{ 'Alan': k, 'Desen': v['pattern'] if isinstance(v, dict) else v, 'Örnek Veri': v.get('example', '') if isinstance(v, dict) else '', 'Tip': v.get('type', '') if isinstance(v, dict) else '' } for k, v in patterns.items()])
+    st.markdown("---")
+    regex_keys = list(patterns.keys())
+    pattern_types = ["tarih", "tutar", "fatura no", "satıcı", "vergi", "satın alım", "satış", "diğer"]
+    selected_key = st.selectbox("Düzenlenecek/Silinecek Alan", regex_keys + ["Yeni Alan Ekle"])
+    if selected_key == "Yeni Alan Ekle":
+        new_key = st.text_input("Yeni Alan Adı (ör: custom_field)")
+        new_pattern = st.text_input("Yeni RegEx Deseni")
+        new_example = st.text_input("Örnek Veri (isteğe bağlı)")
+        new_type = st.selectbox("Desen Tipi", pattern_types, index=len(pattern_types)-1)
+        if st.button("Desen Ekle"):
+            if new_key and new_pattern:
+                set_pattern(new_key, {"pattern": new_pattern, "example": new_example, "type": new_type})
+                st.success(f"{new_key} alanı eklendi.")
+                st.rerun()
+    else:
+        current = patterns[selected_key]
+        if isinstance(current, dict):
+            edit_pattern = st.text_input("Deseni Düzenle", value=current.get('pattern', ''))
+            edit_example = st.text_input("Örnek Veri Düzenle", value=current.get('example', ''))
+            edit_type = st.selectbox("Desen Tipi", pattern_types, index=pattern_types.index(current.get('type', 'diğer')) if current.get('type', 'diğer') in pattern_types else len(pattern_types)-1)
+        else:
+            edit_pattern = st.text_input("Deseni Düzenle", value=current)
+            edit_example = st.text_input("Örnek Veri Düzenle", value='')
+            edit_type = st.selectbox("Desen Tipi", pattern_types, index=len(pattern_types)-1)
+        col_edit, col_del = st.columns(2)
+        with col_edit:
+            if st.button("Deseni Kaydet", key="edit_save"):
+                set_pattern(selected_key, {"pattern": edit_pattern, "example": edit_example, "type": edit_type})
+                st.success(f"{selected_key} deseni güncellendi.")
+                st.rerun()
+        with col_del:
+            if st.button("Deseni Sil", key="edit_delete"):
+                remove_pattern(selected_key)
+                st.success(f"{selected_key} deseni silindi.")
+                st.rerun()
+
+fatura_store = get_fatura_store(list_patterns().keys())
+ocr_cache = get_default_cache()
+job_queue = get_job_queue()
+TABLE_PAGE_SIZE = 50
+# İşlem paneli iş sürerken bu aralıkla (sn) yalnızca kendini yeniler
+JOB_REFRESH_SECONDS = 2
+# Oturumda saklanan işlem profili sayısı
+PROFILE_HISTORY = 10
+
+# --- Toplu fatura yükleme ve işleme (arka plan işi) ---
+if uploaded_files and st.button(f"Yüklenen {len(uploaded_files)} dosyayı işle", type="primary"):
+    files = [(f.name, f.getvalue(), f.type) for f in uploaded_files]
+    batch_profile = BatchProfile()
+    job = job_queue.submit(f"{len(files)} dosya", process_invoice_files, files, ocr_lang, enhance, ocr_workers,
+                           pdf_options, use_templates, adaptive_ocr, skip_duplicates, batch_profile, deep_profile)
+    job_profiles = st.session_state.setdefault("is_profilleri", {})
+    job_profiles[job.id] = batch_profile
+    for old_id in sorted(job_profiles)[:-PROFILE_HISTORY]:
+        del job_profiles[old_id]
+
+def show_jobs() -> None:
+    """Son işlerin durumunu gösterir; izlenen bir iş bittiğinde tablo için sayfayı yeniler."""
+    jobs = job_queue.jobs()[:5]
+    if not jobs:
+        return
+    st.subheader("İşlemler")
+    watching = st.session_state.setdefault("izlenen_isler", set())
+    finished_now = False
+    for job in jobs:
+        info = job.snapshot()
+        total = info["total"]
+        label = f"#{info['id']} {info['name']} · {info['status']} · {info['done']}/{total}"
+        if info["elapsed"] is not None:
+            label += f" · {info['elapsed']:.0f} sn"
+        if job.finished:
+            if info["id"] in watching:
+                watching.discard(info["id"])
+                finished_now = True
+            if info["status"] == DONE:
+                st.success(f"{label} · {info['result'] or 0} fatura tabloya eklendi")
+            elif info["status"] == FAILED:
+                st.error(f"{label} · {info['error']}")
+            else:
+                st.warning(label)
+        else:
+            watching.add(info["id"])
+            col_progress, col_cancel = st.columns([4, 1])
+            with col_progress:
+                st.progress(info["done"] / total if total else 0.0, text=label)
+            with col_cancel:
+                if st.button("İptal", key=f"is_iptal_{info['id']}"):
+                    job_queue.cancel(info["id"])
+        if info["messages"]:
+            with st.expander(f"#{info['id']} mesajları ({len(info['messages'])})"):
+                st.text("\n".join(info["messages"][-50:]))
+    if finished_now:
+        st.rerun()
+
+st.fragment(run_every=JOB_REFRESH_SECONDS if job_queue.active() else None)(show_jobs)()
+
+job_profiles: Dict[int, BatchProfile] = st.session_state.get("is_profilleri", {})
+if job_profiles:
+    with st.expander("Performans"):
+        profile_id = st.selectbox("İşlem", sorted(job_profiles, reverse=True), format_func=lambda i: f"#{i}")
+        job_profile = job_profiles[profile_id]
+        stage_summary = job_profile.summary()
+        if stage_summary:
+            # Süreler dosya başınadır; "(toplu)" aşamaları (ör. depoya yazma) yazma başınadır
+            st.dataframe(pd.DataFrame(stage_summary).round(1), hide_index=True)
+            st.caption(f"{len(job_profile.files)} dosya · Bellek değerleri yalnızca ayrıntılı profilde ölçülür")
+            col_json, col_csv = st.columns(2)
+            with col_json:
+                st.download_button("JSON indir", job_profile.to_json(), file_name=f"profil_{profile_id}.json",
+                                   mime="application/json")
+            with col_csv:
+                st.download_button("CSV indir", job_profile.to_csv(), file_name=f"profil_{profile_id}.csv",
+                                   mime="text/csv")
+        else:
+            st.caption("Henüz ölçüm yok")
+        if job_profile.report:
+            st.code(job_profile.report)
+
+with st.expander("OCR Önbelleği"):
+    cache_stats = ocr_cache.stats()
+    st.write(f"İsabet: {cache_stats['hits']} · Iska: {cache_stats['misses']} · "
+             f"İsabet oranı: %{cache_stats['hit_rate'] * 100:.0f} · Kayıt: {cache_stats['entries']} · "
+             f"Boyut: {cache_stats['size_bytes'] / (1024 * 1024):.1f} MB")
+    if st.button("Önbelleği Temizle"):
+        ocr_cache.clear()
+        st.success("OCR önbelleği temizlendi.")
+with st.expander("OCR Motoru"):
+    try:
+        ocr_engine = get_engine()
+        engine_stats = ocr_engine.latency_stats()
+        st.write(f"Motor: {ocr_engine.name} ({ocr_engine.version()})")
+        # Paralel işçilerdeki çağrılar her işçinin kendi motorunda sayılır; burada bu süreçteki çağrılar görünür
+        st.caption(f"Bu süreçteki çağrılar: {engine_stats['calls']} · Hata: {engine_stats['errors']} · "
+                   f"Ortalama: {engine_stats['mean_ms']:.0f} ms · p95: {engine_stats['p95_ms']:.0f} ms · "
+                   f"En yüksek: {engine_stats['max_ms']:.0f} ms")
+    except Exception as e:
+        st.error(f"OCR motoru başlatılamadı: {e}")
+
+# --- Tablo ve dışa aktarma ---
+st.subheader("Fatura Tablosu (Geçmiş/Toplu İşlenenler)")
+stored_total = fatura_store.count()
+view_start = table_start()
+row_total = fatura_store.count(after_id=view_start)
+page_count = max(1, -(-row_total // TABLE_PAGE_SIZE))
+get_table_page(page_count)
+table_page = st.number_input("Sayfa", min_value=1, max_value=page_count, key="fatura_sayfa")
+st.dataframe(fatura_store.page((table_page - 1) * TABLE_PAGE_SIZE, TABLE_PAGE_SIZE, after_id=view_start))
+hidden_note = f" · {stored_total - row_total} kayıt görünümden kaldırıldı" if stored_total > row_total else ""
+st.caption(f"Toplam {row_total} fatura · Sayfa {table_page}/{page_count}{hidden_note}")
+EXPORT_LABELS = {"csv": "CSV", "json": "JSON", "sql": "SQL", "parquet": "Parquet", "duckdb": "DuckDB"}
+
+col1, col2, col3 = st.columns(3)
+with col1:
+    # Sayfa seçicisi çizildikten sonra durumu değiştirebilmek için geri çağırma kullanılır
+    if st.button("Tabloyu Temizle", on_click=reset_fatura_df, help="Kayıtlı geçmiş silinmez"):
+        st.success("Tablo temizlendi!")
+with col2:
+    export_format = st.selectbox("Dışa aktarma biçimi", list(EXPORT_LABELS), format_func=EXPORT_LABELS.get)
+with col3:
+    export_name, export_mime = DOWNLOAD_TARGETS[export_format]
+    st.download_button(
+        f"{EXPORT_LABELS[export_format]} Olarak Dışa Aktar",
+        # Dosya yalnızca butona basıldığında, parça parça oluşturulur
+        data=lambda: open_export(fatura_store, export_format),
+        file_name=export_name,
+        mime=export_mime,
+        disabled=not stored_total,
+    )
+
+with st.expander("Kayıtlı geçmişi sil"):
+    st.warning("Veritabanındaki tüm faturalar ve mükerrer fatura dizini kalıcı olarak silinir.")
+    confirm_delete = st.checkbox("Kayıtlı geçmişin kalıcı olarak silineceğini onaylıyorum", key="gecmis_silme_onayi")
+    if st.button("Geçmişi Kalıcı Olarak Sil", type="primary", disabled=not (confirm_delete and stored_total),
+                 on_click=delete_fatura_history):
+        st.success("Kayıtlı geçmiş silindi.")
+
+# --- Geçmişi göster ---
+if row_total:
+    st.markdown("#### Son İşlenen Faturalar")
+    st.table(fatura_store.tail(5, after_id=view_start))
+
+# --- Tekli fatura işlemleri (önizleme, koordinatla OCR ve RegEx) ---
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_preview_image(data: bytes, mime: str, enhance: Union[bool, str], dpi: int) -> Tuple[Image.Image, Dict[str, float]]:
+    """Önizleme görüntüsünü ve ön işleme aşama sürelerini döndürür; yakınlaştırma gibi etkileşimlerde PDF yeniden işlenmez."""
+    image = load_image(data, mime, dpi=dpi)
+    if enhance:
+        return preprocess(image, enhance)
+    return image, {}
+
+if uploaded_files and len(uploaded_files) == 1:
+    uploaded_file = uploaded_files[0]
+    try:
+        image, preprocess_timings = load_preview_image(uploaded_file.getvalue(), uploaded_file.type, enhance, pdf_options.dpi)
+        st.subheader("Fatura Önizlemesi ve Koordinat Seçimi")
+        if preprocess_timings:
+            st.caption("Ön işleme: " + " · ".join(f"{stage} {ms:.0f} ms" for stage, ms in preprocess_timings.items()))
+        zoom = st.slider("Yakınlaştırma (%)", min_value=10, max_value=400, value=100, step=10)
+        display_image = image.copy()
+        try:
+            import numpy as np
+            import plotly.express as px
+            img_np = np.array(display_image)
+            if zoom != 100:
+                new_size = (int(display_image.width * zoom / 100), int(display_image.height * zoom / 100))
+                display_image = display_image.resize(new_size)
+                img_np = np.array(display_image)
+            st.markdown("**Görsel üzerinde bir alan seçmek için kutu koordinatlarını girin.**")
+            colx1, colx2 = st.columns(2)
+            with colx1:
+                x = st.number_input("X (sol)", min_value=0, max_value=img_np.shape[1]-1, value=0)
+                w = st.number_input("Genişlik", min_value=1, max_value=img_np.shape[1]-x, value=img_np.shape[1])
+            with colx2:
+                y = st.number_input("Y (üst)", min_value=0, max_value=img_np.shape[0]-1, value=0)
+                h = st.number_input("Yükseklik", min_value=1, max_value=img_np.shape[0]-y, value=img_np.shape[0])
+            # Görsel üzerinde kutu çizimi (plotly ile)
+            fig = px.imshow(img_np)
+            fig.update_layout(margin=dict(l=0, r=0, t=0, b=0))
+            fig.add_shape(type="rect", x0=x, y0=y, x1=x+w, y1=y+h, line=dict(color="red", width=3))
+            st.plotly_chart(fig, use_container_width=True)
+            regex_keys = list_patterns().keys()
+            regex_key = st.selectbox("RegEx Alanı", list(regex_keys))
+            pattern = get_pattern(regex_key)
+            if st.button("Koordinattan OCR ve RegEx ile Değer Al"):
+                scale = image.width / img_np.shape[1]
+                crop_box = (int(x*scale), int(y*scale), int((x+w)*scale), int((y+h)*scale))
+                cropped = image.crop(crop_box)
+                st.image(cropped, caption="Kırpılan Alan", use_container_width=True)
+                with st.spinner("OCR ve RegEx uygulanıyor..."):
+                    try:
+                        # Yalnızca işlenmiş belgelerin kelime kutuları kullanılır; tam sayfa OCR bu iş
+                        # parçacığında yapılmaz. Kutu önizlemeden OCR'lanan sayfaya her ikisinin ön işleme
+                        # dönüşümüyle taşınır. Bölgenin güveni düşükse veya kutu yoksa yalnızca alan OCR'lanır.
+                        key = document_cache_key(uploaded_file.getvalue(), uploaded_file.type, ocr_lang, enhance,
+                                                 pdf_options, adaptive_ocr)
+                        document = cached_document(ocr_cache, key, get_template_registry() if use_templates else None)
+                        page = find_page(document["words"], 1) if document else None
+                        ocr_text, confidence = "", 0.0
+                        if page is not None:
+                            word_index = WordIndex.from_page(page)
+                            ocr_text, confidence = word_index.region_text(word_index.map_from(crop_box, image_transform(image)))
+                        if ocr_text.strip() and confidence >= MIN_REGION_CONFIDENCE:
+                            st.caption(f"Kaynak: sayfa kelime dizini (ortalama güven %{confidence:.0f})")
+                        else:
+                            ocr_text = extract_text_from_image(cropped, ocr_lang)
+                            st.caption("Kaynak: kırpılan alan OCR'landı" if document else
+                                       "Kaynak: kırpılan alan OCR'landı (belge henüz işlenmedi)")
+                        st.text_area("OCR Sonucu (Kırpılan Alan)", ocr_text, height=100)
+                        compiled = get_registry().compiled(regex_key)
+                        if pattern is None or pattern == "":
+                            st.warning("Seçilen alan için RegEx deseni tanımlı değil.")
+                        elif compiled is None:
+                            st.error("Seçilen alanın RegEx deseni geçersiz.")
+                        else:
+                            match = compiled.search(ocr_text)
+                            if match:
+                                st.success(f"RegEx ile bulunan değer: {match.group(0)}")
+                            else:
+                                st.warning("RegEx ile eşleşen değer bulunamadı.")
+                    except Exception as e:
+                        st.error(f"OCR/RegEx Hatası: {e}")
+            with st.expander("Tedarikçi Şablonu"):
+                # Seçili kutu, oransal koordinatlarla seçili RegEx alanının bölgesi olarak şablona eklenir
+                template_registry = get_template_registry()
+                template_name = st.text_input("Şablon adı (tedarikçi)")
+                template_vkn = st.text_input("VKN (isteğe bağlı, eşleşmeyi doğrular)")
+                if st.button("Seçili Alanı Şablona Ekle"):
+                    if not template_name.strip():
+                        st.warning("Lütfen bir şablon adı girin.")
+                    else:
+                        # Özet ve kutu, işleme sırasındaki eşleştirmeyle aynı şekilde ön işleme öncesi
+                        # sayfaya göre hesaplanır; önizlemedeki kutu sayfa dönüşümüyle geri taşınır
+                        display_scale = image.width / img_np.shape[1]
+                        preview_box = (x * display_scale, y * display_scale, (x + w) * display_scale, (y + h) * display_scale)
+                        box = map_box(invert(image_transform(image)), preview_box)
+                        source = load_image(uploaded_file.getvalue(), uploaded_file.type, dpi=pdf_options.dpi)
+                        template_registry.set_field(template_name.strip(), regex_key, box, header_hash(source),
+                                                    template_vkn.strip() or None)
+                        st.success(f"'{regex_key}' alanı '{template_name.strip()}' şablonuna eklendi.")
+                for name, template in template_registry.templates().items():
+                    colt1, colt2 = st.columns([4, 1])
+                    with colt1:
+                        st.write(f"**{name}**" + (f" (VKN {template['vkn']})" if template.get("vkn") else "")
+                                 + ": " + ", ".join(template["fields"]))
+                    with colt2:
+                        if st.button("Sil", key=f"sablon_sil_{name}"):
+                            template_registry.remove(name)
+                            st.rerun()
+        except ModuleNotFoundError as e:
+            st.error("Plotly kütüphanesi yüklü değil. Lütfen terminalde 'pip install plotly' komutunu çalıştırın.")
+            st.stop()
+    except Exception as e:
         st.error(f"{uploaded_file.name} işlenirken hata oluştu: {e}") 
\ No newline at end of file
@@ -0,0 +1,5 @@
+"""
+Tekrarlanabilir performans ölçümleri. Sentetik faturalar (bkz. benchmarks.synthetic) çevrimdışı
+üretilir; ölçümler benchmarks.run ile 10/1k/100k ölçeklerinde çalıştırılıp JSON taban çizgileriyle
+karşılaştırılır.
+"""
@@ -0,0 +1,289 @@
+"""
+Sentetik faturalarla performans ölçümü ve taban çizgisi karşılaştırması.
+
+Örnek:
+    python -m benchmarks.run --scale 1k                  # benchmarks/baselines/1k.json ile karşılaştırır
+    python -m benchmarks.run --scale 1k --save-baseline  # sonucu taban çizgisi olarak kaydeder
+    python -m benchmarks.run --scale 100k --only extract_fields,parse_invoice_data --out sonuc.json
+
+Süreler öğe (fatura, görüntü, kayıt) başına ms olarak kaydedilir. Bir ölçüm taban çizgisindeki
+değerinden eşik oranından (varsayılan %25) fazla yavaşsa veya alan doğruluğu düşerse gerileme
+sayılır ve komut 1 ile çıkar; taban çizgisi farklı bir derlemle (fatura sayısı/tohum) alınmışsa 2 ile
+çıkar. Taban çizgileri makineye bağlıdır; aynı makinede karşılaştırılmalıdır.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+import numpy as np
+from PIL import Image
+from benchmarks.synthetic import LABEL_FIELDS, SyntheticInvoice, generate_invoices, invoice_file, render_invoice
+from db.export import DOWNLOAD_TARGETS, EXPORT_FORMATS, export_store, open_record_writer
+from db.invoice_store import InvoiceStore
+from ocr.image_utils import enhance_image
+from ocr.invoice_parser import extract_fields, parse_invoice_data
+from ocr.ocr_cache import OCRCache
+from ocr.ocr_engine import clean_ocr_text, engine_version, extract_words_from_image
+from ocr.pipeline import ocr_document
+from ocr.preprocess import DEFAULT_PRESET, PRESETS
+from utils.invoice_jobs import INSERT_BATCH_SIZE
+from utils.profiling import BatchProfile, profile_file
+
+SCALES = {"10": 10, "1k": 1_000, "100k": 100_000}
+# Görüntü gerektiren ölçümler en fazla bu kadar faturayla çalışır (100k sayfa OCR'ı pratik değildir)
+IMAGE_LIMITS = {"enhance_image": 50, "ocr": 50}
+# OCR süreleri uzun ve kararlı olduğundan tekrarlanmaz
+SINGLE_RUN = {"ocr"}
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.25
+# Alan doğruluğu bu kadar düşerse gerileme sayılır
+ACCURACY_TOLERANCE = 0.02
+# Öğe başına bu kadar ms'den küçük farklar ölçüm gürültüsü sayılır
+MIN_REGRESSION_MS = 0.005
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+def _stats(times: Sequence[float], items: int) -> Dict[str, Any]:
+    """times çağrı başına saniyelerdir; p50/p95 çağrı başına, per_item_ms öğe başınadır."""
+    ms = np.array(times, dtype=np.float64) * 1000
+    return {"n": items, "total_ms": float(ms.sum()), "per_item_ms": float(ms.sum() / max(1, items)),
+            "p50_ms": float(np.percentile(ms, 50)) if len(ms) else 0.0,
+            "p95_ms": float(np.percentile(ms, 95)) if len(ms) else 0.0}
+
+def _timed(items: Sequence[Any], func: Callable[[Any], Any], warmup: bool = False) -> List[float]:
+    # Isınma çağrısı (ör. desenlerin yüklenip derlenmesi) ölçüme katılmaz
+    if warmup and items:
+        func(items[0])
+    times = []
+    for item in items:
+        started = time.perf_counter()
+        func(item)
+        times.append(time.perf_counter() - started)
+    return times
+
+def field_accuracy(predicted: List[Dict[str, str]], invoices: Sequence[SyntheticInvoice]) -> Dict[str, float]:
+    """parse_invoice_data sonuçlarının etiketlerle birebir aynı olma oranı (alan başına)."""
+    return {field: sum(p.get(field) == inv.labels[field] for p, inv in zip(predicted, invoices)) / max(1, len(invoices))
+            for field in LABEL_FIELDS}
+
+def _records(invoices: Sequence[SyntheticInvoice]) -> List[Dict[str, str]]:
+    return [{"dosya_adi": inv.name, "onbellek_anahtari": inv.name, **inv.labels} for inv in invoices]
+
+def bench_extract_fields(invoices: Sequence[SyntheticInvoice], workdir: str, **_: Any) -> Dict[str, Any]:
+    """Toplu işlemdeki RegEx adımı: metin temizleme + tüm desenlerle tek tarama."""
+    texts = [inv.text for inv in invoices]
+    return _stats(_timed(texts, lambda text: extract_fields(clean_ocr_text(text)), warmup=True), len(texts))
+
+def bench_parse_invoice_data(invoices: Sequence[SyntheticInvoice], workdir: str, **_: Any) -> Dict[str, Any]:
+    texts = [inv.text for inv in invoices]
+    times = _timed(texts, parse_invoice_data, warmup=True)
+    predicted = [parse_invoice_data(text) for text in texts]
+    return {**_stats(times, len(invoices)), "accuracy": field_accuracy(predicted, invoices)}
+
+def bench_enhance_image(invoices: Sequence[SyntheticInvoice], workdir: str, preset: str = DEFAULT_PRESET,
+                        **_: Any) -> Dict[str, Any]:
+    images = [render_invoice(inv)[0] for inv in invoices[:IMAGE_LIMITS["enhance_image"]]]
+    return {**_stats(_timed(images, lambda image: enhance_image(image, preset)), len(images)), "preset": preset}
+
+def bench_ocr(invoices: Sequence[SyntheticInvoice], workdir: str, lang: str = "tur", **_: Any) -> Dict[str, Any]:
+    """Önbelleksiz, kademeli OCR + alan çıkarma; aşama süreleri utils.profiling ile toplanır."""
+    _, words = extract_words_from_image(Image.new("L", (64, 32), 255), lang)
+    if words is None:
+        return {"skipped": "OCR motoru çalıştırılamadı"}
+    cache = OCRCache(cache_dir=tempfile.mkdtemp(dir=workdir))
+    subset = invoices[:IMAGE_LIMITS["ocr"]]
+    files = [invoice_file(inv) for inv in subset]
+    profile = BatchProfile()
+    predicted = []
+
+    def run(item: Any) -> None:
+        name, data, mime = item
+        with profile_file(name) as file_profile:
+            res = ocr_document(data, mime, lang, False, cache, use_templates=False)
+        profile.add(file_profile)
+        predicted.append(parse_invoice_data(clean_ocr_text(res["raw_text"])))
+
+    times = _timed(files, run)
+    stages = {s["asama"]: round(s["p50_ms"], 3) for s in profile.summary()}
+    return {**_stats(times, len(files)), "accuracy": field_accuracy(predicted, subset), "stages_p50_ms": stages}
+
+def bench_store_append(invoices: Sequence[SyntheticInvoice], workdir: str, **_: Any) -> Dict[str, Any]:
+    """Fatura deposuna işlerin kullandığı parça boyutuyla toplu ekleme."""
+    records = _records(invoices)
+    store = InvoiceStore(os.path.join(tempfile.mkdtemp(dir=workdir), "faturalar.duckdb"))
+    try:
+        chunks = [records[i:i + INSERT_BATCH_SIZE] for i in range(0, len(records), INSERT_BATCH_SIZE)]
+        return _stats(_timed(chunks, store.append_many), len(records))
+    finally:
+        store.close()
+
+def bench_record_writer(invoices: Sequence[SyntheticInvoice], workdir: str, **_: Any) -> Dict[str, Dict[str, Any]]:
+    """Komut satırı çıktısı: kayıtların artımlı yazılması (biçim başına ayrı ölçüm)."""
+    records = _records(invoices)
+    columns = ["dosya_adi"] + list(LABEL_FIELDS)
+    results = {}
+    for fmt in EXPORT_FORMATS:
+        path = os.path.join(tempfile.mkdtemp(dir=workdir), f"sonuc.{fmt}")
+        started = time.perf_counter()
+        with open_record_writer(path, fmt, columns) as writer:
+            for record in records:
+                writer.write({c: record[c] for c in columns})
+        results[fmt] = _stats([time.perf_counter() - started], len(records))
+    return results
+
+def bench_export(invoices: Sequence[SyntheticInvoice], workdir: str, **_: Any) -> Dict[str, Dict[str, Any]]:
+    """Depodan dışa aktarma (biçim başına ayrı ölçüm)."""
+    directory = tempfile.mkdtemp(dir=workdir)
+    store = InvoiceStore(os.path.join(directory, "faturalar.duckdb"))
+    try:
+        records = _records(invoices)
+        for i in range(0, len(records), INSERT_BATCH_SIZE):
+            store.append_many(records[i:i + INSERT_BATCH_SIZE])
+        results = {}
+        for fmt, (file_name, _) in DOWNLOAD_TARGETS.items():
+            path = os.path.join(directory, "disa_" + file_name)
+            results[fmt] = _stats(_timed([path], lambda p: export_store(store, fmt, p)), len(records))
+        return results
+    finally:
+        store.close()
+
+BENCHMARKS: Dict[str, Callable[..., Dict[str, Any]]] = {
+    "extract_fields": bench_extract_fields,
+    "parse_invoice_data": bench_parse_invoice_data,
+    "enhance_image": bench_enhance_image,
+    "ocr": bench_ocr,
+    "store_append": bench_store_append,
+    "record_writer": bench_record_writer,
+    "export": bench_export,
+}
+# Biçim başına sonuç döndüren ölçümler "export_csv" gibi ayrı anahtarlarla kaydedilir
+PER_FORMAT = {"record_writer", "export"}
+
+def environment() -> Dict[str, Any]:
+    import duckdb
+    import PIL
+    return {"python": platform.python_version(), "platform": platform.platform(), "machine": platform.machine(),
+            "cpu_count": os.cpu_count(), "numpy": np.__version__, "pillow": PIL.__version__,
+            "duckdb": duckdb.__version__, "ocr_engine": engine_version()}
+
+def run_benchmarks(scale: str = "1k", count: Optional[int] = None, seed: int = 0, only: Optional[Iterable[str]] = None,
+                   repeat: int = DEFAULT_REPEAT, lang: str = "tur", preset: str = DEFAULT_PRESET) -> Dict[str, Any]:
+    """
+    Seçilen ölçümleri çalıştırır. count verilirse ölçeğin fatura sayısı yerine kullanılır. Her ölçüm
+    repeat kez çalıştırılır ve en hızlı tekrar kaydedilir (OCR bir kez).
+    """
+    count = SCALES[scale] if count is None else count
+    names = list(only) if only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Bilinmeyen ölçüm: {', '.join(unknown)}")
+    invoices = list(generate_invoices(count, seed))
+    results: Dict[str, Any] = {}
+    workdir = tempfile.mkdtemp(prefix="fatura_bench_")
+    try:
+        for name in names:
+            runs = [BENCHMARKS[name](invoices, workdir, lang=lang, preset=preset)
+                    for _ in range(1 if name in SINGLE_RUN else max(1, repeat))]
+            if name in PER_FORMAT:
+                for fmt in runs[0]:
+                    results[f"{name}_{fmt}"] = min((r[fmt] for r in runs), key=lambda r: r["total_ms"])
+            else:
+                results[name] = min(runs, key=lambda r: r.get("total_ms", 0.0))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {"scale": scale, "count": count, "seed": seed, "repeat": repeat,
+            "created": datetime.now().isoformat(timespec="seconds"), "environment": environment(),
+            "benchmarks": results}
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """
+    Sonucu taban çizgisiyle karşılaştırır; gerilemeleri açıklayan mesajlar döndürür. Eşik taban
+    çizgisinde ölçüm başına ("thresholds") veya genel ("threshold") tanımlanabilir.
+    """
+    if (result["count"], result["seed"]) != (baseline["count"], baseline["seed"]):
+        raise ValueError(f"Taban çizgisi farklı bir derlemle alınmış (fatura: {baseline['count']}, "
+                         f"tohum: {baseline['seed']})")
+    regressions = []
+    for name, base in baseline["benchmarks"].items():
+        current = result["benchmarks"].get(name)
+        if current is None or "skipped" in current or "skipped" in base:
+            continue
+        threshold = baseline.get("thresholds", {}).get(name, baseline.get("threshold", DEFAULT_THRESHOLD))
+        before, after = base["per_item_ms"], current["per_item_ms"]
+        if after > before * (1 + threshold) and after - before > MIN_REGRESSION_MS:
+            regressions.append(f"{name}: {before:.4f} -> {after:.4f} ms/öğe (+%{(after / before - 1) * 100:.0f}, "
+                               f"eşik %{threshold * 100:.0f})")
+        for field, expected in (base.get("accuracy") or {}).items():
+            actual = (current.get("accuracy") or {}).get(field)
+            if actual is not None and actual < expected - ACCURACY_TOLERANCE:
+                regressions.append(f"{name} doğruluk {field}: {expected:.3f} -> {actual:.3f}")
+    return regressions
+
+def format_table(result: Dict[str, Any]) -> str:
+    lines = [f"{'ölçüm':<22} {'n':>7} {'ms/öğe':>10} {'p50 ms':>9} {'p95 ms':>9}  doğruluk"]
+    for name, item in result["benchmarks"].items():
+        if "skipped" in item:
+            lines.append(f"{name:<22} atlandı: {item['skipped']}")
+            continue
+        accuracy = " ".join(f"{k}={v:.2f}" for k, v in (item.get("accuracy") or {}).items())
+        lines.append(f"{name:<22} {item['n']:>7} {item['per_item_ms']:>10.4f} {item['p50_ms']:>9.3f} "
+                     f"{item['p95_ms']:>9.3f}  {accuracy}")
+    return "\n".join(lines)
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Sentetik faturalarla performans ölçümü.")
+    parser.add_argument("--scale", choices=list(SCALES), default="1k", help="Fatura sayısı ölçeği")
+    parser.add_argument("--count", type=int, help="Ölçek yerine verilen fatura sayısı")
+    parser.add_argument("--seed", type=int, default=0, help="Derlem tohumu")
+    parser.add_argument("--only", help=f"Virgülle ayrılmış ölçümler ({', '.join(BENCHMARKS)})")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Tekrar sayısı (en hızlısı kaydedilir)")
+    parser.add_argument("--lang", default="tur", help="OCR dili")
+    parser.add_argument("--preset", choices=list(PRESETS), default=DEFAULT_PRESET, help="enhance_image hazır ayarı")
+    parser.add_argument("--out", help="Sonuç JSON dosyası")
+    parser.add_argument("--baseline", help="Taban çizgisi (varsayılan: benchmarks/baselines/<ölçek>.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="Sonucu taban çizgisi olarak kaydet")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Kaydedilen taban çizgisinin gerileme eşiği (oran)")
+    return parser
+
+def main(argv: List[str] = None) -> int:
+    args = build_parser().parse_args(argv)
+    only = [name.strip() for name in args.only.split(",")] if args.only else None
+    result = run_benchmarks(args.scale, args.count, args.seed, only, args.repeat, args.lang, args.preset)
+    print(format_table(result), file=sys.stderr)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    baseline_path = args.baseline or os.path.join(BASELINE_DIR, f"{args.scale}.json")
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(baseline_path)), exist_ok=True)
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump({**result, "threshold": args.threshold}, f, ensure_ascii=False, indent=2)
+        print(f"Taban çizgisi kaydedildi: {baseline_path}", file=sys.stderr)
+        return 0
+    if not os.path.exists(baseline_path):
+        print(f"Taban çizgisi yok ({baseline_path}); --save-baseline ile oluşturun.", file=sys.stderr)
+        return 0
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("environment", {}).get("platform") != result["environment"]["platform"]:
+        print("Uyarı: taban çizgisi farklı bir ortamda alınmış; süreler karşılaştırılabilir olmayabilir.",
+              file=sys.stderr)
+    try:
+        regressions = compare(result, baseline)
+    except ValueError as e:
+        print(f"Karşılaştırılamadı: {e}", file=sys.stderr)
+        return 2
+    for message in regressions:
+        print(f"GERİLEME {message}", file=sys.stderr)
+    if not regressions:
+        print("Gerileme yok.", file=sys.stderr)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
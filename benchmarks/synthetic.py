@@ -0,0 +1,250 @@
+"""
+Sentetik Türkçe fatura üretici. Faturalar tohumdan (seed) belirlenimci olarak üretilir; aynı tohum
+her makinede aynı metni ve etiketleri verir (görüntüler sistemdeki yazı tiplerine bağlıdır). Düzen,
+yazı tipi, gürültü, eğim ve sayfa sayısı faturadan faturaya değişir; etiketler parse_invoice_data
+çıktısıyla aynı anahtarları kullanır.
+
+Etiketli derlem yazmak için:
+    python -m benchmarks.synthetic derlem/ --count 200
+"""
+import argparse
+import io
+import json
+import os
+import random
+import sys
+from datetime import date, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+from functools import lru_cache
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+SELLERS = (
+    "Demir Gıda San. ve Tic. A.Ş.", "Yıldız Yazılım Ltd. Şti.", "Anadolu Lojistik A.Ş.",
+    "Kaya İnşaat Malzemeleri", "Ege Tekstil San. Ltd. Şti.", "Boğaziçi Danışmanlık",
+    "Çınar Otomotiv A.Ş.", "Marmara Kırtasiye Ltd. Şti.", "Özgür Elektrik Müh.", "Şahin Tarım Ürünleri",
+)
+ITEMS = (
+    ("Danışmanlık hizmeti", 1500, 9000), ("A4 fotokopi kağıdı", 90, 250), ("Toner kartuşu", 650, 2400),
+    ("Yazılım lisansı", 2000, 15000), ("Nakliye bedeli", 300, 4500), ("Bakım onarım hizmeti", 750, 6000),
+    ("Ofis sandalyesi", 1200, 5500), ("Çimento 50 kg", 110, 190), ("Pamuklu kumaş (m)", 45, 160),
+    ("Motor yağı 4 L", 400, 1100), ("Kablo 3x2,5 (m)", 18, 60), ("Gübre 25 kg", 300, 900),
+)
+CITIES = ("İstanbul", "Ankara", "İzmir", "Bursa", "Kocaeli", "Antalya", "Konya", "Gaziantep")
+TAX_OFFICES = ("Kadıköy", "Çankaya", "Konak", "Nilüfer", "Gebze", "Muratpaşa", "Selçuklu", "Şahinbey")
+SERIES = ("GIB", "ABC", "FTR", "EFA", "SAT")
+KDV_RATES = (1, 10, 20)
+LAYOUTS = ("klasik", "iki_sutun", "tablo")
+# Etiket anahtarları (parse_invoice_data sonuç anahtarları)
+LABEL_FIELDS = ("fatura_tarihi", "toplam_tutar", "fatura_no", "satıcı_adı", "vergi_no")
+FONT_NAMES = ("DejaVuSans.ttf", "DejaVuSerif.ttf", "DejaVuSansMono.ttf", "LiberationSans-Regular.ttf",
+              "LiberationSerif-Regular.ttf", "arial.ttf", "times.ttf", "Arial.ttf")
+FONT_DIRS = ("/usr/share/fonts", "/usr/local/share/fonts", "/Library/Fonts", "/System/Library/Fonts",
+             "C:\\Windows\\Fonts")
+# A4, 150 DPI
+RENDER_DPI = 150
+PAGE_SIZE = (1240, 1754)
+MARGIN = 80
+LINE_HEIGHT = 38
+FONT_SIZE = 24
+ROWS_PER_PAGE = (PAGE_SIZE[1] - 2 * MARGIN) // LINE_HEIGHT
+# Kalem sayısı bu olasılıkla çok sayfalı fatura üretecek kadar yüksek seçilir
+MULTI_PAGE_RATE = 0.1
+
+# Satır: (yatay konum oranı, metin) çiftleri
+Row = List[Tuple[float, str]]
+
+class SyntheticInvoice(NamedTuple):
+    """Üretilen fatura: sayfa sayfa satırlar, etiketler ve görüntü varyasyonları için tohum."""
+    name: str
+    layout: str
+    pages: List[List[Row]]
+    labels: Dict[str, str]
+    seed: int
+
+    @property
+    def text(self) -> str:
+        """Faturanın OCR'dan beklenen metni (satırlar soldan sağa)."""
+        return "\n".join("   ".join(text for _, text in sorted(row)) for page in self.pages for row in page)
+
+def vkn_check_digit(first_nine: str) -> str:
+    """10 haneli vergi kimlik numarasının kontrol hanesi."""
+    total = 0
+    for i, char in enumerate(first_nine):
+        shifted = (int(char) + 9 - i) % 10
+        value = (shifted * 2 ** (9 - i)) % 9
+        if shifted != 0 and value == 0:
+            value = 9
+        total += value
+    return str((10 - total % 10) % 10)
+
+def random_vkn(rng: random.Random) -> str:
+    first_nine = str(rng.randint(1, 9)) + "".join(str(rng.randint(0, 9)) for _ in range(8))
+    return first_nine + vkn_check_digit(first_nine)
+
+def format_amount(value: Decimal) -> str:
+    """Türkçe tutar biçimi: 12.345,67"""
+    return f"{value:,.2f}".translate(str.maketrans(",.", ".,"))
+
+def _money(value: float) -> Decimal:
+    return Decimal(str(value)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+def _item_rows(rng: random.Random, count: int, layout: str) -> Tuple[List[Row], Decimal]:
+    rows = []
+    suffix = rng.choice(("", " TL"))
+    subtotal = Decimal("0")
+    for i in range(count):
+        name, low, high = rng.choice(ITEMS)
+        quantity = rng.randint(1, 20)
+        price = _money(rng.uniform(low, high))
+        amount = price * quantity
+        subtotal += amount
+        if layout == "tablo":
+            rows.append([(0.05, str(i + 1)), (0.1, name), (0.5, str(quantity)), (0.6, format_amount(price)),
+                         (0.78, format_amount(amount))])
+        else:
+            rows.append([(0.05, f"{name} x{quantity}"), (0.72, format_amount(amount) + suffix)])
+    return rows, subtotal
+
+def generate_invoice(seed: int, index: int) -> SyntheticInvoice:
+    """seed ve sıra numarasından belirlenimci bir fatura üretir."""
+    rng = random.Random(f"{seed}:{index}")
+    seller = rng.choice(SELLERS)
+    vkn = random_vkn(rng)
+    issued = date(2020, 1, 1) + timedelta(days=rng.randrange(6 * 365))
+    invoice_no = f"{rng.choice(SERIES)}{issued.year}{rng.randrange(10 ** 9):09d}"
+    date_text = issued.strftime("%d.%m.%Y")
+    layout = rng.choice(LAYOUTS)
+    count = rng.randint(25, 60) if rng.random() < MULTI_PAGE_RATE else rng.randint(1, 8)
+    items, subtotal = _item_rows(rng, count, layout)
+    rate = rng.choice(KDV_RATES)
+    kdv = _money(float(subtotal * rate / 100))
+    total = subtotal + kdv
+    city, office = rng.choice(CITIES), rng.choice(TAX_OFFICES)
+
+    if layout == "klasik":
+        head = [[(0.05, f"Satıcı: {seller}")], [(0.05, f"{city} / Türkiye")],
+                [(0.05, f"Fatura No: {invoice_no}")], [(0.05, f"Tarih: {date_text}")],
+                [(0.05, f"Vergi Dairesi: {office}")], [(0.05, f"Vergi No: {vkn}")], []]
+        foot = [[], [(0.05, "Toplam:"), (0.72, f"{format_amount(total)} TL")]]
+    elif layout == "iki_sutun":
+        head = [[(0.05, f"Firma: {seller}"), (0.6, "e-FATURA")], [(0.05, f"{office} V.D.  VKN: {vkn}")],
+                [(0.05, city), (0.6, f"Fatura No: {invoice_no}")], [(0.6, f"Düzenleme Tarihi: {date_text}")], []]
+        foot = [[], [(0.5, f"KDV (%{rate}):"), (0.72, f"{format_amount(kdv)} TL")],
+                [(0.5, "Genel Toplam:"), (0.72, f"{format_amount(total)} TL")]]
+    else:
+        head = [[(0.05, "FATURA")], [(0.05, f"Şirket: {seller}")], [(0.05, f"Vergi No: {vkn} ({office})")],
+                [(0.05, f"Fatura Numarası: {invoice_no}"), (0.6, f"Tarih: {date_text}")], [],
+                [(0.05, "#"), (0.1, "Açıklama"), (0.5, "Miktar"), (0.6, "Birim Fiyat"), (0.78, "Tutar")]]
+        foot = [[], [(0.5, "Ara Toplam:"), (0.78, format_amount(subtotal))],
+                [(0.5, f"KDV %{rate}:"), (0.78, format_amount(kdv))],
+                [(0.5, "Genel Toplam:"), (0.78, f"{format_amount(total)} TL")]]
+    rows = head + items + foot
+    pages = [rows[start:start + ROWS_PER_PAGE] for start in range(0, len(rows), ROWS_PER_PAGE)]
+    labels = {"fatura_tarihi": date_text, "toplam_tutar": format_amount(total), "fatura_no": invoice_no,
+              "satıcı_adı": seller, "vergi_no": vkn}
+    return SyntheticInvoice(f"fatura_{seed}_{index:06d}", layout, pages, labels, rng.getrandbits(32))
+
+def generate_invoices(count: int, seed: int = 0) -> Iterator[SyntheticInvoice]:
+    for index in range(count):
+        yield generate_invoice(seed, index)
+
+@lru_cache(maxsize=1)
+def find_fonts() -> Tuple[str, ...]:
+    """Sistemde bulunan TrueType yazı tiplerinden FONT_NAMES'te olanlar."""
+    wanted = {name.lower() for name in FONT_NAMES}
+    found = {}
+    for directory in FONT_DIRS:
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if name.lower() in wanted:
+                    found.setdefault(name.lower(), os.path.join(root, name))
+    return tuple(found[name] for name in sorted(found))
+
+@lru_cache(maxsize=32)
+def _font(path: Optional[str], size: int) -> ImageFont.ImageFont:
+    if path:
+        return ImageFont.truetype(path, size)
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1
+        return ImageFont.load_default()
+
+def render_invoice(invoice: SyntheticInvoice, noise: Optional[float] = None, skew: Optional[float] = None,
+                   blur: Optional[float] = None) -> List[Image.Image]:
+    """
+    Faturayı sayfa görüntülerine (gri tonlu, RENDER_DPI) çizer. noise (gürültü std. sapması),
+    skew (derece) ve blur (yarıçap) verilmezse faturanın tohumundan seçilir.
+    """
+    rng = random.Random(invoice.seed)
+    fonts = find_fonts()
+    font = _font(rng.choice(fonts) if fonts else None, FONT_SIZE + rng.randint(-3, 3))
+    noise = rng.choice((0.0, 0.0, 6.0, 14.0)) if noise is None else noise
+    skew = rng.uniform(-2.0, 2.0) if skew is None else skew
+    blur = rng.choice((0.0, 0.0, 0.6)) if blur is None else blur
+    noise_rng = np.random.default_rng(invoice.seed)
+    images = []
+    for page in invoice.pages:
+        image = Image.new("L", PAGE_SIZE, 255)
+        draw = ImageDraw.Draw(image)
+        for i, row in enumerate(page):
+            for x, text in row:
+                draw.text((MARGIN + x * (PAGE_SIZE[0] - 2 * MARGIN), MARGIN + i * LINE_HEIGHT), text, fill=0, font=font)
+        if skew:
+            image = image.rotate(skew, resample=Image.BICUBIC, fillcolor=255)
+        if blur:
+            image = image.filter(ImageFilter.GaussianBlur(blur))
+        if noise:
+            pixels = np.asarray(image, dtype=np.float32) + noise_rng.normal(0, noise, (PAGE_SIZE[1], PAGE_SIZE[0]))
+            image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+        image.info["dpi"] = (RENDER_DPI, RENDER_DPI)
+        images.append(image)
+    return images
+
+def invoice_file(invoice: SyntheticInvoice, fmt: Optional[str] = None) -> Tuple[str, bytes, str]:
+    """
+    Faturayı (dosya adı, içerik, MIME tipi) olarak döndürür. Çok sayfalı faturalar her zaman PDF'tir;
+    fmt ("png", "jpg", "pdf") verilmezse biçim faturanın tohumundan seçilir.
+    """
+    pages = render_invoice(invoice)
+    if fmt is None:
+        fmt = "pdf" if len(pages) > 1 else random.Random(invoice.seed + 1).choice(("png", "jpg", "pdf"))
+    buffer = io.BytesIO()
+    if fmt == "pdf":
+        pages[0].save(buffer, format="PDF", resolution=RENDER_DPI, save_all=True, append_images=pages[1:])
+        mime = "application/pdf"
+    elif len(pages) > 1:
+        raise ValueError("Çok sayfalı faturalar yalnızca PDF olarak yazılabilir")
+    elif fmt == "jpg":
+        pages[0].save(buffer, format="JPEG", quality=85, dpi=(RENDER_DPI, RENDER_DPI))
+        mime = "image/jpeg"
+    else:
+        pages[0].save(buffer, format="PNG", dpi=(RENDER_DPI, RENDER_DPI))
+        mime = "image/png"
+    return f"{invoice.name}.{fmt}", buffer.getvalue(), mime
+
+def write_corpus(directory: str, count: int, seed: int = 0) -> str:
+    """count faturayı directory'ye yazar; etiketler labels.jsonl dosyasına yazılır. Etiket dosyasının yolunu döndürür."""
+    os.makedirs(directory, exist_ok=True)
+    labels_path = os.path.join(directory, "labels.jsonl")
+    with open(labels_path, "w", encoding="utf-8") as labels:
+        for invoice in generate_invoices(count, seed):
+            name, data, _ = invoice_file(invoice)
+            with open(os.path.join(directory, name), "wb") as f:
+                f.write(data)
+            record = {"dosya_adi": name, "duzen": invoice.layout, "sayfa": len(invoice.pages), **invoice.labels}
+            labels.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return labels_path
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Etiketli sentetik fatura derlemi yazar.")
+    parser.add_argument("directory", help="Çıktı dizini")
+    parser.add_argument("--count", type=int, default=100, help="Fatura sayısı")
+    parser.add_argument("--seed", type=int, default=0, help="Tohum; aynı tohum aynı derlemi üretir")
+    args = parser.parse_args(argv)
+    print(write_corpus(args.directory, args.count, args.seed), file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
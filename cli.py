@@ -0,0 +1,172 @@
+"""
+Komut satırından toplu fatura işleme.
+
+Örnek:
+    python cli.py faturalar/ "arsiv/2024/**/*.pdf" -o sonuc.jsonl --workers 8
+
+Sonuçlar artımlı yazılır; aynı çıktı için tekrar çalıştırıldığında manifestte
+tamamlanmış görünen dosyalar atlanır.
+"""
+import argparse
+import glob
+import os
+import sys
+from collections import Counter
+from contextlib import ExitStack
+from typing import Dict, Iterable, Iterator, List, Tuple
+from ocr.engines import DEFAULT_ENGINE, ENGINE_NAMES, configure_engine
+from ocr.batch import DEFAULT_TIMEOUT, DEFAULT_WORKERS, iter_ocr_batch
+from ocr.invoice_parser import extract_fields, list_patterns
+from ocr.ocr_engine import clean_ocr_text
+from ocr.preprocess import DEFAULT_PRESET, PRESETS
+from ocr.pdf_utils import DEFAULT_DPI, DEFAULT_MAX_PAGES, PdfOptions
+from db.export import EXPORT_FORMATS, open_record_writer
+from utils.checkpoint import CheckpointManifest
+from utils.profiling import BatchProfile, profile_file, profile_run, stage
+
+MIME_TYPES = {".pdf": "application/pdf", ".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png"}
+
+def _walk_dir(directory: str) -> Iterator[str]:
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            yield os.path.join(root, name)
+
+def iter_input_files(inputs: Iterable[str]) -> Iterator[str]:
+    """Dizinleri özyinelemeli dolaşır, glob desenlerini genişletir; desteklenen dosyaları birer kez üretir."""
+    seen = set()
+    for item in inputs:
+        paths = _walk_dir(item) if os.path.isdir(item) else sorted(glob.iglob(item, recursive=True))
+        for path in paths:
+            if path in seen or os.path.splitext(path)[1].lower() not in MIME_TYPES or not os.path.isfile(path):
+                continue
+            seen.add(path)
+            yield path
+
+def _detect_format(output: str, fmt: str) -> str:
+    if fmt:
+        return fmt
+    ext = os.path.splitext(output)[1].lower().lstrip(".")
+    return ext if ext in EXPORT_FORMATS else "jsonl"
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Fatura dosyalarını OCR ile işleyip JSONL/CSV/Parquet olarak yazar.")
+    parser.add_argument("inputs", nargs="+", help="Dizin, dosya veya glob deseni (ör. 'arsiv/**/*.pdf')")
+    parser.add_argument("-o", "--output", required=True, help="Çıktı dosyası")
+    parser.add_argument("-f", "--format", choices=EXPORT_FORMATS, help="Çıktı biçimi (varsayılan: uzantıdan)")
+    parser.add_argument("--lang", default="tur", help="OCR dili (varsayılan: tur)")
+    parser.add_argument("--enhance", nargs="?", const=True, default=False, choices=list(PRESETS),
+                        help=f"Görüntüyü OCR öncesi ön işlemden geçir; isteğe bağlı hazır ayar (varsayılan: {DEFAULT_PRESET})")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Paralel işçi sayısı")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="Dosya başına adım zaman aşımı (sn)")
+    parser.add_argument("--dpi", type=int, default=DEFAULT_DPI, help="PDF çözünürlüğü")
+    parser.add_argument("--first-page", type=int, default=1, help="PDF ilk sayfa")
+    parser.add_argument("--last-page", type=int, default=DEFAULT_MAX_PAGES, help="PDF son sayfa (0 = tümü)")
+    parser.add_argument("--no-text-layer", action="store_true", help="PDF metin katmanını kullanma, her sayfayı OCR'la")
+    parser.add_argument("--no-templates", action="store_true", help="Tedarikçi şablonlarını kullanma, her sayfayı tam OCR'la")
+    parser.add_argument("--no-adaptive", action="store_true",
+                        help="Kademeli OCR'ı kapat; her dosyayı tek geçişte, seçilen DPI ile OCR'la")
+    parser.add_argument("--batch-size", type=int, help="Diske yazmadan önce biriktirilecek kayıt sayısı")
+    parser.add_argument("--manifest", help="Kaldığı yerden devam manifesti (varsayılan: <çıktı>.manifest.jsonl)")
+    parser.add_argument("--profile", help="Aşama sürelerini bu dosyaya yaz (.csv uzantısı CSV, diğerleri JSON)")
+    parser.add_argument("--deep-profile", action="store_true",
+                        help="Tek süreçte cProfile + tracemalloc ile izle ve raporu yazdır (yavaştır)")
+    parser.add_argument("--engine", choices=ENGINE_NAMES, default=DEFAULT_ENGINE,
+                        help="OCR motoru (varsayılan: FATURA_OCR_ENGINE veya auto)")
+    parser.add_argument("--tesseract-cmd", help="Tesseract çalıştırılabilir dosyasının yolu (varsayılan: TESSERACT_CMD)")
+    return parser
+
+def main(argv: List[str] = None) -> int:
+    args = build_parser().parse_args(argv)
+    configure_engine(args.engine, args.tesseract_cmd)
+    fmt = _detect_format(args.output, args.format)
+    pdf_options = PdfOptions(args.dpi, args.first_page, args.last_page or None, not args.no_text_layer)
+    columns = ["dosya_adi"] + list(list_patterns().keys()) + ["ocr_kademesi"]
+    manifest = CheckpointManifest(args.manifest or args.output + ".manifest.jsonl")
+    skipped = 0
+    # Havuzdaki dosyaların stat bilgisi; sonuç gelince manifeste yazılmak üzere alınır
+    in_flight: Dict[str, os.stat_result] = {}
+    pending: List[Tuple[str, os.stat_result]] = []
+
+    def items() -> Iterator[Tuple[str, bytes, str]]:
+        nonlocal skipped
+        for path in iter_input_files(args.inputs):
+            stat = os.stat(path)
+            if manifest.is_done(path, stat):
+                skipped += 1
+                continue
+            with open(path, "rb") as f:
+                data = f.read()
+            in_flight[path] = stat
+            yield path, data, MIME_TYPES[os.path.splitext(path)[1].lower()]
+
+    processed = failed = ocr_calls = 0
+    ocr_ms = 0.0
+    tiers: Counter = Counter()
+    profile = BatchProfile()
+    # İşçi süreçlerindeki kod izlenemediğinden ayrıntılı profilde OCR da bu süreçte yapılır
+    workers = 1 if args.deep_profile else args.workers
+    writer = open_record_writer(args.output, fmt, columns, args.batch_size)
+    with ExitStack() as stack:
+        run = stack.enter_context(profile_run()) if args.deep_profile else None
+        try:
+            for result in iter_ocr_batch(items(), args.lang, args.enhance, workers=workers,
+                                         timeout=args.timeout, pdf_options=pdf_options,
+                                         use_templates=not args.no_templates, adaptive=not args.no_adaptive):
+                stat = in_flight.pop(result["name"])
+                if result["error"]:
+                    failed += 1
+                    print(f"HATA {result['name']}: {result['error']}", file=sys.stderr)
+                    continue
+                if not result["cached"]:
+                    ocr_calls += 1
+                    ocr_ms += result["ocr_ms"]
+                record = {"dosya_adi": result["name"]}
+                with profile_file(result["name"], result["timings"]) as file_profile:
+                    if result["fields"]:
+                        # Şablonda bölgesi olmayan alanlar bulunamadı sayılır
+                        record.update(dict.fromkeys(columns[1:-1], "bulunamadı"))
+                        record.update(result["fields"])
+                    else:
+                        with stage("clean"):
+                            text = clean_ocr_text(result["raw_text"])
+                        with stage("regex"):
+                            record.update(extract_fields(text))
+                profile.add(file_profile)
+                record["ocr_kademesi"] = result["tier"]
+                if result["tier"]:
+                    tiers[result["tier"]] += 1
+                pending.append((result["name"], stat))
+                processed += 1
+                with profile.batch_stage("write"):
+                    flushed = writer.write(record)
+                if flushed:
+                    manifest.mark_done(pending)
+                    pending = []
+                if processed % 100 == 0:
+                    print(f"{processed} fatura işlendi", file=sys.stderr)
+        finally:
+            with profile.batch_stage("write"):
+                writer.close()
+            manifest.mark_done(pending)
+            manifest.close()
+    profile.finish()
+    if run is not None:
+        profile.report = run.report()
+        print(profile.report, file=sys.stderr)
+    if args.profile:
+        with open(args.profile, "w", encoding="utf-8", newline="") as f:
+            f.write(profile.to_csv() if args.profile.lower().endswith(".csv") else profile.to_json())
+    print(f"Tamamlandı: {processed} işlendi, {skipped} atlandı (önceden tamamlanmış), {failed} hatalı.", file=sys.stderr)
+    if ocr_calls:
+        print(f"Ortalama OCR süresi: {ocr_ms / ocr_calls:.0f} ms/dosya ({ocr_calls} dosya)", file=sys.stderr)
+    if tiers:
+        print("OCR kademeleri: " + ", ".join(f"{name} {count}" for name, count in tiers.most_common()), file=sys.stderr)
+    slowest = profile.summary()[:3]
+    if slowest:
+        print("En yavaş aşamalar (p50/p95): " + ", ".join(
+            f"{item['asama']} {item['p50_ms']:.0f}/{item['p95_ms']:.0f} ms" for item in slowest), file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
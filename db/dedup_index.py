@@ -0,0 +1,134 @@
+"""
+Mükerrer fatura dizini. İşlenen her belge için içerik özeti, ilk sayfanın algısal özeti ve
+ayrıştırılan VKN + fatura no + tutar anahtarı fatura deposunun bağlantısı üzerinden aynı DuckDB
+dosyasında saklanır. Sorgular dizinli sütunlarda yapılır: içerik özeti ve anahtar doğrudan, algısal
+özet ise bantlara bölünmüş (çoklu dizin) aramayla bulunur; geçmiş belleğe yüklenmez.
+"""
+import json
+import threading
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from db.invoice_store import InvoiceStore, get_default_store
+
+DEDUP_TABLE = "mukerrer_dizini"
+# Algısal özet 128 bittir ve 16 bitlik 8 banda bölünür. Hamming uzaklığı bant sayısından küçükse
+# (güvercin yuvası ilkesi) en az bir bant birebir aynıdır; aday arama bu eşitlikle yapılır.
+PHASH_BITS = 128
+PHASH_BANDS = 8
+PHASH_MAX_DISTANCE = PHASH_BANDS - 1
+BAND_COLUMNS = [f"bant{i}" for i in range(PHASH_BANDS)]
+ENTRY_COLUMNS = "icerik_ozeti, algisal_ozet, fatura_anahtari, dosya_adi, onbellek_anahtari"
+
+class DedupEntry(NamedTuple):
+    digest: str
+    phash: Optional[int]
+    invoice_key: Optional[str]
+    file_name: str
+    cache_key: Optional[str]
+
+def phash_bands(phash: int) -> List[int]:
+    width = PHASH_BITS // PHASH_BANDS
+    mask = (1 << width) - 1
+    return [(phash >> (i * width)) & mask for i in range(PHASH_BANDS)]
+
+def _entry(row: Tuple[Any, ...]) -> DedupEntry:
+    digest, phash, key, name, cache_key = row
+    return DedupEntry(digest, int(phash, 16) if phash else None, key, name, cache_key)
+
+class DedupIndex:
+    """Belgeleri içerik, görüntü ve fatura anahtarıyla eşleştiren kalıcı dizin; deponun bağlantısını kullanır."""
+
+    def __init__(self, store: InvoiceStore):
+        self._con = store.cursor()
+        self._lock = threading.Lock()
+        with self._lock:
+            self._con.execute(
+                f"CREATE TABLE IF NOT EXISTS {DEDUP_TABLE} ("
+                "icerik_ozeti VARCHAR, "
+                "algisal_ozet VARCHAR, "
+                "fatura_anahtari VARCHAR, "
+                "dosya_adi VARCHAR, "
+                "onbellek_anahtari VARCHAR, "
+                "dogrulama VARCHAR, "
+                + ", ".join(f"{column} INTEGER" for column in BAND_COLUMNS) + ")"
+            )
+            for column in ["icerik_ozeti", "fatura_anahtari"] + BAND_COLUMNS:
+                self._con.execute(f"CREATE INDEX IF NOT EXISTS {DEDUP_TABLE}_{column} ON {DEDUP_TABLE} ({column})")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._con.execute(f"SELECT count(*) FROM {DEDUP_TABLE}").fetchone()[0]
+
+    def _find_one(self, column: str, value: str) -> Optional[DedupEntry]:
+        # Aynı anahtar için ilk kayıt asıl kabul edilir
+        with self._lock:
+            row = self._con.execute(
+                f"SELECT {ENTRY_COLUMNS} FROM {DEDUP_TABLE} WHERE {column} = ? ORDER BY rowid LIMIT 1", [value]
+            ).fetchone()
+        return None if row is None else _entry(row)
+
+    def find_exact(self, digest: str) -> Optional[DedupEntry]:
+        return self._find_one("icerik_ozeti", digest)
+
+    def find_key(self, invoice_key: Optional[str]) -> Optional[DedupEntry]:
+        if not invoice_key:
+            return None
+        return self._find_one("fatura_anahtari", invoice_key)
+
+    def find_similar(self, phash: int, max_distance: int = PHASH_MAX_DISTANCE) -> List[Tuple[int, DedupEntry]]:
+        """Algısal özeti en fazla max_distance bit farklı kayıtları (uzaklık, kayıt) olarak, yakından uzağa döndürür."""
+        max_distance = min(max_distance, PHASH_MAX_DISTANCE)
+        # Her bant kendi dizininden aranır; OR yerine UNION dizin kullanımını korur
+        query = " UNION ".join(
+            f"SELECT {ENTRY_COLUMNS} FROM {DEDUP_TABLE} WHERE {column} = ?" for column in BAND_COLUMNS
+        )
+        with self._lock:
+            rows = self._con.execute(query, phash_bands(phash)).fetchall()
+        found = []
+        for row in rows:
+            entry = _entry(row)
+            distance = bin(entry.phash ^ phash).count("1")
+            if distance <= max_distance:
+                found.append((distance, entry))
+        return sorted(found, key=lambda x: x[0])
+
+    def verification(self, digest: str) -> Optional[Dict[str, Any]]:
+        """Algısal eşleşmeyi doğrulamak için saklanan alan kutuları ve değerleri (bkz. ocr.dedup)."""
+        with self._lock:
+            row = self._con.execute(
+                f"SELECT dogrulama FROM {DEDUP_TABLE} WHERE icerik_ozeti = ? LIMIT 1", [digest]
+            ).fetchone()
+        return json.loads(row[0]) if row and row[0] else None
+
+    def add(self, entry: DedupEntry, verification: Optional[Dict[str, Any]] = None) -> bool:
+        """Belgeyi dizine ekler; içerik zaten kayıtlıysa False döner."""
+        bands = [None] * PHASH_BANDS if entry.phash is None else phash_bands(entry.phash)
+        with self._lock:
+            if self._con.execute(f"SELECT 1 FROM {DEDUP_TABLE} WHERE icerik_ozeti = ? LIMIT 1", [entry.digest]).fetchone():
+                return False
+            self._con.execute(
+                f"INSERT INTO {DEDUP_TABLE} ({ENTRY_COLUMNS}, dogrulama, {', '.join(BAND_COLUMNS)}) "
+                f"VALUES ({', '.join(['?'] * (6 + PHASH_BANDS))})",
+                [entry.digest, None if entry.phash is None else format(entry.phash, f"0{PHASH_BITS // 4}x"),
+                 entry.invoice_key, entry.file_name, entry.cache_key,
+                 json.dumps(verification, ensure_ascii=False) if verification else None] + bands,
+            )
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._con.execute(f"DELETE FROM {DEDUP_TABLE}")
+
+    def close(self) -> None:
+        with self._lock:
+            self._con.close()
+
+_default_index: Optional[DedupIndex] = None
+_default_index_lock = threading.Lock()
+
+def get_default_dedup_index() -> DedupIndex:
+    """Uygulama genelinde paylaşılan mükerrer fatura dizinini (varsayılan deponun bağlantısında) döndürür."""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = DedupIndex(get_default_store())
+        return _default_index
@@ -0,0 +1,262 @@
+import csv
+import datetime
+import io
+import json
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from db.invoice_store import quote_ident
+
+EXPORT_FORMATS = ("jsonl", "csv", "parquet")
+# Arayüzden dışa aktarma hedefleri: biçim -> (dosya adı, MIME tipi)
+DOWNLOAD_TARGETS = {
+    "csv": ("faturalar.csv", "text/csv"),
+    "json": ("faturalar.json", "application/json"),
+    "sql": ("faturalar.sql", "text/plain"),
+    "parquet": ("faturalar.parquet", "application/vnd.apache.parquet"),
+    "duckdb": ("faturalar.duckdb", "application/octet-stream"),
+}
+
+class RecordWriter(ABC):
+    """
+    Fatura kayıtlarını dosyaya artımlı yazan temel sınıf. Kayıtlar batch_size kadar
+    bellekte biriktirilir; write() tampon diske yazıldığında True döndürür.
+    """
+
+    def __init__(self, path: str, columns: List[str], batch_size: int = 100):
+        self.path = path
+        self.columns = list(columns)
+        self.batch_size = max(1, batch_size)
+        self._buffer: List[Dict[str, Any]] = []
+
+    def write(self, record: Dict[str, Any]) -> bool:
+        self._buffer.append(record)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+            return True
+        return False
+
+    def flush(self) -> None:
+        if self._buffer:
+            self._write_rows([{col: _text(rec.get(col)) for col in self.columns} for rec in self._buffer])
+            self._buffer = []
+
+    @abstractmethod
+    def _write_rows(self, rows: List[Dict[str, Optional[str]]]) -> None:
+        """Tampondaki kayıtları (sütun -> metin) dosyaya ekler."""
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "RecordWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+def _text(value: Any) -> Optional[str]:
+    return None if value is None else str(value)
+
+class JsonlWriter(RecordWriter):
+    """Her kaydı bir JSON satırı olarak ekler; var olan dosyaya devam eder."""
+
+    def __init__(self, path: str, columns: List[str], batch_size: int = 100):
+        super().__init__(path, columns, batch_size)
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _write_rows(self, rows: List[Dict[str, Optional[str]]]) -> None:
+        self._file.write("".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        super().close()
+        self._file.close()
+
+class CsvWriter(RecordWriter):
+    """CSV'ye ekler; başlık satırı yalnızca dosya yeni veya boşsa yazılır."""
+
+    def __init__(self, path: str, columns: List[str], batch_size: int = 100):
+        super().__init__(path, columns, batch_size)
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "a", encoding="utf-8", newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=self.columns, extrasaction="ignore")
+        if is_new:
+            self._writer.writeheader()
+
+    def _write_rows(self, rows: List[Dict[str, Optional[str]]]) -> None:
+        self._writer.writerows(rows)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        super().close()
+        self._file.close()
+
+class ParquetWriter(RecordWriter):
+    """
+    Her tamponu ayrı ve tamamlanmış bir Parquet dosyası olarak yazar (pyarrow gerekir):
+    ad.part00001.parquet, ad.part00002.parquet ... Kesilen bir çalıştırma yarım dosya bırakmaz,
+    devam eden çalıştırma sıradaki numaradan başlar.
+    """
+
+    def __init__(self, path: str, columns: List[str], batch_size: int = 1000):
+        super().__init__(path, columns, batch_size)
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ModuleNotFoundError:
+            raise RuntimeError("Parquet dışa aktarımı için 'pip install pyarrow' gereklidir.")
+        self._pa = pa
+        self._pq = pq
+        self._schema = pa.schema([(col, pa.string()) for col in self.columns])
+        self._stem, self._ext = os.path.splitext(path)
+        self._part = 0
+
+    def _next_part_path(self) -> str:
+        while True:
+            self._part += 1
+            part_path = f"{self._stem}.part{self._part:05d}{self._ext or '.parquet'}"
+            if not os.path.exists(part_path):
+                return part_path
+
+    def _write_rows(self, rows: List[Dict[str, Optional[str]]]) -> None:
+        part_path = self._next_part_path()
+        tmp_path = part_path + ".tmp"
+        self._pq.write_table(self._pa.Table.from_pylist(rows, schema=self._schema), tmp_path)
+        os.replace(tmp_path, part_path)
+
+def open_record_writer(path: str, fmt: str, columns: List[str], batch_size: Optional[int] = None) -> RecordWriter:
+    """Biçime (jsonl, csv, parquet) göre artımlı kayıt yazıcısı açar."""
+    writers = {"jsonl": JsonlWriter, "csv": CsvWriter, "parquet": ParquetWriter}
+    if fmt not in writers:
+        raise ValueError(f"Desteklenmeyen biçim: {fmt}")
+    if batch_size is None:
+        return writers[fmt](path, columns)
+    return writers[fmt](path, columns, batch_size)
+
+def _is_null(value: Any) -> bool:
+    try:
+        return value is None or bool(value != value)
+    except (TypeError, ValueError):
+        return False
+
+def _plain(value: Any) -> Any:
+    if _is_null(value):
+        return None
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat(sep=" ") if isinstance(value, datetime.datetime) else value.isoformat()
+    return value if isinstance(value, (str, int, float, bool)) else str(value)
+
+def _chunks(rows: Iterable[Sequence[Any]], size: int) -> Iterator[List[Sequence[Any]]]:
+    chunk: List[Sequence[Any]] = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def iter_csv_chunks(columns: List[str], rows: Iterable[Sequence[Any]], chunk_rows: int = 5000) -> Iterator[str]:
+    """Başlık ve satırları chunk_rows'luk CSV metin parçaları hâlinde üretir."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    for chunk in _chunks(rows, chunk_rows):
+        writer.writerows([[_plain(v) for v in row] for row in chunk])
+        yield buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+    if buf.tell():
+        yield buf.getvalue()
+
+def iter_json_chunks(columns: List[str], rows: Iterable[Sequence[Any]], chunk_rows: int = 5000) -> Iterator[str]:
+    """Kayıt listesini (orient="records") parça parça bir JSON dizisi olarak üretir."""
+    yield "["
+    first = True
+    for chunk in _chunks(rows, chunk_rows):
+        body = ",\n".join(json.dumps({c: _plain(v) for c, v in zip(columns, row)}, ensure_ascii=False)
+                          for row in chunk)
+        yield ("\n" if first else ",\n") + body
+        first = False
+    yield "\n]\n"
+
+def sql_literal(value: Any) -> str:
+    value = _plain(value)
+    if value is None:
+        return "NULL"
+    return "'" + str(value).replace("'", "''") + "'"
+
+def iter_sql_chunks(columns: List[str], rows: Iterable[Sequence[Any]], table_name: str = "fatura_df",
+                    batch_rows: int = 500) -> Iterator[str]:
+    """CREATE TABLE ve batch_rows satırlık çok satırlı INSERT ifadelerini parça parça üretir."""
+    table = quote_ident(table_name)
+    column_sql = ", ".join(quote_ident(c) for c in columns)
+    yield f"CREATE TABLE {table} (" + ", ".join(f"{quote_ident(c)} TEXT" for c in columns) + ");\n"
+    for chunk in _chunks(rows, batch_rows):
+        values = ",\n".join("(" + ", ".join(sql_literal(v) for v in row) + ")" for row in chunk)
+        yield f"INSERT INTO {table} ({column_sql}) VALUES\n{values};\n"
+
+def _sql_path(path: str) -> str:
+    return "'" + path.replace("'", "''") + "'"
+
+def export_store(store: Any, fmt: str, path: str, chunk_rows: int = 5000) -> str:
+    """
+    Fatura deposunu verilen biçimde dosyaya yazar. CSV/JSON/SQL satırlar parça parça okunup
+    yazılır; Parquet ve DuckDB çıktıları doğrudan DuckDB tarafından üretilir.
+    """
+    if fmt not in DOWNLOAD_TARGETS:
+        raise ValueError(f"Desteklenmeyen biçim: {fmt}")
+    if fmt in ("parquet", "duckdb"):
+        if os.path.exists(path):
+            os.remove(path)
+        cur = store.cursor()
+        try:
+            if fmt == "parquet":
+                cur.execute(f"COPY ({store.select_sql()}) TO {_sql_path(path)} (FORMAT PARQUET)")
+            else:
+                cur.execute(f"ATTACH {_sql_path(path)} AS disa_aktarim")
+                try:
+                    cur.execute(f"CREATE TABLE disa_aktarim.faturalar AS {store.select_sql()}")
+                finally:
+                    cur.execute("DETACH disa_aktarim")
+        finally:
+            cur.close()
+        return path
+    columns, rows = store.iter_rows(chunk_rows)
+    chunks = {
+        "csv": lambda: iter_csv_chunks(columns, rows, chunk_rows),
+        "json": lambda: iter_json_chunks(columns, rows, chunk_rows),
+        "sql": lambda: iter_sql_chunks(columns, rows),
+    }[fmt]()
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for chunk in chunks:
+            f.write(chunk)
+    return path
+
+def export_store_to_tempfile(store: Any, fmt: str) -> Tuple[str, str, str]:
+    """Depoyu geçici bir dosyaya aktarır; (yol, önerilen dosya adı, MIME tipi) döndürür."""
+    file_name, mime = DOWNLOAD_TARGETS[fmt]
+    fd, path = tempfile.mkstemp(suffix=os.path.splitext(file_name)[1])
+    os.close(fd)
+    export_store(store, fmt, path)
+    return path, file_name, mime
+
+def open_export(store: Any, fmt: str) -> BinaryIO:
+    """
+    Depoyu geçici bir dosyaya aktarır ve okunmak üzere açık dosya nesnesini döndürür; dosya
+    içeriği belleğe alınmaz. Geçici dosya nesne kapatıldığında silinir.
+    """
+    path, _, _ = export_store_to_tempfile(store, fmt)
+    # Windows'ta O_TEMPORARY dosyayı kapanışta siler; POSIX'te açık tanıtıcı silinen dosyayı okumaya devam eder
+    temporary = getattr(os, "O_TEMPORARY", 0)
+    try:
+        f = os.fdopen(os.open(path, os.O_RDONLY | getattr(os, "O_BINARY", 0) | temporary), "rb")
+    except OSError:
+        os.remove(path)
+        raise
+    if not temporary:
+        os.remove(path)
+    return f
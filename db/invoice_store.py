@@ -0,0 +1,200 @@
+import os
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+import duckdb
+import pandas as pd
+
+DB_PATH = os.environ.get(
+    "FATURA_DB_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "faturalar.duckdb"),
+)
+TABLE_NAME = "faturalar"
+# Sistem sütunları; desen alanları bunlardan sonra VARCHAR olarak eklenir
+SYSTEM_COLUMNS = ["id", "dosya_adi", "islenme_zamani", "onbellek_anahtari"]
+INTERNAL_COLUMNS = {"onbellek_anahtari"}
+
+def quote_ident(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+class InvoiceStore:
+    """
+    İşlenen faturaları yerel bir DuckDB dosyasında saklar. Kayıtlar toplu eklenir,
+    tablo ve "Son İşlenen Faturalar" görünümleri sayfalı okunur.
+    """
+
+    def __init__(self, path: str = DB_PATH):
+        self.path = path
+        self._con = duckdb.connect(database=path, read_only=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._con.execute(
+                f"CREATE TABLE IF NOT EXISTS {TABLE_NAME} ("
+                "id BIGINT PRIMARY KEY, "
+                "dosya_adi VARCHAR, "
+                "islenme_zamani TIMESTAMP, "
+                "onbellek_anahtari VARCHAR)"
+            )
+            self._columns = self._load_columns()
+            self._con.execute("CHECKPOINT")
+
+    def _load_columns(self) -> List[str]:
+        rows = self._con.execute(
+            "SELECT column_name FROM information_schema.columns WHERE table_name = ? ORDER BY ordinal_position",
+            [TABLE_NAME],
+        ).fetchall()
+        return [r[0] for r in rows]
+
+    @property
+    def columns(self) -> List[str]:
+        return list(self._columns)
+
+    @property
+    def field_columns(self) -> List[str]:
+        return [c for c in self._columns if c not in SYSTEM_COLUMNS]
+
+    def ensure_columns(self, fields: Iterable[str]) -> None:
+        """Tanımlı desen alanları için eksik sütunları ekler; var olan sütunlara dokunmaz."""
+        with self._lock:
+            added = False
+            for field in fields:
+                if field not in self._columns:
+                    self._con.execute(f"ALTER TABLE {TABLE_NAME} ADD COLUMN {quote_ident(field)} VARCHAR")
+                    self._columns.append(field)
+                    added = True
+            if added:
+                # Şema değişiklikleri WAL'de bekletilmez
+                self._con.execute("CHECKPOINT")
+
+    def append_many(self, records: List[Dict[str, Any]]) -> int:
+        """Kayıtları tek bir INSERT ile ekler. Bilinmeyen alanlar için önce sütun açılır."""
+        if not records:
+            return 0
+        fields = [k for rec in records for k in rec if k not in ("id", "islenme_zamani")]
+        self.ensure_columns(dict.fromkeys(fields))
+        columns = [c for c in self._columns if c not in ("id", "islenme_zamani")]
+        batch = pd.DataFrame.from_records(
+            [{c: (None if rec.get(c) is None else str(rec.get(c))) for c in columns} for rec in records],
+            columns=columns,
+        ).astype(object)
+        column_sql = ", ".join(quote_ident(c) for c in columns)
+        with self._lock:
+            self._con.register("_fatura_batch", batch)
+            try:
+                # id ve zaman sütunları varsayılan ifade yerine burada üretilir; DuckDB, WAL geri
+                # yüklemesinde fonksiyon içeren varsayılanları bağlayamayabiliyor
+                self._con.execute(
+                    f"INSERT INTO {TABLE_NAME} (id, islenme_zamani, {column_sql}) "
+                    f"SELECT (SELECT coalesce(max(id), 0) FROM {TABLE_NAME}) + row_number() OVER (), "
+                    f"current_timestamp, {column_sql} FROM _fatura_batch"
+                )
+            finally:
+                self._con.unregister("_fatura_batch")
+        return len(records)
+
+    def count(self, after_id: int = 0) -> int:
+        """Kayıt sayısı; after_id verilirse yalnızca id'si ondan büyük kayıtlar sayılır."""
+        with self._lock:
+            return self._con.execute(f"SELECT count(*) FROM {TABLE_NAME} WHERE id > ?", [after_id]).fetchone()[0]
+
+    def max_id(self) -> int:
+        """Son eklenen kaydın id'si; tablo boşsa 0."""
+        with self._lock:
+            return self._con.execute(f"SELECT coalesce(max(id), 0) FROM {TABLE_NAME}").fetchone()[0]
+
+    @property
+    def visible_columns(self) -> List[str]:
+        return [c for c in self._columns if c not in INTERNAL_COLUMNS]
+
+    def select_sql(self, descending: bool = False, after_id: int = 0) -> str:
+        """Görünür sütunları id sırasıyla seçen sorgu; after_id verilirse daha eski kayıtlar atlanır."""
+        order = "DESC" if descending else "ASC"
+        where = f" WHERE id > {int(after_id)}" if after_id else ""
+        return (f"SELECT {', '.join(quote_ident(c) for c in self.visible_columns)} FROM {TABLE_NAME}{where} "
+                f"ORDER BY id {order}")
+
+    def cursor(self) -> duckdb.DuckDBPyConnection:
+        """Uzun süren okumalar (dışa aktarma) için ana bağlantıyı kilitlemeyen ayrı bir imleç."""
+        with self._lock:
+            return self._con.cursor()
+
+    def iter_rows(self, batch_size: int = 5000) -> Tuple[List[str], Iterator[Tuple[Any, ...]]]:
+        """(sütunlar, satır üreteci) döndürür; satırlar ayrı bir imleçten batch_size'lık parçalarla okunur."""
+        columns = self.visible_columns
+        cur = self.cursor()
+        cur.execute(self.select_sql())
+
+        def rows() -> Iterator[Tuple[Any, ...]]:
+            try:
+                while True:
+                    chunk = cur.fetchmany(batch_size)
+                    if not chunk:
+                        break
+                    yield from chunk
+            finally:
+                cur.close()
+        return columns, rows()
+
+    def page(self, offset: int, limit: int, after_id: int = 0) -> pd.DataFrame:
+        """id sırasına göre bir sayfa kayıt döndürür."""
+        with self._lock:
+            return self._con.execute(f"{self.select_sql(after_id=after_id)} LIMIT ? OFFSET ?", [limit, offset]).df()
+
+    def tail(self, n: int = 5, after_id: int = 0) -> pd.DataFrame:
+        """Son eklenen n kaydı eklenme sırasıyla döndürür."""
+        with self._lock:
+            df = self._con.execute(f"{self.select_sql(descending=True, after_id=after_id)} LIMIT ?", [n]).df()
+        return df.iloc[::-1].reset_index(drop=True)
+
+    def to_df(self) -> pd.DataFrame:
+        with self._lock:
+            return self._con.execute(self.select_sql()).df()
+
+    def existing_keys(self, keys: Iterable[str]) -> Set[str]:
+        """Verilen önbellek anahtarlarından tabloda zaten bulunanları döndürür."""
+        keys = list(keys)
+        if not keys:
+            return set()
+        with self._lock:
+            rows = self._con.execute(
+                f"SELECT DISTINCT onbellek_anahtari FROM {TABLE_NAME} WHERE onbellek_anahtari IN "
+                "(SELECT unnest(?))",
+                [keys],
+            ).fetchall()
+        return {r[0] for r in rows}
+
+    def resurface(self, keys: Iterable[str]) -> int:
+        """
+        Verilen önbellek anahtarlı kayıtları yeni id ve işlenme zamanıyla tablonun sonuna taşır; yeniden
+        yüklenen dosyalar temizlenmiş görünümde ve son işlenenlerde görünür. Taşınan kayıt sayısını döndürür.
+        """
+        keys = list(keys)
+        if not keys:
+            return 0
+        with self._lock:
+            return self._con.execute(
+                f"UPDATE {TABLE_NAME} SET id = moved.new_id, islenme_zamani = current_timestamp FROM ("
+                f"SELECT id AS old_id, (SELECT max(id) FROM {TABLE_NAME}) + row_number() OVER (ORDER BY id) AS new_id "
+                f"FROM {TABLE_NAME} WHERE onbellek_anahtari IN (SELECT unnest(?))) moved "
+                f"WHERE {TABLE_NAME}.id = moved.old_id",
+                [keys],
+            ).fetchone()[0]
+
+    def clear(self) -> None:
+        """Tüm kayıtları kalıcı olarak siler."""
+        with self._lock:
+            self._con.execute(f"DELETE FROM {TABLE_NAME}")
+
+    def close(self) -> None:
+        with self._lock:
+            self._con.close()
+
+_default_store: Optional[InvoiceStore] = None
+_default_store_lock = threading.Lock()
+
+def get_default_store() -> InvoiceStore:
+    """Uygulama genelinde paylaşılan fatura deposunu döndürür."""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = InvoiceStore()
+        return _default_store
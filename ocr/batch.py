@@ -0,0 +1,204 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from ocr.engines import configure_engine, engine_settings
+from ocr.ocr_cache import OCRCache, get_default_cache
+from ocr.vendor_templates import get_template_registry
+from ocr.pdf_utils import PdfOptions
+from ocr.pipeline import cached_document, document_cache_key, ocr_document, ocr_uncached, store_document
+from utils.profiling import profile_file, stage
+
+DEFAULT_WORKERS = int(os.environ.get("FATURA_OCR_WORKERS", os.cpu_count() or 1))
+DEFAULT_TIMEOUT = float(os.environ.get("FATURA_OCR_TIMEOUT", "120"))
+# Her adım (PDF bilgisi, sayfa dönüştürme, sayfa OCR) timeout ile sınırlıdır; bir iş timeout'a ek
+# bu süre boyunca hiçbir adımı bitirmezse takılmış sayılır ve işçi havuzu yeniden başlatılır
+TIMEOUT_GRACE = 10.0
+MAX_RETRIES = 1
+
+# İşçi tarafı: ana süreçle paylaşılan canlılık dizisi
+_heartbeats: Optional[Any] = None
+
+def _init_worker(engine_name: str, tesseract_cmd: Optional[str], heartbeats: Any) -> None:
+    # spawn ile başlayan işçiler ana süreçte yapılan motor ayarlarını görmez; motor her
+    # işçide ilk dosyada bir kez oluşturulur ve işçi yaşadıkça açık kalır
+    global _heartbeats
+    configure_engine(engine_name, tesseract_cmd)
+    _heartbeats = heartbeats
+
+def _profiled_document(*args: Any, **kwargs: Any) -> Dict[str, Any]:
+    with profile_file("") as profile:
+        res = ocr_document(*args, **kwargs)
+    res["timings"] = profile.to_dict()
+    return res
+
+def _profiled_cached(cache: OCRCache, templates: Any, data: bytes, mime: str, ocr_lang: str,
+                     enhance: Union[bool, str], pdf_options: Optional[PdfOptions],
+                     adaptive: bool, key: Optional[str]) -> Tuple[str, Optional[Dict[str, Any]]]:
+    with profile_file("") as profile, stage("cache"):
+        key = key or document_cache_key(data, mime, ocr_lang, enhance, pdf_options, adaptive)
+        res = cached_document(cache, key, templates)
+    if res is not None:
+        res["timings"] = profile.to_dict()
+    return key, res
+
+def _profiled_store(cache: OCRCache, templates: Any, key: str, res: Dict[str, Any], mime: str, ocr_lang: str,
+                    enhance: Union[bool, str]) -> Dict[str, Any]:
+    # Önbelleğe yazma süresi işçinin ölçümlerine eklenir
+    with profile_file("", res.pop("timings", None)) as profile:
+        doc = store_document(cache, key, res, mime, ocr_lang, enhance, templates)
+    doc["timings"] = profile.to_dict()
+    return doc
+
+def _ocr_worker(slot: int, data: bytes, mime: str, ocr_lang: str, enhance: Union[bool, str], timeout: float,
+                pdf_options: Optional[PdfOptions], use_templates: bool, adaptive: bool) -> Dict[str, Any]:
+    # İşçi önbelleğe yazmaz: önbellek tek süreçten yazılınca boyut sınırı doğru izlenir
+    def beat(_stage: str = "") -> None:
+        # Ana süreç bu zamanı izleyerek takılan işleri bulur
+        _heartbeats[slot] = time.time()
+
+    beat()
+    templates = get_template_registry() if use_templates else None
+    # Aşama ölçümleri sonuçla birlikte ana sürece taşınır (bkz. utils.profiling)
+    with profile_file("", listener=beat) as profile:
+        res = ocr_uncached(data, mime, ocr_lang, enhance, timeout or None, pdf_options, templates, adaptive)
+    res["timings"] = profile.to_dict()
+    return res
+
+def _make_executor(workers: int, heartbeats: Any) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=engine_settings() + (heartbeats,),
+    )
+
+def _terminate_executor(executor: ProcessPoolExecutor) -> None:
+    # Çalışan bir future iptal edilemez; takılan işin süreci ancak sonlandırılarak serbest kalır
+    terminate = getattr(executor, "terminate_workers", None)  # Python 3.14+
+    if terminate is not None:
+        terminate()
+    else:
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.terminate()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+def _result(name: str, key: Optional[str], raw_text: str = "", cached: bool = False,
+            error: Optional[str] = None, ocr_ms: float = 0.0, template: Optional[str] = None,
+            fields: Optional[Dict[str, str]] = None, tier: Optional[str] = None,
+            words: Optional[List[Dict[str, Any]]] = None, timings: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    return {"name": name, "key": key, "raw_text": raw_text, "cached": cached, "error": error, "ocr_ms": ocr_ms,
+            "template": template, "fields": fields, "tier": tier, "words": words, "timings": timings}
+
+def _from_document(name: str, res: Dict[str, Any]) -> Dict[str, Any]:
+    return _result(name, res["key"], res["raw_text"], res["cached"], ocr_ms=res["ocr_ms"],
+                   template=res["template"], fields=res["fields"], tier=res["tier"], words=res["words"],
+                   timings=res.get("timings"))
+
+def iter_ocr_batch(
+    items: Iterable[Tuple[Any, ...]],
+    ocr_lang: str,
+    enhance: Union[bool, str],
+    workers: Optional[int] = None,
+    timeout: Optional[float] = None,
+    cache: Optional[OCRCache] = None,
+    pdf_options: Optional[PdfOptions] = None,
+    use_templates: bool = True,
+    adaptive: bool = True,
+) -> Iterator[Dict[str, Any]]:
+    """
+    (dosya adı, içerik, MIME tipi) öğelerini işçi süreç havuzunda OCR'dan geçirir ve
+    sonuçları tamamlanma sırasıyla üretir. Önbellekte olan dosyalar havuza gönderilmez. Öğeye dördüncü
+    eleman olarak aynı ayarlarla hesaplanmış önbellek anahtarı eklenebilir; sonucun "key" alanı odur
+    ve içerik yeniden özetlenmez (aynı adlı farklı dosyalar sonuçlarda anahtarla ayrılır).
+    Her sonuç: {"name", "key", "raw_text", "cached", "error", "ocr_ms", "template", "fields", "tier", "words",
+    "timings"}; "fields" yalnızca tedarikçi şablonuyla okunan faturalarda, "tier" kademeli OCR'da doludur.
+    "timings" dosyanın aşama ölçümleridir (FileProfile.to_dict(), bkz. utils.profiling).
+    Hatalı veya zaman aşımına uğrayan dosyalar "error" alanıyla döner, toplu işlem durmaz. timeout her
+    adıma ayrı uygulanır; işçide timeout + TIMEOUT_GRACE boyunca hiçbir adımı bitmeyen dosya zaman aşımına
+    uğramış sayılır ve işçi havuzu yeniden başlatılır. İşçilerin sonuçları cache'e bu süreçte yazılır.
+    """
+    cache = cache or get_default_cache()
+    workers = max(1, workers or DEFAULT_WORKERS)
+    timeout = DEFAULT_TIMEOUT if timeout is None else timeout
+    if workers == 1:
+        for name, data, mime, *known in items:
+            key = known[0] if known else None
+            try:
+                res = _profiled_document(data, mime, ocr_lang, enhance, cache, timeout=timeout or None,
+                                         pdf_options=pdf_options, use_templates=use_templates, adaptive=adaptive,
+                                         key=key)
+                yield _from_document(name, res)
+            except Exception as e:
+                yield _result(name, key, error=str(e))
+        return
+
+    templates = get_template_registry() if use_templates else None
+    # İşçiler her aşama sonunda kendi yuvalarına zaman yazar; havuz yenilense de dizi aynı kalır
+    heartbeats = multiprocessing.get_context("spawn").RawArray("d", workers)
+    executor = _make_executor(workers, heartbeats)
+    # Gönderilen iş sayısı işçi sayısıyla sınırlı tutulur; böylece bellek sınırlı kalır, her iş
+    # gönderildiği anda boş bir işçide başlar ve bir canlılık yuvası kullanır
+    in_flight: Dict[Future, Tuple[str, str, bytes, str, int, int]] = {}
+
+    def submit(name: str, key: str, data: bytes, mime: str, retries: int) -> None:
+        slot = min(set(range(workers)) - {job[4] for job in in_flight.values()})
+        heartbeats[slot] = time.time()
+        fut = executor.submit(_ocr_worker, slot, data, mime, ocr_lang, enhance, timeout, pdf_options,
+                              use_templates, adaptive)
+        in_flight[fut] = (name, key, data, mime, slot, retries)
+
+    source = iter(items)
+    exhausted = False
+    try:
+        while True:
+            while not exhausted and len(in_flight) < workers:
+                item = next(source, None)
+                if item is None:
+                    exhausted = True
+                    break
+                name, data, mime, *known = item
+                key, cached = _profiled_cached(cache, templates, data, mime, ocr_lang, enhance, pdf_options, adaptive,
+                                               known[0] if known else None)
+                if cached is not None:
+                    yield _from_document(name, cached)
+                    continue
+                submit(name, key, data, mime, 0)
+            if not in_flight:
+                break
+            done, _ = wait(list(in_flight), timeout=1.0, return_when=FIRST_COMPLETED)
+            broken = []
+            for fut in done:
+                name, key, data, mime, _, retries = in_flight.pop(fut)
+                try:
+                    res = _profiled_store(cache, templates, key, fut.result(), mime, ocr_lang, enhance)
+                    yield _from_document(name, res)
+                except BrokenProcessPool:
+                    broken.append((name, key, data, mime, retries + 1))
+                except Exception as e:
+                    yield _result(name, key, error=str(e))
+            hung = []
+            if timeout and not broken:
+                now = time.time()
+                hung = [fut for fut, job in in_flight.items() if now - heartbeats[job[4]] > timeout + TIMEOUT_GRACE]
+                for fut in hung:
+                    name, key = in_flight.pop(fut)[:2]
+                    yield _result(name, key, error=f"Zaman aşımı ({timeout:.0f} sn)")
+            if broken or hung:
+                # Çöken bir işçi havuzdaki tüm bekleyen işleri düşürür, takılan bir iş ise işçisini
+                # bırakmaz; havuz yenilenir ve diğer işler yeniden gönderilir. Çöken işler yalnızca bir kez
+                # daha denenir; takılan işin yanında kesilen işler deneme hakkından düşülmez.
+                pending = broken + [(name, key, data, mime, retries + bool(broken))
+                                    for name, key, data, mime, _, retries in in_flight.values()]
+                in_flight.clear()
+                _terminate_executor(executor)
+                executor = _make_executor(workers, heartbeats)
+                for name, key, data, mime, retries in pending:
+                    if retries > MAX_RETRIES:
+                        yield _result(name, key, error="İşçi süreç beklenmedik şekilde sonlandı")
+                        continue
+                    submit(name, key, data, mime, retries)
+    finally:
+        _terminate_executor(executor)
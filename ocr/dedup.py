@@ -0,0 +1,130 @@
+"""
+Mükerrer fatura tespiti (dizin için bkz. db.dedup_index). Aynı içerikli dosyalar içerik özetiyle,
+aynı kâğıdın yeniden taranmış kopyaları ilk sayfanın algısal özetiyle OCR'dan önce bulunur.
+
+Algısal özet aynı tedarikçinin aynı düzendeki farklı faturalarını ayırt edemez (yalnızca rakamlar
+farklıdır). Bu yüzden algısal aday, önceki belgede fatura no ve tutarın okunduğu kutular yeni
+sayfadan kırpılıp tek küçük OCR çağrısıyla okunarak doğrulanır; tam sayfa OCR yapılmaz.
+"""
+import re
+from typing import Any, Dict, List, NamedTuple, Optional
+from PIL import Image
+from db.dedup_index import PHASH_BITS, DedupEntry, DedupIndex
+from ocr.image_utils import dhash, load_image
+from ocr.ocr_cache import content_hash
+from ocr.vendor_templates import extract_template_fields
+from ocr.geometry import invert, map_box
+from ocr.word_index import Word, find_page, page_transform
+
+# Algısal özet için sayfa düşük çözünürlükte oluşturulur
+FINGERPRINT_DPI = 50
+PHASH_SIZE = (16, PHASH_BITS // 16)
+PHASH_MIN_DIFF = 3
+# Doğrulama kutuları yeniden taramadaki kaymayı karşılamak için sayfa boyutunun bu oranı kadar büyütülür
+VERIFY_MARGIN = 0.01
+# Doğrulanacak en fazla aday sayısı
+MAX_VERIFY_CANDIDATES = 3
+# Fatura anahtarını ve doğrulamayı oluşturan alanlar (desen anahtarları)
+KEY_FIELDS = ("tax", "invoice_no", "total")
+VERIFY_FIELDS = ("invoice_no", "total")
+
+class DuplicateCheck(NamedTuple):
+    """OCR öncesi kontrol sonucu. kind "icerik", "algisal" veya None (mükerrer değil)."""
+    digest: str
+    phash: Optional[int]
+    kind: Optional[str]
+    entry: Optional[DedupEntry]
+
+def page_hash(image: Image.Image) -> int:
+    width, height = PHASH_SIZE
+    return dhash(image, width, height, PHASH_MIN_DIFF)
+
+def normalize_field(field: str, value: Optional[str]) -> Optional[str]:
+    """Alan değerini karşılaştırılabilir biçime getirir; desen eşleşmesinin etiketleri atılır."""
+    if not value or value == "bulunamadı":
+        return None
+    if field == "tax":
+        found = re.findall(r"\d{10,11}", value)
+    elif field == "total":
+        found = [re.sub(r"\D", "", v) for v in re.findall(r"\d{1,3}(?:[.,]?\d{3})*[.,]\d{2}", value)]
+    else:
+        found = [v.upper() for v in re.findall(r"\w{5,}", value)]
+    return found[-1] if found else None
+
+def invoice_key(fields: Dict[str, str]) -> Optional[str]:
+    """VKN + fatura no + tutar anahtarı; üçünden biri bulunamadıysa None."""
+    parts = [normalize_field(field, fields.get(field)) for field in KEY_FIELDS]
+    return "|".join(parts) if all(parts) else None
+
+def verification_boxes(pages: Optional[List[Dict[str, Any]]], fields: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """
+    İlk sayfada fatura no ve tutarın okunduğu kelimelerin ön işleme öncesi sayfadaki oransal kutuları
+    ve değerleri. Fatura no kutusu bulunamazsa None döner (algısal eşleşme doğrulanamaz).
+    """
+    page = find_page(pages, 1)
+    if page is None:
+        return None
+    to_source = invert(page_transform(page))
+    words = [Word(*row) for row in page["words"]]
+    boxes = {}
+    for field in VERIFY_FIELDS:
+        value = normalize_field(field, fields.get(field))
+        if value is None:
+            continue
+        for w in words:
+            if normalize_field(field, w.text) == value:
+                box = map_box(to_source, (w.left, w.top, w.left + w.width, w.top + w.height))
+                boxes[field] = {"box": [min(1.0, max(0.0, v)) for v in box], "value": value}
+                break
+    return boxes if "invoice_no" in boxes else None
+
+def confirm_duplicate(image: Image.Image, verification: Dict[str, Any], lang: str, timeout: float = 0) -> bool:
+    """Saklanan kutuları yeni sayfadan okur; tüm değerler aynıysa True."""
+    template = {"fields": {}}
+    for field, item in verification.items():
+        left, top, right, bottom = item["box"]
+        template["fields"][field] = [left - VERIFY_MARGIN, top - VERIFY_MARGIN,
+                                     right + VERIFY_MARGIN, bottom + VERIFY_MARGIN]
+    extracted = extract_template_fields(image, template, lang, timeout=timeout)
+    if extracted is None:
+        return False
+    _, texts = extracted
+    return all(normalize_field(field, texts.get(field)) == item["value"] for field, item in verification.items())
+
+def fingerprint(data: bytes, mime: str, timeout: Optional[float] = None,
+                digest: Optional[str] = None) -> DuplicateCheck:
+    """Dosyayı dizinde aramadan, dizine eklenecek içerik ve algısal özetini hesaplar."""
+    digest = digest or content_hash(data)
+    try:
+        phash: Optional[int] = page_hash(load_image(data, mime, timeout=timeout, dpi=FINGERPRINT_DPI))
+    except Exception:
+        phash = None
+    return DuplicateCheck(digest, phash, None, None)
+
+def find_duplicate(index: DedupIndex, data: bytes, mime: str, lang: str,
+                   timeout: Optional[float] = None, digest: Optional[str] = None) -> DuplicateCheck:
+    """
+    Dosyayı OCR'dan önce dizinde arar. Algısal özet hesaplanamazsa (ör. bozuk dosya) yalnızca içerik aranır.
+    digest önbellek anahtarı için hesaplanmış içerik özetidir; verilmezse burada hesaplanır.
+    """
+    digest = digest or content_hash(data)
+    entry = index.find_exact(digest)
+    if entry is not None:
+        return DuplicateCheck(digest, entry.phash, "icerik", entry)
+    try:
+        image = load_image(data, mime, timeout=timeout, dpi=FINGERPRINT_DPI)
+        phash = page_hash(image)
+    except Exception:
+        return DuplicateCheck(digest, None, None, None)
+    candidates = index.find_similar(phash)[:MAX_VERIFY_CANDIDATES]
+    page: Optional[Image.Image] = None
+    for _, candidate in candidates:
+        verification = index.verification(candidate.digest)
+        if not verification:
+            continue
+        if page is None:
+            # PDF'ler doğrulama için OCR çözünürlüğünde yeniden oluşturulur
+            page = load_image(data, mime, timeout=timeout) if mime == "application/pdf" else image
+        if confirm_duplicate(page, verification, lang, timeout=timeout or 0):
+            return DuplicateCheck(digest, phash, "algisal", candidate)
+    return DuplicateCheck(digest, phash, None, None)
@@ -0,0 +1,264 @@
+"""
+Değiştirilebilir OCR motorları. Motor ortam değişkenleriyle seçilir:
+
+    FATURA_OCR_ENGINE  auto (varsayılan), tesserocr veya pytesseract
+    TESSERACT_CMD      pytesseract için tesseract çalıştırılabilir dosyası
+    TESSDATA_PREFIX    tesserocr için dil modellerinin bulunduğu dizin
+
+"auto", tesserocr kuruluysa süreç içinde kalıcı Tesseract API'sini, değilse her çağrıda
+tesseract süreci başlatan pytesseract'ı kullanır. Her süreç (ör. her toplu işlem işçisi)
+kendi motor örneğini bir kez oluşturur.
+"""
+import os
+import threading
+from abc import ABC, abstractmethod
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+import numpy as np
+from PIL import Image
+from ocr.word_index import Word, words_from_data
+
+ENGINE_NAMES = ("auto", "tesserocr", "pytesseract")
+DEFAULT_ENGINE = os.environ.get("FATURA_OCR_ENGINE", "auto")
+WINDOWS_TESSERACT_CMD = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
+# Gecikme yüzdelikleri için saklanan son çağrı sayısı
+LATENCY_WINDOW = 1000
+
+class OCREngine(ABC):
+    """
+    OCR motoru arayüzü. Alt sınıflar _recognize(), _recognize_words() ve _version_string()
+    soyut yöntemlerini uygular; image_to_string() ve image_to_words() her çağrının süresini ölçer.
+    """
+
+    name = "temel"
+
+    def __init__(self):
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._calls = 0
+        self._errors = 0
+        self._stats_lock = threading.Lock()
+        self._version: Optional[str] = None
+
+    def image_to_string(self, image: Image.Image, lang: str, timeout: float = 0, psm: Optional[int] = None) -> str:
+        """
+        Görüntüdeki metni döndürür; hata durumunda istisna fırlatır. timeout saniyedir, 0 sınırsız.
+        psm Tesseract sayfa bölütleme kipidir (ör. 6: tek metin bloğu); None ise motorun varsayılanı.
+        """
+        return self._timed(self._recognize, image, lang, timeout, psm)
+
+    def image_to_words(self, image: Image.Image, lang: str, timeout: float = 0, psm: Optional[int] = None) -> List[Word]:
+        """Görüntüdeki kelimeleri kutu ve güven değerleriyle döndürür (tek OCR geçişi)."""
+        return self._timed(self._recognize_words, image, lang, timeout, psm)
+
+    def _timed(self, func: Callable[..., Any], *args: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return func(*args)
+        except Exception:
+            with self._stats_lock:
+                self._errors += 1
+            raise
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            with self._stats_lock:
+                self._calls += 1
+                self._latencies.append(elapsed)
+
+    @abstractmethod
+    def _recognize(self, image: Image.Image, lang: str, timeout: float, psm: Optional[int]) -> str:
+        """Görüntünün düz metni."""
+
+    @abstractmethod
+    def _recognize_words(self, image: Image.Image, lang: str, timeout: float, psm: Optional[int]) -> List[Word]:
+        """Görüntünün kelimeleri (Word listesi)."""
+
+    def version(self) -> str:
+        """Önbellek anahtarında kullanılan motor sürümü (ör. "tesseract-5.3.0")."""
+        if self._version is None:
+            try:
+                self._version = self._version_string()
+            except Exception:
+                self._version = "tesseract-bilinmiyor"
+        return self._version
+
+    @abstractmethod
+    def _version_string(self) -> str:
+        """Motor ve Tesseract sürümü; hata fırlatırsa version() "tesseract-bilinmiyor" döndürür."""
+
+    def latency_stats(self) -> Dict[str, float]:
+        """Çağrı sayısı, hata sayısı ve son çağrıların ortalama/p50/p95/en yüksek süreleri (ms)."""
+        with self._stats_lock:
+            latencies = np.array(self._latencies, dtype=np.float64)
+            calls, errors = self._calls, self._errors
+        if not len(latencies):
+            return {"calls": calls, "errors": errors, "mean_ms": 0.0, "p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+        return {
+            "calls": calls,
+            "errors": errors,
+            "mean_ms": float(latencies.mean()),
+            "p50_ms": float(np.percentile(latencies, 50)),
+            "p95_ms": float(np.percentile(latencies, 95)),
+            "max_ms": float(latencies.max()),
+        }
+
+    def close(self) -> None:
+        pass
+
+class PytesseractEngine(OCREngine):
+    """Her çağrıda tesseract sürecini başlatan yedek motor."""
+
+    name = "pytesseract"
+
+    def __init__(self, tesseract_cmd: Optional[str] = None):
+        super().__init__()
+        import pytesseract
+        self._pytesseract = pytesseract
+        if tesseract_cmd:
+            pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+        self.tesseract_cmd = pytesseract.pytesseract.tesseract_cmd
+
+    def _recognize(self, image: Image.Image, lang: str, timeout: float, psm: Optional[int]) -> str:
+        return self._pytesseract.image_to_string(image, lang=lang, timeout=timeout, config=_psm_config(psm))
+
+    def _recognize_words(self, image: Image.Image, lang: str, timeout: float, psm: Optional[int]) -> List[Word]:
+        data = self._pytesseract.image_to_data(image, lang=lang, timeout=timeout, config=_psm_config(psm),
+                                               output_type=self._pytesseract.Output.DICT)
+        return words_from_data(data)
+
+    def _version_string(self) -> str:
+        return f"tesseract-{self._pytesseract.get_tesseract_version()}"
+
+class TesserocrEngine(OCREngine):
+    """
+    Tesseract C API'sini süreç içinde kullanan kalıcı motor (tesserocr gerekir). Her dil için
+    bir API örneği açık tutulur; dil modeli yalnızca ilk çağrıda yüklenir.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, tessdata_path: Optional[str] = None):
+        super().__init__()
+        try:
+            import tesserocr
+        except ModuleNotFoundError:
+            raise RuntimeError("Kalıcı OCR motoru için 'pip install tesserocr' gereklidir.")
+        self._tesserocr = tesserocr
+        self.tessdata_path = tessdata_path or os.environ.get("TESSDATA_PREFIX")
+        self._apis: Dict[str, Tuple[object, threading.Lock]] = {}
+        self._apis_lock = threading.Lock()
+
+    def _api(self, lang: str) -> Tuple[object, threading.Lock]:
+        with self._apis_lock:
+            if lang not in self._apis:
+                kwargs = {"lang": lang}
+                if self.tessdata_path:
+                    kwargs["path"] = self.tessdata_path
+                self._apis[lang] = (self._tesserocr.PyTessBaseAPI(**kwargs), threading.Lock())
+            return self._apis[lang]
+
+    def _recognize(self, image: Image.Image, lang: str, timeout: float, psm: Optional[int]) -> str:
+        api, lock = self._api(lang)
+        # Bir API örneği aynı anda tek görüntü işleyebilir
+        with lock:
+            self._run(api, image, timeout, psm)
+            return api.GetUTF8Text()
+
+    def _recognize_words(self, image: Image.Image, lang: str, timeout: float, psm: Optional[int]) -> List[Word]:
+        RIL = self._tesserocr.RIL
+        api, lock = self._api(lang)
+        words = []
+        block = par = line = 0
+        with lock:
+            self._run(api, image, timeout, psm)
+            for it in self._tesserocr.iterate_level(api.GetIterator(), RIL.WORD):
+                # Blok/paragraf/satır numaraları image_to_data ile aynı biçimde 1'den sayılır
+                if it.IsAtBeginningOf(RIL.BLOCK):
+                    block, par, line = block + 1, 0, 0
+                if it.IsAtBeginningOf(RIL.PARA):
+                    par, line = par + 1, 0
+                if it.IsAtBeginningOf(RIL.TEXTLINE):
+                    line += 1
+                text = (it.GetUTF8Text(RIL.WORD) or "").strip()
+                box = it.BoundingBox(RIL.WORD)
+                if not text or not box:
+                    continue
+                x1, y1, x2, y2 = box
+                words.append(Word(text, x1, y1, x2 - x1, y2 - y1, float(it.Confidence(RIL.WORD)), block, par, line))
+        return words
+
+    def _run(self, api: Any, image: Image.Image, timeout: float, psm: Optional[int]) -> None:
+        api.SetPageSegMode(self._tesserocr.PSM.AUTO if psm is None else psm)
+        api.SetImage(image)
+        if not api.Recognize(int(timeout * 1000)):
+            raise RuntimeError("Tesseract tanıma başarısız oldu veya zaman aşımına uğradı")
+
+    def _version_string(self) -> str:
+        raw = self._tesserocr.tesseract_version().split()
+        return f"tesserocr-{raw[1] if len(raw) > 1 else raw[0]}"
+
+    def close(self) -> None:
+        with self._apis_lock:
+            for api, _ in self._apis.values():
+                api.End()
+            self._apis.clear()
+
+def _psm_config(psm: Optional[int]) -> str:
+    return "" if psm is None else f"--psm {int(psm)}"
+
+def _default_tesseract_cmd() -> Optional[str]:
+    cmd = os.environ.get("TESSERACT_CMD")
+    if cmd:
+        return cmd
+    if os.name == "nt" and os.path.exists(WINDOWS_TESSERACT_CMD):
+        return WINDOWS_TESSERACT_CMD
+    return None
+
+def create_engine(name: str = DEFAULT_ENGINE, tesseract_cmd: Optional[str] = None) -> OCREngine:
+    """Adı verilen motoru oluşturur. "auto" tesserocr kurulu değilse pytesseract'a düşer."""
+    if name not in ENGINE_NAMES:
+        raise ValueError(f"Bilinmeyen OCR motoru: {name}")
+    if name in ("auto", "tesserocr"):
+        try:
+            return TesserocrEngine()
+        except RuntimeError:
+            if name == "tesserocr":
+                raise
+    return PytesseractEngine(tesseract_cmd or _default_tesseract_cmd())
+
+_engine: Optional[OCREngine] = None
+_engine_settings: Tuple[str, Optional[str]] = (DEFAULT_ENGINE, None)
+_engine_lock = threading.Lock()
+
+def configure_engine(name: Optional[str] = None, tesseract_cmd: Optional[str] = None) -> None:
+    """Süreç genelindeki motor ayarlarını değiştirir; motor bir sonraki kullanımda yeniden oluşturulur."""
+    global _engine, _engine_settings
+    with _engine_lock:
+        if _engine is not None:
+            _engine.close()
+        _engine = None
+        _engine_settings = (name or DEFAULT_ENGINE, tesseract_cmd)
+
+def set_engine(engine: Optional[OCREngine]) -> Optional[OCREngine]:
+    """
+    Süreç genelindeki motoru doğrudan değiştirir (ör. testlerde sahte motor) ve önceki motoru
+    kapatmadan döndürür; geri yüklemek için set_engine(onceki) çağrılır. None verilirse motor bir
+    sonraki kullanımda ayarlardan yeniden oluşturulur. İşçi süreçleri engine_settings() ile kendi
+    motorlarını kurduğundan bu değişiklik yalnızca bu süreci etkiler.
+    """
+    global _engine
+    with _engine_lock:
+        previous, _engine = _engine, engine
+        return previous
+
+def engine_settings() -> Tuple[str, Optional[str]]:
+    """İşçi süreçlerine aktarılan (motor adı, tesseract yolu) ayarları."""
+    return _engine_settings
+
+def get_engine() -> OCREngine:
+    """Süreç genelinde paylaşılan OCR motorunu döndürür."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = create_engine(*_engine_settings)
+        return _engine
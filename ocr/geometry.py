@@ -0,0 +1,64 @@
+"""
+Ön işlemenin sayfa geometrisine etkisi. Dönüşüm, kaynak görüntünün (ön işleme öncesi sayfa)
+oransal 0-1 koordinatlarını işlenmiş görüntünün piksel koordinatlarına çeviren afin matristir:
+
+    (a, b, c, d, e, f)  ->  x = a*u + b*v + c,  y = d*u + e*v + f
+
+İşlenmiş görüntünün info["transform"] alanında taşınır ve sayfa kayıtlarında saklanır; önizlemede
+seçilen kutular, şablon bölgeleri ve OCR'lanan sayfanın kelime kutuları bu dönüşümle eşlenir.
+"""
+import math
+from typing import Tuple
+from PIL import Image
+
+Affine = Tuple[float, float, float, float, float, float]
+TRANSFORM_KEY = "transform"
+
+def scale_transform(width: float, height: float) -> Affine:
+    """Ön işlemesiz sayfa: oransal koordinatlar yalnızca boyutla çarpılır."""
+    return (float(width), 0.0, 0.0, 0.0, float(height), 0.0)
+
+def compose(outer: Affine, inner: Affine) -> Affine:
+    """Önce inner sonra outer dönüşümünü uygulayan dönüşüm."""
+    a1, b1, c1, d1, e1, f1 = outer
+    a2, b2, c2, d2, e2, f2 = inner
+    return (a1 * a2 + b1 * d2, a1 * b2 + b1 * e2, a1 * c2 + b1 * f2 + c1,
+            d1 * a2 + e1 * d2, d1 * b2 + e1 * e2, d1 * c2 + e1 * f2 + f1)
+
+def invert(transform: Affine) -> Affine:
+    a, b, c, d, e, f = transform
+    det = a * e - b * d
+    ia, ib, id_, ie = e / det, -b / det, -d / det, a / det
+    return (ia, ib, -(ia * c + ib * f), id_, ie, -(id_ * c + ie * f))
+
+def map_box(transform: Affine, box: Tuple[float, float, float, float]) -> Tuple[float, float, float, float]:
+    """(sol, üst, sağ, alt) kutusunu dönüştürür; döndürmede köşeleri kapsayan kutu döner."""
+    a, b, c, d, e, f = transform
+    left, top, right, bottom = box
+    xs, ys = [], []
+    for u, v in ((left, top), (right, top), (right, bottom), (left, bottom)):
+        xs.append(a * u + b * v + c)
+        ys.append(d * u + e * v + f)
+    return min(xs), min(ys), max(xs), max(ys)
+
+def rotation_transform(width: int, height: int, angle: float) -> Affine:
+    """
+    Image.rotate(angle, expand=True) için piksel dönüşümü. Pillow'un hedef->kaynak matrisi aynı
+    biçimde hesaplanıp tersine çevrilir.
+    """
+    radians = -math.radians(angle % 360.0)
+    cos, sin = round(math.cos(radians), 15), round(math.sin(radians), 15)
+    cx, cy = width / 2, height / 2
+    c = cos * -cx + sin * -cy + cx
+    f = -sin * -cx + cos * -cy + cy
+    corners = [(cos * x + sin * y + c, -sin * x + cos * y + f) for x, y in ((0, 0), (width, 0), (width, height), (0, height))]
+    new_width = math.ceil(max(x for x, _ in corners)) - math.floor(min(x for x, _ in corners))
+    new_height = math.ceil(max(y for _, y in corners)) - math.floor(min(y for _, y in corners))
+    tx, ty = -(new_width - width) / 2.0, -(new_height - height) / 2.0
+    reverse = (cos, sin, cos * tx + sin * ty + c, -sin, cos, -sin * tx + cos * ty + f)
+    return invert(reverse)
+
+def image_transform(image: Image.Image) -> Affine:
+    """Görüntünün ön işleme dönüşümü; ön işlemeden geçmemişse boyuta göre ölçekleme."""
+    transform = image.info.get(TRANSFORM_KEY)
+    return tuple(transform) if transform else scale_transform(image.width, image.height)
@@ -1,53 +1,85 @@
-from PIL import Image, ImageEnhance, ImageOps
-import numpy as np
-from streamlit_drawable_canvas import st_canvas
-import streamlit as st
-from typing import Optional
-
-def enhance_image(image: Image.Image) -> Image.Image:
-    """Görüntüyü kontrast, siyah-beyaz ve otomatik kontrast ile iyileştirir."""
-    if not isinstance(image, Image.Image):
-        if isinstance(image, np.ndarray):
-            image = Image.fromarray(image)
-        else:
-            raise ValueError("Desteklenmeyen görüntü formatı")
-    image = ImageEnhance.Contrast(image).enhance(2.0)
-    image = ImageOps.grayscale(image)
-    image = ImageOps.autocontrast(image)
-    return image
-
-def show_canvas_and_crop(image: Image.Image, key: str = "canvas") -> Optional[Image.Image]:
-    """
-    Streamlit canvas ile kullanıcıya kutu çizdirir ve seçilen alanı kırpar.
-    Seçili alan yoksa None döner.
-    """
-    if not isinstance(image, Image.Image):
-        if isinstance(image, np.ndarray):
-            image = Image.fromarray(image)
-        else:
-            raise ValueError("Desteklenmeyen görüntü formatı")
-    if image.mode != "RGBA":
-        image_rgba = image.convert("RGBA")
-    else:
-        image_rgba = image
-    np_image = np.array(image_rgba)
-    canvas_result = st_canvas(
-        fill_color="rgba(255, 0, 0, 0.3)",
-        stroke_width=2,
-        background_image=np_image,  # type: ignore
-        update_streamlit=True,
-        height=image.height if image is not None and hasattr(image, 'height') else 400,
-        width=image.width if image is not None and hasattr(image, 'width') else 600,
-        drawing_mode="rect",
-        key=key,
-    )
-    cropped = None
-    if canvas_result.json_data and len(canvas_result.json_data["objects"]) > 0:
-        obj = canvas_result.json_data["objects"][-1]
-        left = int(obj["left"])
-        top = int(obj["top"])
-        width = int(obj["width"])
-        height = int(obj["height"])
-        cropped = image.crop((left, top, left + width, top + height))
-        st.image(cropped, use_container_width=True)
+from PIL import Image
+import io
+import numpy as np
+from typing import Optional, Union
+from ocr.preprocess import preprocess
+
+def enhance_image(image: Image.Image, preset: Union[bool, str] = True, scale: float = 1.0) -> Image.Image:
+    """
+    Görüntüyü OCR için ön işlemden geçirir (bkz. ocr.preprocess). preset True ise varsayılan
+    hazır ayar, "klasik" ise eski kontrast + siyah-beyaz + otomatik kontrast davranışı kullanılır.
+    scale kademeli OCR'da kademenin ölçeğidir.
+    """
+    if not isinstance(image, Image.Image):
+        if isinstance(image, np.ndarray):
+            image = Image.fromarray(image)
+        else:
+            raise ValueError("Desteklenmeyen görüntü formatı")
+    return preprocess(image, preset, scale)[0]
+
+def dhash(image: Image.Image, width: int = 8, height: int = 8, min_diff: int = 0) -> int:
+    """
+    Algısal fark özeti (dHash): görüntü (width+1) x height boyutuna küçültülür ve yan yana
+    piksellerin parlaklık farkının işaretinden width*height bitlik bir tamsayı üretilir.
+    min_diff > 0 ise farkı bundan küçük komşular 0 sayılır; boş (beyaz) alanlarda gürültü bit çevirmez.
+    """
+    small = np.asarray(image.convert("L").resize((width + 1, height), Image.BOX), dtype=np.int16)
+    bits = (small[:, 1:] - small[:, :-1] > min_diff).ravel()
+    return int("".join("1" if b else "0" for b in bits), 2)
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+def load_image(data: bytes, mime: str, timeout: Optional[float] = None, dpi: int = 200) -> Image.Image:
+    """Dosya içeriğini PIL görüntüsüne dönüştürür. PDF dosyalarında yalnızca ilk sayfa oluşturulur."""
+    if mime == "application/pdf":
+        from pdf2image import convert_from_bytes
+        images = convert_from_bytes(data, dpi=dpi, first_page=1, last_page=1, timeout=timeout)
+        image = images[0]
+        image.info["dpi"] = (dpi, dpi)
+    else:
+        image = Image.open(io.BytesIO(data))
+    if not isinstance(image, Image.Image):
+        if isinstance(image, np.ndarray):
+            image = Image.fromarray(image)
+        else:
+            raise ValueError("Desteklenmeyen görüntü formatı")
+    return image
+
+def show_canvas_and_crop(image: Image.Image, key: str = "canvas") -> Optional[Image.Image]:
+    """
+    Streamlit canvas ile kullanıcıya kutu çizdirir ve seçilen alanı kırpar.
+    Seçili alan yoksa None döner.
+    """
+    import streamlit as st
+    from streamlit_drawable_canvas import st_canvas
+    if not isinstance(image, Image.Image):
+        if isinstance(image, np.ndarray):
+            image = Image.fromarray(image)
+        else:
+            raise ValueError("Desteklenmeyen görüntü formatı")
+    if image.mode != "RGBA":
+        image_rgba = image.convert("RGBA")
+    else:
+        image_rgba = image
+    np_image = np.array(image_rgba)
+    canvas_result = st_canvas(
+        fill_color="rgba(255, 0, 0, 0.3)",
+        stroke_width=2,
+        background_image=np_image,  # type: ignore
+        update_streamlit=True,
+        height=image.height if image is not None and hasattr(image, 'height') else 400,
+        width=image.width if image is not None and hasattr(image, 'width') else 600,
+        drawing_mode="rect",
+        key=key,
+    )
+    cropped = None
+    if canvas_result.json_data and len(canvas_result.json_data["objects"]) > 0:
+        obj = canvas_result.json_data["objects"][-1]
+        left = int(obj["left"])
+        top = int(obj["top"])
+        width = int(obj["width"])
+        height = int(obj["height"])
+        cropped = image.crop((left, top, left + width, top + height))
+        st.image(cropped, use_container_width=True)
     return cropped 
\ No newline at end of file
@@ -1,91 +1,283 @@
-import re
-import json
-import os
-from typing import Dict, Optional, Any
-
-PATTERN_FILE = os.path.join(os.path.dirname(__file__), 'regex_patterns.json')
-
-DEFAULT_PATTERNS = {
-    'date': {"pattern": r"(\d{2}[./-]\d{2}[./-]\d{4})|((\d{4}[./-]\d{2}[./-]\d{2}))", "example": "01.01.2023", "type": "tarih"},
-    'total': {"pattern": r"(Toplam|Genel Toplam|Tutar)[^\d]*(\d{1,3}(?:[.,]\d{3})*[.,]\d{2})|(\d{1,3}(?:[.,]\d{3})*[.,]\d{2})\s*(TL|TRY|₺)", "example": "1.234,56 TL", "type": "tutar"},
-    'invoice_no': {"pattern": r"(Fatura No|Fatura Numarası|No|Numara)[^\w]*(\w{5,})|No[:\s]+(\w{5,})", "example": "FTR20230001", "type": "fatura no"},
-    'seller': {"pattern": r"(Satıcı|Firma|Şirket)[^\n:]*[:\s]+([\w\s\-\.]+)", "example": "Axxion Yazılım", "type": "satıcı"},
-    'tax': {"pattern": r"(Vergi No|VKN|Vergi Numarası)[^\d]*(\d{10})", "example": "1234567890", "type": "vergi"},
-    'purchase': {"pattern": r"(Satın Alım|Alım|Satınalma)[^\n:]*[:\s]+([\w\s\-\.]+)", "example": "Satın Alım: Bilgisayar", "type": "satın alım"},
-    'sale': {"pattern": r"(Satış|Satılan|Satış İşlemi)[^\n:]*[:\s]+([\w\s\-\.]+)", "example": "Satış: Yazıcı", "type": "satış"}
-}
-
-def load_patterns() -> Dict[str, Any]:
-    if not os.path.exists(PATTERN_FILE):
-        save_patterns(DEFAULT_PATTERNS)
-        return DEFAULT_PATTERNS.copy()
-    with open(PATTERN_FILE, 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-def save_patterns(patterns: Dict[str, Any]) -> None:
-    with open(PATTERN_FILE, 'w', encoding='utf-8') as f:
-        json.dump(patterns, f, ensure_ascii=False, indent=2)
-
-def get_pattern(key: str) -> Optional[str]:
-    patterns = load_patterns()
-    val = patterns.get(key)
-    if isinstance(val, dict):
-        return val.get('pattern', '')
-    return val
-
-def get_pattern_full(key: str) -> Optional[dict]:
-    patterns = load_patterns()
-    val = patterns.get(key)
-    if isinstance(val, dict):
-        return val
-    return {"pattern": val, "example": "", "type": ""} if val else None
-
-def set_pattern(key: str, pattern: dict) -> None:
-    patterns = load_patterns()
-    patterns[key] = pattern
-    save_patterns(patterns)
-
-def remove_pattern(key: str) -> None:
-    patterns = load_patterns()
-    if key in patterns:
-        del patterns[key]
-        save_patterns(patterns)
-
-def list_patterns() -> Dict[str, Any]:
-    return load_patterns()
-
-def parse_invoice_data(
-    text: str,
-    date_pattern: Optional[str] = None,
-    total_pattern: Optional[str] = None,
-    invoice_no_pattern: Optional[str] = None,
-    seller_pattern: Optional[str] = None,
-    tax_pattern: Optional[str] = None
-) -> Dict[str, str]:
-    patterns = load_patterns()
-    def extract_pattern(val):
-        if isinstance(val, dict):
-            return val.get('pattern', '')
-        return val or ''
-    def search_pattern(pattern, text, flags=0, group=1):
-        try:
-            match = re.search(pattern, text, flags)
-            if match:
-                for g in range(1, len(match.groups())+1):
-                    if match.group(g):
-                        return match.group(g)
-            return None
-        except Exception:
-            return None
-    date = search_pattern(extract_pattern(date_pattern or patterns.get('date')), text, group=1)
-    total = search_pattern(extract_pattern(total_pattern or patterns.get('total')), text, re.IGNORECASE, group=2)
-    invoice_no = search_pattern(extract_pattern(invoice_no_pattern or patterns.get('invoice_no')), text, re.IGNORECASE, group=2)
-    seller = search_pattern(extract_pattern(seller_pattern or patterns.get('seller')), text, re.IGNORECASE, group=2)
-    tax_no = search_pattern(extract_pattern(tax_pattern or patterns.get('tax')), text, re.IGNORECASE, group=2)
-    return {
-        "fatura_tarihi": date if date else "bulunamadı",
-        "toplam_tutar": total if total else "bulunamadı",
-        "fatura_no": invoice_no if invoice_no else "bulunamadı",
-        "satıcı_adı": seller if seller else "bulunamadı",
-        "vergi_no": tax_no if tax_no else "bulunamadı",
-    } 
\ No newline at end of file
+import re
+import copy
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Optional, Any, Pattern, Match, Tuple
+
+PATTERN_FILE = os.path.join(os.path.dirname(__file__), 'regex_patterns.json')
+
+DEFAULT_PATTERNS = {
+    'date': {"pattern": r"(\d{2}[./-]\d{2}[./-]\d{4})|((\d{4}[./-]\d{2}[./-]\d{2}))", "example": "01.01.2023", "type": "tarih"},
+    'total': {"pattern": r"(Toplam|Genel Toplam|Tutar)[^\d]*(\d{1,3}(?:[.,]\d{3})*[.,]\d{2})|(\d{1,3}(?:[.,]\d{3})*[.,]\d{2})\s*(TL|TRY|₺)", "example": "1.234,56 TL", "type": "tutar"},
+    'invoice_no': {"pattern": r"(Fatura No|Fatura Numarası|No|Numara)[^\w]*(\w{5,})|No[:\s]+(\w{5,})", "example": "FTR20230001", "type": "fatura no"},
+    'seller': {"pattern": r"(Satıcı|Firma|Şirket)[^\n:]*[:\s]+([\w\s\-\.]+)", "example": "Axxion Yazılım", "type": "satıcı"},
+    'tax': {"pattern": r"(Vergi No|VKN|Vergi Numarası)[^\d]*(\d{10})", "example": "1234567890", "type": "vergi"},
+    'purchase': {"pattern": r"(Satın Alım|Alım|Satınalma)[^\n:]*[:\s]+([\w\s\-\.]+)", "example": "Satın Alım: Bilgisayar", "type": "satın alım"},
+    'sale': {"pattern": r"(Satış|Satılan|Satış İşlemi)[^\n:]*[:\s]+([\w\s\-\.]+)", "example": "Satış: Yazıcı", "type": "satış"}
+}
+
+class PatternRegistry:
+    """
+    regex_patterns.json dosyasını bir kez okuyup desenleri derlenmiş hâlde bellekte tutar.
+    Dosyanın değişip değişmediği en fazla check_interval saniyede bir (stat ile) kontrol edilir;
+    set/remove işlemleri önbelleği doğrudan günceller ve dosyaya atomik olarak yazar.
+    """
+
+    def __init__(self, path: str = PATTERN_FILE, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._patterns: Dict[str, Any] = {}
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._checked_at = 0.0
+        self._compiled: Dict[Tuple[str, int], Optional[Pattern]] = {}
+        self._scanners: Dict[Tuple[Tuple[str, int], ...], Optional[Pattern]] = {}
+        self._lock = threading.RLock()
+
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if self._stamp is not None and now - self._checked_at < self.check_interval:
+            return
+        self._checked_at = now
+        stamp = self._file_stamp()
+        if stamp is not None and stamp == self._stamp:
+            return
+        if stamp is None:
+            self._write(DEFAULT_PATTERNS.copy())
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self._set_state(json.load(f), stamp)
+
+    def _set_state(self, patterns: Dict[str, Any], stamp: Optional[Tuple[int, int]]) -> None:
+        self._patterns = patterns
+        self._stamp = stamp
+        self._compiled.clear()
+        self._scanners.clear()
+
+    def _write(self, patterns: Dict[str, Any]) -> None:
+        directory = os.path.dirname(self.path) or '.'
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(patterns, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._set_state(patterns, self._file_stamp())
+        self._checked_at = time.monotonic()
+
+    def patterns(self) -> Dict[str, Any]:
+        """Desenlerin bir kopyasını döndürür."""
+        with self._lock:
+            self._refresh()
+            return copy.deepcopy(self._patterns)
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            self._refresh()
+            return copy.deepcopy(self._patterns.get(key))
+
+    def set(self, key: str, pattern: Any) -> None:
+        with self._lock:
+            self._refresh()
+            patterns = dict(self._patterns)
+            patterns[key] = pattern
+            self._write(patterns)
+
+    def remove(self, key: str) -> None:
+        with self._lock:
+            self._refresh()
+            if key in self._patterns:
+                patterns = dict(self._patterns)
+                del patterns[key]
+                self._write(patterns)
+
+    def replace_all(self, patterns: Dict[str, Any]) -> None:
+        with self._lock:
+            self._write(dict(patterns))
+
+    def compiled(self, key: str, flags: int = 0) -> Optional[Pattern]:
+        """Alanın derlenmiş desenini döndürür; desen yoksa veya geçersizse None."""
+        with self._lock:
+            self._refresh()
+            return self._compile(key, flags)
+
+    def _compile(self, key: str, flags: int) -> Optional[Pattern]:
+        cache_key = (key, flags)
+        if cache_key not in self._compiled:
+            source = _pattern_source(self._patterns.get(key))
+            try:
+                self._compiled[cache_key] = re.compile(source, flags) if source else None
+            except re.error:
+                self._compiled[cache_key] = None
+        return self._compiled[cache_key]
+
+    def _scanner(self, fields: Tuple[Tuple[str, int], ...]) -> Optional[Pattern]:
+        # Alanların desenleri adlandırılmış gruplarla tek bir alternasyonda birleştirilir
+        if fields not in self._scanners:
+            parts = []
+            for i, (key, flags) in enumerate(fields):
+                source = _pattern_source(self._patterns.get(key))
+                inline = 'i' if flags & re.IGNORECASE else ''
+                inline += 'm' if flags & re.MULTILINE else ''
+                inline += 's' if flags & re.DOTALL else ''
+                body = f'(?{inline}:{source})' if inline else f'(?:{source})'
+                parts.append(f'(?P<_f{i}>{body})')
+            try:
+                self._scanners[fields] = re.compile('|'.join(parts)) if parts else None
+            except re.error:
+                self._scanners[fields] = None
+        return self._scanners[fields]
+
+    def match_all(self, text: str, fields: Optional[Dict[str, int]] = None) -> Dict[str, Optional[Match]]:
+        """
+        Verilen alanların (alan -> re bayrakları; None ise tüm alanlar) metindeki ilk eşleşmelerini
+        döndürür. Sonuç, her alan için ayrı re.search ile aynıdır; ancak birleşik desen metni soldan
+        sağa tek seferde tarar ve her alan bulunduğunda taramaya aynı konumdan kalan alanlarla devam eder.
+        """
+        with self._lock:
+            self._refresh()
+            if fields is None:
+                fields = {key: 0 for key in self._patterns}
+            results: Dict[str, Optional[Match]] = {key: None for key in fields}
+            remaining = []
+            for key, flags in fields.items():
+                pattern = self._compile(key, flags)
+                if pattern is None:
+                    continue
+                if _combinable(pattern):
+                    remaining.append((key, flags))
+                else:
+                    results[key] = pattern.search(text)
+            pos = 0
+            while remaining:
+                scanner = self._scanner(tuple(remaining))
+                if scanner is None:
+                    for key, flags in remaining:
+                        results[key] = self._compile(key, flags).search(text)  # type: ignore[union-attr]
+                    break
+                m = scanner.search(text, pos)
+                if m is None:
+                    break
+                key, flags = remaining.pop(int(m.lastgroup[2:]))  # type: ignore[index]
+                results[key] = self._compile(key, flags).match(text, m.start())  # type: ignore[union-attr]
+                pos = m.start()
+            return results
+
+def _pattern_source(val: Any) -> str:
+    if isinstance(val, dict):
+        return val.get('pattern', '') or ''
+    return val or ''
+
+def _combinable(pattern: Pattern) -> bool:
+    # Geri başvurular, koşullu gruplar, adlandırılmış gruplar ve genel satır içi bayraklar birleşik
+    # desende bozulur (grup numaraları kayar)
+    source = pattern.pattern
+    if pattern.groupindex or re.search(r'\\[1-9]|\(\?P=|\(\?\(|\(\?[aiLmsux]+\)', source):
+        return False
+    return True
+
+def match_value(match: Optional[Match], group: int = 0) -> Optional[str]:
+    """
+    Eşleşmeden değeri alır. group=0 tüm eşleşmeyi döndürür; aksi hâlde tercih edilen grup,
+    boşsa ilk dolu grup kullanılır. Değer ilk satırıyla sınırlandırılır.
+    """
+    if match is None:
+        return None
+    value = match.group(0)
+    if group:
+        value = None
+        if group <= len(match.groups()):
+            value = match.group(group)
+        if not value:
+            value = next((g for g in match.groups() if g), None)
+    if value is None:
+        return None
+    return value.strip().split('\n')[0].strip() or None
+
+_registry = PatternRegistry()
+
+def get_registry() -> PatternRegistry:
+    return _registry
+
+def load_patterns() -> Dict[str, Any]:
+    return _registry.patterns()
+
+def save_patterns(patterns: Dict[str, Any]) -> None:
+    _registry.replace_all(patterns)
+
+def get_pattern(key: str) -> Optional[str]:
+    val = _registry.get(key)
+    if isinstance(val, dict):
+        return val.get('pattern', '')
+    return val
+
+def get_pattern_full(key: str) -> Optional[dict]:
+    val = _registry.get(key)
+    if isinstance(val, dict):
+        return val
+    return {"pattern": val, "example": "", "type": ""} if val else None
+
+def set_pattern(key: str, pattern: dict) -> None:
+    _registry.set(key, pattern)
+
+def remove_pattern(key: str) -> None:
+    _registry.remove(key)
+
+def list_patterns() -> Dict[str, Any]:
+    return load_patterns()
+
+def extract_fields(text: str) -> Dict[str, str]:
+    """Tüm tanımlı alanları tek taramada eşleştirir; bulunamayan alanlar "bulunamadı" olur."""
+    matches = _registry.match_all(text)
+    return {key: (m.group(0) if m else "bulunamadı") for key, m in matches.items()}
+
+# parse_invoice_data alanları: (desen anahtarı, sonuç anahtarı, re bayrakları, tercih edilen grup)
+INVOICE_FIELDS = [
+    ('date', 'fatura_tarihi', 0, 1),
+    ('total', 'toplam_tutar', re.IGNORECASE, 2),
+    ('invoice_no', 'fatura_no', re.IGNORECASE, 2),
+    ('seller', 'satıcı_adı', re.IGNORECASE, 2),
+    ('tax', 'vergi_no', re.IGNORECASE, 2),
+]
+
+def parse_invoice_data(
+    text: str,
+    date_pattern: Optional[str] = None,
+    total_pattern: Optional[str] = None,
+    invoice_no_pattern: Optional[str] = None,
+    seller_pattern: Optional[str] = None,
+    tax_pattern: Optional[str] = None
+) -> Dict[str, str]:
+    overrides = {
+        'date': date_pattern,
+        'total': total_pattern,
+        'invoice_no': invoice_no_pattern,
+        'seller': seller_pattern,
+        'tax': tax_pattern,
+    }
+    registry_fields = {key: flags for key, _, flags, _ in INVOICE_FIELDS if not overrides[key]}
+    matches = _registry.match_all(text, registry_fields)
+    result = {}
+    for key, out_key, flags, group in INVOICE_FIELDS:
+        if overrides[key]:
+            try:
+                match = re.search(_pattern_source(overrides[key]), text, flags)
+            except re.error:
+                match = None
+        else:
+            match = matches.get(key)
+        value = match_value(match, group)
+        result[out_key] = value if value else "bulunamadı"
+    return result
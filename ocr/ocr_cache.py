@@ -0,0 +1,155 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+CACHE_DIR = os.environ.get(
+    "FATURA_OCR_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".ocr_cache"),
+)
+MAX_CACHE_BYTES = int(os.environ.get("FATURA_OCR_CACHE_MB", "512")) * 1024 * 1024
+
+def content_hash(data: bytes) -> str:
+    """Dosya içeriğinin SHA-256 özetini döndürür."""
+    return hashlib.sha256(data).hexdigest()
+
+def make_cache_key(digest: str, ocr_lang: str, settings: Any, engine_version: str) -> str:
+    """İçerik özeti, OCR dili, işleme ayarları (iyileştirme, PDF seçenekleri) ve motor sürümünden önbellek anahtarı üretir."""
+    raw = "|".join([digest, ocr_lang, str(settings), engine_version])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+class OCRCache:
+    """
+    OCR sonuçlarını (ham metin ve kelime kutuları) diskte saklayan, boyutu sınırlı LRU önbellek.
+    Her kayıt ayrı bir JSON dosyasıdır; erişim zamanı dosyanın mtime değeriyle tutulur.
+    """
+
+    def __init__(self, cache_dir: str = CACHE_DIR, max_bytes: int = MAX_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # Toplam boyut ve kayıt sayısı ilk gerektiğinde dizin taranarak bulunur, sonra yazma ve silmelerle güncellenir
+        self._size: Optional[int] = None
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + ".json")
+
+    def _entries(self) -> List[os.DirEntry]:
+        entries: List[os.DirEntry] = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for sub in os.scandir(self.cache_dir):
+            if sub.is_dir():
+                entries.extend(e for e in os.scandir(sub.path) if e.name.endswith(".json"))
+        return entries
+
+    def _current_size(self) -> int:
+        if self._size is None:
+            entries = self._entries()
+            self._size = sum(e.stat().st_size for e in entries)
+            self._count = len(entries)
+        return self._size
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Kaydı döndürür, yoksa None. Bulunan kaydın erişim zamanı güncellenir."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            os.utime(path, None)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return entry
+
+    def put(self, key: str, raw_text: str, words: Optional[List[Dict[str, Any]]] = None,
+            meta: Optional[Dict[str, Any]] = None) -> None:
+        """Kaydı atomik olarak yazar ve gerekirse en eski kayıtları siler."""
+        entry = {"key": key, "raw_text": raw_text, "words": words, "meta": meta or {}, "created": time.time()}
+        path = self._path(key)
+        with self._lock:
+            self._current_size()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            existed = os.path.exists(path)
+            old_size = os.path.getsize(path) if existed else 0
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        with self._lock:
+            self._size = (self._size or 0) + os.path.getsize(path) - old_size
+            if not existed:
+                self._count += 1
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        # En az yakın zamanda kullanılanlar önce silinir; hedef, sınırın %90'ı
+        target = int(self.max_bytes * 0.9)
+        entries = sorted(self._entries(), key=lambda e: e.stat().st_mtime)
+        size = sum(e.stat().st_size for e in entries)
+        count = len(entries)
+        for e in entries:
+            if size <= target:
+                break
+            try:
+                st_size = e.stat().st_size
+                os.remove(e.path)
+                size -= st_size
+                count -= 1
+            except OSError:
+                continue
+        self._size = size
+        self._count = count
+
+    def clear(self) -> None:
+        """Tüm kayıtları siler ve sayaçları sıfırlar."""
+        with self._lock:
+            for e in self._entries():
+                try:
+                    os.remove(e.path)
+                except OSError:
+                    pass
+            self._size = 0
+            self._count = 0
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        İsabet/ıska sayıları, kayıt sayısı ve toplam boyutu döndürür. Kayıt sayısı ve boyut izlenen
+        değerlerdir; dizin yalnızca ilk çağrıda taranır, arayüzün her yeniden çiziminde taranmaz.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            size = self._current_size()
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": self._count,
+                "size_bytes": size,
+            }
+
+_default_cache: Optional[OCRCache] = None
+
+def get_default_cache() -> OCRCache:
+    """Uygulama genelinde paylaşılan önbellek örneğini döndürür."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = OCRCache()
+    return _default_cache
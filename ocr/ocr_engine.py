@@ -1,12 +1,31 @@
-import pytesseract
-from PIL import Image
-
-def extract_text_from_image(image: Image.Image, lang: str) -> str:
-    try:
-        return pytesseract.image_to_string(image, lang=lang)
-    except Exception as e:
-        return f"OCR Hatası: {e}"
-
-def clean_ocr_text(text: str) -> str:
-    lines = [line.strip() for line in text.splitlines() if line.strip()]
-    return "\n".join(lines) 
\ No newline at end of file
+from typing import List, Optional, Tuple
+from PIL import Image
+from ocr.engines import get_engine
+from ocr.word_index import Word, words_to_text
+
+def extract_text_from_image(image: Image.Image, lang: str, timeout: float = 0, psm: Optional[int] = None) -> str:
+    """Görüntüyü yapılandırılmış OCR motoruyla okur (bkz. ocr.engines)."""
+    try:
+        return get_engine().image_to_string(image, lang, timeout=timeout, psm=psm)
+    except Exception as e:
+        return f"OCR Hatası: {e}"
+
+def extract_words_from_image(image: Image.Image, lang: str, timeout: float = 0,
+                             psm: Optional[int] = None) -> Tuple[str, Optional[List[Word]]]:
+    """
+    Görüntüyü tek geçişte kelime kutularıyla okur; (metin, kelimeler) döndürür. Metin kelimelerden
+    satır satır oluşturulur. Hata durumunda ("OCR Hatası: ...", None) döner.
+    """
+    try:
+        words = get_engine().image_to_words(image, lang, timeout=timeout, psm=psm)
+    except Exception as e:
+        return f"OCR Hatası: {e}", None
+    return words_to_text(words), words
+
+def engine_version() -> str:
+    """OCR önbellek anahtarında kullanılan motor sürümünü döndürür."""
+    return get_engine().version()
+
+def clean_ocr_text(text: str) -> str:
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    return "\n".join(lines)
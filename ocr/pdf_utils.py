@@ -0,0 +1,92 @@
+import os
+import subprocess
+import tempfile
+from contextlib import contextmanager
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from PIL import Image
+
+DEFAULT_DPI = int(os.environ.get("FATURA_PDF_DPI", "200"))
+DEFAULT_MAX_PAGES = int(os.environ.get("FATURA_PDF_MAX_PAGES", "5"))
+PDF_THREADS = int(os.environ.get("FATURA_PDF_THREADS", "2"))
+# Bir sayfanın metin katmanı bu kadar boşluk dışı karakter içeriyorsa OCR atlanır
+MIN_TEXT_LAYER_CHARS = 20
+
+class PdfOptions(NamedTuple):
+    """PDF işleme ayarları. last_page None ise son sayfaya kadar işlenir."""
+    dpi: int = DEFAULT_DPI
+    first_page: int = 1
+    last_page: Optional[int] = DEFAULT_MAX_PAGES
+    use_text_layer: bool = True
+
+@contextmanager
+def pdf_file(data: bytes) -> Iterator[str]:
+    """PDF içeriğini bir kez geçici dosyaya yazar; poppler araçları aynı dosyayı kullanır."""
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        yield path
+    finally:
+        os.remove(path)
+
+def pdf_page_count(path: str, timeout: Optional[float] = None) -> int:
+    from pdf2image import pdfinfo_from_path
+    return int(pdfinfo_from_path(path, timeout=timeout)["Pages"])
+
+def page_range(options: PdfOptions, page_count: int) -> Tuple[int, int]:
+    """Ayarlardaki sayfa aralığını belgenin sayfa sayısına göre sınırlar."""
+    first = max(1, options.first_page)
+    last = page_count if not options.last_page else min(options.last_page, page_count)
+    return first, last
+
+def _page_chunks(pages: Iterable[int], size: int) -> Iterator[Tuple[int, int]]:
+    # Ardışık sayfalar en fazla size uzunluğunda (ilk, son) aralıklarına bölünür
+    start = prev = None
+    for page in pages:
+        if start is not None and page == prev + 1 and page - start < size:
+            prev = page
+            continue
+        if start is not None:
+            yield start, prev
+        start = prev = page
+    if start is not None:
+        yield start, prev
+
+def iter_pdf_pages(
+    path: str,
+    pages: Iterable[int],
+    dpi: int = DEFAULT_DPI,
+    thread_count: int = PDF_THREADS,
+    timeout: Optional[float] = None,
+) -> Iterator[Tuple[int, Image.Image]]:
+    """
+    İstenen sayfaları tembel olarak (sayfa no, görüntü) çiftleri hâlinde üretir.
+    Aynı anda bellekte en fazla thread_count sayfa bulunur; her parça pdftoppm'in
+    kendi iş parçacıklarıyla paralel işlenir.
+    """
+    from pdf2image import convert_from_path
+    thread_count = max(1, thread_count)
+    for first, last in _page_chunks(sorted(pages), thread_count):
+        images = convert_from_path(path, dpi=dpi, first_page=first, last_page=last,
+                                   thread_count=min(thread_count, last - first + 1), timeout=timeout)
+        for offset, image in enumerate(images):
+            # Ön işlemedeki yeniden örnekleme kaynak çözünürlüğü buradan okur
+            image.info["dpi"] = (dpi, dpi)
+            yield first + offset, image
+        del images
+
+def extract_text_layer(path: str, first_page: int, last_page: int,
+                       timeout: Optional[float] = None) -> List[str]:
+    """PDF'in gömülü metin katmanını sayfa sayfa döndürür (pdftotext). Hata olursa boş liste döner."""
+    try:
+        output = subprocess.run(
+            ["pdftotext", "-layout", "-enc", "UTF-8", "-f", str(first_page), "-l", str(last_page), path, "-"],
+            capture_output=True, timeout=timeout, check=True,
+        ).stdout.decode("utf-8", errors="replace")
+    except (OSError, subprocess.SubprocessError):
+        return []
+    pages = output.split("\f")
+    return pages[: last_page - first_page + 1]
+
+def has_text_layer(text: str) -> bool:
+    return sum(1 for c in text if not c.isspace()) >= MIN_TEXT_LAYER_CHARS
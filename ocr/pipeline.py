@@ -0,0 +1,244 @@
+import time
+from typing import Any, Dict, List, Optional, Union
+from PIL import Image
+from ocr.image_utils import enhance_image, load_image
+from ocr.ocr_engine import extract_words_from_image, engine_version
+from ocr.ocr_cache import OCRCache, content_hash, get_default_cache, make_cache_key
+from ocr.preprocess import preset_signature
+from ocr.tiers import TIERS, image_scale, missing_fields, needs_escalation, tier_dpi, tier_enhance, tiers_signature
+from ocr.vendor_templates import TemplateRegistry, extract_template_fields, get_template_registry
+from ocr.word_index import page_record
+from ocr.pdf_utils import (PdfOptions, extract_text_layer, has_text_layer, iter_pdf_pages,
+                           page_range, pdf_file, pdf_page_count)
+from utils.profiling import stage
+
+PDF_MIME = "application/pdf"
+# Önbellek kaydının biçimi; kayıtlar kelime kutularını ve sayfa dönüşümünü içerdiğinden eski kayıtlar kullanılmaz
+OUTPUT_FORMAT = "kelimeler-2"
+
+def document_cache_key(data: bytes, mime: str, ocr_lang: str, enhance: Union[bool, str],
+                       pdf_options: Optional[PdfOptions] = None, adaptive: bool = True,
+                       digest: Optional[str] = None) -> str:
+    """Dosya içeriği ve OCR ayarları için önbellek anahtarını döndürür; digest verilirse içerik yeniden özetlenmez."""
+    # Hazır ayarın aşama parametreleri de anahtara girer; ayar değişirse eski sonuçlar kullanılmaz
+    settings: Any = preset_signature(enhance)
+    if mime == PDF_MIME:
+        settings = (settings, tuple(pdf_options or PdfOptions()))
+    if adaptive:
+        settings = (settings, tiers_signature())
+    return make_cache_key(digest or content_hash(data), ocr_lang, settings, f"{engine_version()}/{OUTPUT_FORMAT}")
+
+def _template_result(image: Any, source: Any, ocr_lang: str, templates: Any,
+                     timeout: Optional[float]) -> Optional[Dict[str, Any]]:
+    # Sayfa bir tedarikçi şablonuyla eşleşirse yalnızca şablon bölgeleri OCR'lanır. Üst şerit, şablon
+    # kaydedilirken olduğu gibi ön işleme öncesi sayfadan (source) özetlenir; bölgeler işlenmiş sayfadan
+    # (image) dönüşümüyle kırpılır.
+    with stage("template"):
+        matched = templates.match(source)
+    if matched is None:
+        return None
+    name, template = matched
+    started = time.perf_counter()
+    with stage("ocr"):
+        extracted = extract_template_fields(image, template, ocr_lang, timeout=timeout or 0)
+    ocr_ms = (time.perf_counter() - started) * 1000
+    if extracted is None:
+        return None
+    fields, texts = extracted
+    return {"raw_text": "\n".join(texts.values()), "failed": False, "ocr_ms": ocr_ms, "words": [],
+            "template": name, "fields": fields}
+
+def ocr_pdf(data: bytes, ocr_lang: str, enhance: Union[bool, str], options: Optional[PdfOptions] = None,
+            timeout: Optional[float] = None, templates: Optional[TemplateRegistry] = None,
+            psm: Optional[int] = None, scale: float = 1.0) -> Dict[str, Any]:
+    """
+    PDF'in seçilen sayfa aralığını sayfa sayfa işler ve metinleri tek bir fatura metninde birleştirir.
+    Metin katmanı olan sayfalarda OCR yapılmaz. İlk sayfa bir tedarikçi şablonuyla eşleşirse diğer
+    sayfalar işlenmez. {"raw_text", "failed", "ocr_ms", "words", "template", "fields"} döndürür.
+    scale kademenin ölçeğidir; options.dpi buna göre verilir, scale ön işlemenin sınırlarını ayarlar.
+    """
+    options = options or PdfOptions()
+    texts: Dict[int, str] = {}
+    pages: List[Dict[str, Any]] = []
+    ocr_ms = 0.0
+    with pdf_file(data) as path:
+        with stage("pdf_info"):
+            first, last = page_range(options, pdf_page_count(path, timeout=timeout))
+        if options.use_text_layer:
+            with stage("text_layer"):
+                layer = extract_text_layer(path, first, last, timeout=timeout)
+            for page, text in enumerate(layer, start=first):
+                if has_text_layer(text):
+                    texts[page] = text
+        ocr_pages = [p for p in range(first, last + 1) if p not in texts]
+        rendered = iter_pdf_pages(path, ocr_pages, dpi=options.dpi, timeout=timeout)
+        while True:
+            # Sayfalar tembel oluşturulur; dönüştürme süresi bir sonraki sayfa istenirken ölçülür
+            with stage("pdf_render"):
+                item = next(rendered, None)
+            if item is None:
+                break
+            page, source = item
+            image = source
+            if enhance:
+                with stage("enhance"):
+                    image = enhance_image(source, enhance, scale)
+            if templates is not None and page == first:
+                result = _template_result(image, source, ocr_lang, templates, timeout)
+                if result is not None:
+                    return result
+            started = time.perf_counter()
+            with stage("ocr"):
+                texts[page], words = extract_words_from_image(image, ocr_lang, timeout=timeout or 0, psm=psm)
+            ocr_ms += (time.perf_counter() - started) * 1000
+            if words is not None:
+                pages.append(page_record(page, image, words))
+    failed = any(texts[p].startswith("OCR Hatası") for p in texts)
+    return {"raw_text": "\n".join(texts[p] for p in sorted(texts)), "failed": failed, "ocr_ms": ocr_ms,
+            "words": pages, "template": None, "fields": None}
+
+def _scale_image(image: Image.Image, scale: float) -> Image.Image:
+    scale = image_scale(scale, image.width)
+    if abs(scale - 1.0) < 0.02:
+        return image
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    scaled = image.resize(size, Image.LANCZOS if scale < 1 else Image.BICUBIC)
+    if "dpi" in image.info:
+        # Ön işlemedeki yeniden örnekleme yeni çözünürlüğü görür
+        scaled.info["dpi"] = tuple(float(d) * scale for d in image.info["dpi"])
+    return scaled
+
+def ocr_image(data: bytes, mime: str, ocr_lang: str, enhance: Union[bool, str], timeout: Optional[float] = None,
+              templates: Optional[TemplateRegistry] = None, psm: Optional[int] = None,
+              scale: float = 1.0) -> Dict[str, Any]:
+    """Görüntü dosyasını (scale oranında ölçekleyerek) OCR'lar; ocr_pdf ile aynı biçimde sonuç döndürür."""
+    with stage("decode"):
+        image = load_image(data, mime, timeout=timeout)
+    source = image
+    with stage("resize"):
+        image = _scale_image(image, scale)
+    if enhance:
+        with stage("enhance"):
+            # Ön işlemedeki yeniden örnekleme kademenin ölçeğini geri almaz
+            image = enhance_image(image, enhance, scale)
+    if templates is not None:
+        result = _template_result(image, source, ocr_lang, templates, timeout)
+        if result is not None:
+            return result
+    started = time.perf_counter()
+    with stage("ocr"):
+        raw_text, words = extract_words_from_image(image, ocr_lang, timeout=timeout or 0, psm=psm)
+    ocr_ms = (time.perf_counter() - started) * 1000
+    return {"raw_text": raw_text, "failed": words is None, "ocr_ms": ocr_ms,
+            "words": [] if words is None else [page_record(1, image, words)], "template": None, "fields": None}
+
+def cached_document(cache: OCRCache, key: str, templates: Optional[TemplateRegistry] = None) -> Optional[Dict[str, Any]]:
+    """
+    Önbellekteki kaydı ocr_document sonucu biçiminde döndürür. Şablonla üretilmiş kayıtlar, şablon
+    sonradan değiştirildiyse, silindiyse veya şablonlar kapalıysa geçersiz sayılır (None).
+    """
+    entry = cache.get(key)
+    if entry is None:
+        return None
+    meta = entry.get("meta") or {}
+    template = meta.get("template")
+    if template and (templates is None or templates.signature(template["name"]) != template["signature"]):
+        return None
+    return {"raw_text": entry["raw_text"], "words": entry.get("words"), "key": key, "cached": True,
+            "ocr_ms": 0.0, "template": template["name"] if template else None, "fields": meta.get("fields"),
+            "tier": meta.get("tier")}
+
+def ocr_adaptive(data: bytes, mime: str, ocr_lang: str, enhance: Union[bool, str],
+                 pdf_options: Optional[PdfOptions] = None, timeout: Optional[float] = None,
+                 templates: Optional[TemplateRegistry] = None) -> Dict[str, Any]:
+    """
+    Dosyayı kademe kademe OCR'lar (bkz. ocr.tiers); sonuç yeterliyse sonraki kademelere geçilmez.
+    Eksik alanı en az olan sonuç (eşitlikte sonraki kademe) döner; "tier" ulaşılan son kademe,
+    "ocr_ms" tüm kademelerin toplam OCR süresidir.
+    """
+    options = pdf_options or PdfOptions()
+    best: Optional[Dict[str, Any]] = None
+    best_missing = 0
+    ocr_ms = 0.0
+    for i, tier in enumerate(TIERS):
+        tier_enh = tier_enhance(tier, enhance)
+        if mime == PDF_MIME:
+            result = ocr_pdf(data, ocr_lang, tier_enh, options._replace(dpi=tier_dpi(tier, options.dpi)),
+                             timeout=timeout, templates=templates, psm=tier.psm, scale=tier.scale)
+        else:
+            result = ocr_image(data, mime, ocr_lang, tier_enh, timeout=timeout, templates=templates,
+                               psm=tier.psm, scale=tier.scale)
+        ocr_ms += result["ocr_ms"]
+        if result["failed"]:
+            # OCR hatası üst kademede de tekrarlanır; önceki kademenin sonucu varsa o kullanılır
+            if best is None:
+                best = result
+            break
+        with stage("tier_check"):
+            missing = len(missing_fields(result))
+        if best is None or best["failed"] or missing <= best_missing:
+            best, best_missing = result, missing
+        # Tüm sayfaları metin katmanından okunan PDF'lerde üst kademe sonucu değiştirmez
+        ocr_done = bool(result["words"] or result["template"])
+        if not ocr_done:
+            break
+        with stage("tier_check"):
+            escalate = needs_escalation(result)
+        if not escalate:
+            break
+    best["tier"] = tier.name
+    best["ocr_ms"] = ocr_ms
+    return best
+
+def ocr_uncached(data: bytes, mime: str, ocr_lang: str, enhance: Union[bool, str],
+                 timeout: Optional[float] = None, pdf_options: Optional[PdfOptions] = None,
+                 templates: Optional[TemplateRegistry] = None, adaptive: bool = True) -> Dict[str, Any]:
+    """Dosyayı önbelleğe bakmadan OCR'lar; sonuç store_document ile önbelleğe yazılır."""
+    if adaptive:
+        result = ocr_adaptive(data, mime, ocr_lang, enhance, pdf_options, timeout=timeout, templates=templates)
+    elif mime == PDF_MIME:
+        result = ocr_pdf(data, ocr_lang, enhance, pdf_options, timeout=timeout, templates=templates)
+    else:
+        result = ocr_image(data, mime, ocr_lang, enhance, timeout=timeout, templates=templates)
+    result.setdefault("tier", None)
+    return result
+
+def store_document(cache: OCRCache, key: str, result: Dict[str, Any], mime: str, ocr_lang: str,
+                   enhance: Union[bool, str], templates: Optional[TemplateRegistry] = None) -> Dict[str, Any]:
+    """ocr_uncached sonucunu önbelleğe yazar ve ocr_document sonucu biçiminde döndürür."""
+    # Hata metinleri önbelleğe yazılmaz, bir sonraki çalıştırmada yeniden denenir
+    if not result["failed"]:
+        meta = {"lang": ocr_lang, "enhance": enhance, "mime": mime, "tier": result["tier"]}
+        if result["template"]:
+            meta["template"] = {"name": result["template"], "signature": templates.signature(result["template"])}
+            meta["fields"] = result["fields"]
+        with stage("cache"):
+            cache.put(key, result["raw_text"], words=result["words"], meta=meta)
+    return {"raw_text": result["raw_text"], "words": result["words"], "key": key, "cached": False,
+            "ocr_ms": result["ocr_ms"], "template": result["template"], "fields": result["fields"],
+            "tier": result["tier"]}
+
+def ocr_document(data: bytes, mime: str, ocr_lang: str, enhance: Union[bool, str],
+                 cache: Optional[OCRCache] = None, timeout: Optional[float] = None,
+                 pdf_options: Optional[PdfOptions] = None, use_templates: bool = True,
+                 adaptive: bool = True, key: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Dosyayı önbellek üzerinden OCR'dan geçirir. Önbellekte kayıt varsa
+    PDF/görüntü hiç oluşturulmaz ve Tesseract çalıştırılmaz. "words" OCR'lanan sayfaların kelime
+    kutularıdır (bkz. ocr.word_index), "ocr_ms" OCR motorunda geçen süredir.
+    use_templates açıksa tedarikçi şablonuyla eşleşen faturalarda yalnızca şablon bölgeleri okunur;
+    bu durumda "template" şablon adı, "fields" alan değerleridir (aksi hâlde ikisi de None).
+    adaptive açıksa kademeli OCR uygulanır ve "tier" ulaşılan kademedir; kapalıysa tek geçiş yapılır
+    ve "tier" None olur.
+    timeout verilirse PDF dönüştürme ve Tesseract adımlarının her biri bu süreyle sınırlanır.
+    key, çağıranın aynı ayarlarla hesapladığı önbellek anahtarıdır; verilmezse burada hesaplanır.
+    """
+    cache = cache or get_default_cache()
+    templates = get_template_registry() if use_templates else None
+    with stage("cache"):
+        key = key or document_cache_key(data, mime, ocr_lang, enhance, pdf_options, adaptive)
+        cached = cached_document(cache, key, templates)
+    if cached is not None:
+        return cached
+    result = ocr_uncached(data, mime, ocr_lang, enhance, timeout, pdf_options, templates, adaptive)
+    return store_document(cache, key, result, mime, ocr_lang, enhance, templates)
@@ -0,0 +1,261 @@
+"""
+OCR öncesi görüntü ön işleme. Görüntü bir kez gri tonlamalı uint8 diziye çevrilir, aşamalar
+bu tek tampon üzerinde NumPy ile çalışır. Aşamalar hazır ayarlar (preset) hâlinde seçilir ve
+her aşamanın süresi ölçülür.
+"""
+import json
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+import numpy as np
+from PIL import Image, ImageFilter
+from ocr.geometry import TRANSFORM_KEY, Affine, compose, image_transform, rotation_transform
+
+# Hazır ayarlar: ad -> sıralı (aşama, parametreler) listesi
+PRESETS: Dict[str, List[Tuple[str, Dict[str, Any]]]] = {
+    # Eski enhance_image davranışı: kontrast x2 ve otomatik kontrast, tek bir tablo (LUT) geçişiyle.
+    # Kontrast gri tonlamadan sonra uygulandığından renkli görüntülerde sonuç birkaç ton farklı olabilir.
+    "klasik": [("contrast", {"factor": 2.0})],
+    "standart": [
+        ("resample", {"min_dpi": 200, "max_dpi": 300, "max_width": 2500}),
+        ("contrast", {"factor": 2.0}),
+        ("deskew", {"max_angle": 5.0}),
+    ],
+    "tarama": [
+        ("resample", {"min_dpi": 200, "max_dpi": 300, "max_width": 2500}),
+        ("contrast", {"factor": 1.5}),
+        ("deskew", {"max_angle": 5.0}),
+        ("crop_borders", {}),
+        ("otsu", {}),
+    ],
+    "fotograf": [
+        ("resample", {"min_dpi": 200, "max_dpi": 300, "max_width": 2500}),
+        ("denoise", {"size": 3}),
+        ("deskew", {"max_angle": 8.0}),
+        ("crop_borders", {}),
+        ("adaptive", {"window": 31, "offset": 10}),
+    ],
+    "hizli": [
+        ("resample", {"min_dpi": 150, "max_dpi": 200, "max_width": 1700}),
+        ("otsu", {}),
+    ],
+}
+DEFAULT_PRESET = os.environ.get("FATURA_PREPROCESS_PRESET", "standart")
+
+def resolve_preset(enhance: Union[bool, str, None]) -> Optional[str]:
+    """enhance değerini hazır ayar adına çevirir: False/None -> None, True -> varsayılan."""
+    if not enhance:
+        return None
+    preset = DEFAULT_PRESET if enhance is True else enhance
+    if preset not in PRESETS:
+        raise ValueError(f"Bilinmeyen ön işleme ayarı: {preset}")
+    return preset
+
+def preset_signature(enhance: Union[bool, str, None]) -> str:
+    """Önbellek anahtarı için hazır ayarın adını ve aşama parametrelerini içeren metin."""
+    preset = resolve_preset(enhance)
+    if preset is None:
+        return "False"
+    return preset + json.dumps(PRESETS[preset], sort_keys=True)
+
+def to_grayscale(image: Image.Image) -> np.ndarray:
+    if image.mode in ("RGBA", "LA", "P"):
+        # Saydam alanlar siyah değil beyaz zemin olarak değerlendirilir
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image.convert("RGBA"), mask=image.convert("RGBA").getchannel("A"))
+        image = background
+    return np.asarray(image.convert("L"), dtype=np.uint8)
+
+def resample(gray: np.ndarray, source_dpi: Optional[float] = None, min_dpi: int = 200,
+             max_dpi: int = 300, max_width: int = 2500) -> np.ndarray:
+    """
+    Çözünürlüğü bilinen görüntüleri [min_dpi, max_dpi] aralığına getirir; genişliği max_width'i
+    aşan görüntüleri (ör. telefon fotoğrafları) küçültür.
+    """
+    height, width = gray.shape
+    scale = 1.0
+    if source_dpi:
+        if source_dpi > max_dpi:
+            scale = max_dpi / source_dpi
+        elif source_dpi < min_dpi:
+            scale = min_dpi / source_dpi
+    if max_width and width * scale > max_width:
+        scale = max_width / width
+    if abs(scale - 1.0) < 0.02:
+        return gray
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    resample_filter = Image.LANCZOS if scale < 1 else Image.BICUBIC
+    return np.asarray(Image.fromarray(gray).resize(size, resample_filter))
+
+def _histogram(gray: np.ndarray) -> np.ndarray:
+    # PIL histogramı büyük görüntülerde np.bincount'tan belirgin biçimde hızlıdır
+    return np.asarray(Image.fromarray(gray).histogram(), dtype=np.float64)
+
+def stretch_contrast(gray: np.ndarray, factor: float = 2.0) -> np.ndarray:
+    """Ortalama etrafında kontrastı artırır ve değerleri 0-255'e yayar; tek bir LUT geçişi."""
+    hist = _histogram(gray)
+    levels = np.arange(256, dtype=np.float64)
+    mean = float(hist @ levels) / max(1, gray.size)
+    lut = np.clip(mean + factor * (levels - mean), 0, 255)
+    present = lut[hist > 0]
+    lo, hi = present.min(), present.max()
+    if hi > lo:
+        lut = (lut - lo) * (255.0 / (hi - lo))
+    lut = np.clip(lut + 0.5, 0, 255).astype(np.uint8)
+    return np.asarray(Image.fromarray(gray).point(lut.tolist()))
+
+def denoise(gray: np.ndarray, size: int = 3) -> np.ndarray:
+    """Tuz-biber gürültüsünü medyan filtresiyle temizler."""
+    return np.asarray(Image.fromarray(gray).filter(ImageFilter.MedianFilter(size)))
+
+def otsu_threshold(gray: np.ndarray) -> int:
+    hist = _histogram(gray)
+    weight = np.cumsum(hist)
+    total = weight[-1]
+    cum_mean = np.cumsum(hist * np.arange(256))
+    background = weight
+    foreground = total - weight
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (cum_mean[-1] * background / total - cum_mean) ** 2 / (background * foreground)
+    between[~np.isfinite(between)] = 0
+    return int(np.argmax(between))
+
+def binarize_otsu(gray: np.ndarray) -> np.ndarray:
+    threshold = otsu_threshold(gray)
+    return np.where(gray > threshold, 255, 0).astype(np.uint8)
+
+def binarize_adaptive(gray: np.ndarray, window: int = 31, offset: int = 10) -> np.ndarray:
+    """
+    Yerel ortalama eşiklemesi: piksel, çevresindeki window x window alanın ortalamasından
+    offset kadar koyuysa siyah olur. Gölgeli fotoğraflarda Otsu'dan daha dayanıklıdır.
+    """
+    half = window // 2
+    padded = np.pad(gray, half + 1, mode="edge").astype(np.int64)
+    integral = padded.cumsum(axis=0).cumsum(axis=1)
+    height, width = gray.shape
+    top, left = integral[:height, :width], integral[:height, window:window + width]
+    bottom, right = integral[window:window + height, :width], integral[window:window + height, window:window + width]
+    local_sum = right - left - bottom + top
+    return np.where(gray.astype(np.int64) * (window * window) > local_sum - offset * window * window,
+                    255, 0).astype(np.uint8)
+
+def estimate_skew(gray: np.ndarray, max_angle: float = 5.0, step: float = 0.25,
+                  max_points: int = 50000) -> float:
+    """
+    Metin satırlarının eğim açısını (derece, saat yönünün tersi pozitif) izdüşüm profiliyle tahmin
+    eder: koyu pikseller her aday açı için satır eksenine izdüşürülür, en keskin profili veren açı seçilir.
+    """
+    sample_step = max(1, max(gray.shape) // 1000)
+    small = gray[::sample_step, ::sample_step]
+    ys, xs = np.nonzero(small <= otsu_threshold(small))
+    if len(ys) < 50:
+        return 0.0
+    if len(ys) > max_points:
+        pick = np.random.default_rng(0).choice(len(ys), max_points, replace=False)
+        ys, xs = ys[pick], xs[pick]
+    angles = np.arange(-max_angle, max_angle + step / 2, step)
+    radians = np.deg2rad(angles)[:, None]
+    rho = np.rint(ys[None, :] * np.cos(radians) - xs[None, :] * np.sin(radians)).astype(np.int64)
+    rho -= rho.min()
+    bins = int(rho.max()) + 1
+    hist = np.bincount((rho + np.arange(len(angles))[:, None] * bins).ravel(),
+                       minlength=len(angles) * bins).reshape(len(angles), bins)
+    scores = (hist.astype(np.float64) ** 2).sum(axis=1)
+    return 0.0 - float(angles[int(np.argmax(scores))])
+
+_IDENTITY: Affine = (1.0, 0.0, 0.0, 0.0, 1.0, 0.0)
+
+def _deskew(gray: np.ndarray, max_angle: float = 5.0, step: float = 0.25) -> Tuple[np.ndarray, Affine]:
+    angle = estimate_skew(gray, max_angle, step)
+    if abs(angle) < step / 2:
+        return gray, _IDENTITY
+    rotated = Image.fromarray(gray).rotate(-angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+    return np.asarray(rotated), rotation_transform(gray.shape[1], gray.shape[0], -angle)
+
+def deskew(gray: np.ndarray, max_angle: float = 5.0, step: float = 0.25) -> np.ndarray:
+    return _deskew(gray, max_angle, step)[0]
+
+def _crop_borders(gray: np.ndarray, dark_ratio: float = 0.5, margin: float = 0.01) -> Tuple[np.ndarray, Affine]:
+    dark = gray <= otsu_threshold(gray)
+    # Önce kenarlardaki kenarlık satır/sütunları, ardından kalan alanın içerik kutusu bulunur
+    rows = np.nonzero(dark.mean(axis=1) <= dark_ratio)[0]
+    cols = np.nonzero(dark.mean(axis=0) <= dark_ratio)[0]
+    if not len(rows) or not len(cols):
+        return gray, _IDENTITY
+    y0, x0 = rows[0], cols[0]
+    inner = dark[y0:rows[-1] + 1, x0:cols[-1] + 1]
+    rows = np.nonzero(inner.any(axis=1))[0]
+    cols = np.nonzero(inner.any(axis=0))[0]
+    if not len(rows) or not len(cols):
+        return gray, _IDENTITY
+    pad_y, pad_x = int(gray.shape[0] * margin), int(gray.shape[1] * margin)
+    top, bottom = max(y0, y0 + rows[0] - pad_y), min(y0 + inner.shape[0], y0 + rows[-1] + 1 + pad_y)
+    left, right = max(x0, x0 + cols[0] - pad_x), min(x0 + inner.shape[1], x0 + cols[-1] + 1 + pad_x)
+    return gray[top:bottom, left:right], (1.0, 0.0, -float(left), 0.0, 1.0, -float(top))
+
+def crop_borders(gray: np.ndarray, dark_ratio: float = 0.5, margin: float = 0.01) -> np.ndarray:
+    """
+    Tarayıcı kenarlıklarını ve boş kenar boşluklarını kırpar. Koyu piksel oranı dark_ratio'yu
+    aşan satır/sütunlar kenarlık sayılır; içerik kutusunun çevresinde margin kadar pay bırakılır.
+    """
+    return _crop_borders(gray, dark_ratio, margin)[0]
+
+def _resample(gray: np.ndarray, **params: Any) -> Tuple[np.ndarray, Affine]:
+    resized = resample(gray, **params)
+    return resized, (resized.shape[1] / gray.shape[1], 0.0, 0.0, 0.0, resized.shape[0] / gray.shape[0], 0.0)
+
+STAGES: Dict[str, Callable[..., np.ndarray]] = {
+    "resample": resample,
+    "contrast": stretch_contrast,
+    "denoise": denoise,
+    "deskew": deskew,
+    "crop_borders": crop_borders,
+    "otsu": binarize_otsu,
+    "adaptive": binarize_adaptive,
+}
+# Sayfa geometrisini değiştiren aşamalar: (görüntü, piksel dönüşümü) döndürür
+GEOMETRY_STAGES: Dict[str, Callable[..., Tuple[np.ndarray, Affine]]] = {
+    "resample": _resample,
+    "deskew": _deskew,
+    "crop_borders": _crop_borders,
+}
+
+def _source_dpi(image: Image.Image) -> Optional[float]:
+    dpi = image.info.get("dpi")
+    try:
+        return float(dpi[0]) if dpi and dpi[0] else None
+    except (TypeError, ValueError, IndexError):
+        return None
+
+def preprocess(image: Image.Image, preset: Union[bool, str] = True,
+               scale: float = 1.0) -> Tuple[Image.Image, Dict[str, float]]:
+    """
+    Görüntüyü hazır ayardaki aşamalardan geçirir. (gri tonlamalı görüntü, aşama süreleri ms)
+    döndürür; "grayscale" dönüşümün, "toplam" tüm işlemin süresidir. scale kademeli OCR'da
+    kademenin ölçeğidir; yeniden örnekleme sınırları bununla çarpılır ki kademenin çözünürlüğü geri alınmasın.
+    Sonuç görüntünün info["transform"] alanı kaynak sayfadan sonuca geometri dönüşümüdür (bkz. ocr.geometry).
+    """
+    name = resolve_preset(preset)
+    timings: Dict[str, float] = {}
+    started = last = time.perf_counter()
+    gray = to_grayscale(image)
+    now = time.perf_counter()
+    timings["grayscale"] = (now - last) * 1000
+    last = now
+    transform = image_transform(image)
+    for stage, params in PRESETS[name] if name else []:
+        if stage == "resample":
+            params = dict(params, source_dpi=_source_dpi(image),
+                          **{k: params[k] * scale for k in ("min_dpi", "max_dpi", "max_width") if k in params})
+        if stage in GEOMETRY_STAGES:
+            gray, step_transform = GEOMETRY_STAGES[stage](gray, **params)
+            transform = compose(step_transform, transform)
+        else:
+            gray = STAGES[stage](gray, **params)
+        now = time.perf_counter()
+        timings[stage] = timings.get(stage, 0.0) + (now - last) * 1000
+        last = now
+    result = Image.fromarray(gray)
+    result.info[TRANSFORM_KEY] = transform
+    timings["toplam"] = (time.perf_counter() - started) * 1000
+    return result, timings
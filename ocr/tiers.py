@@ -0,0 +1,74 @@
+"""
+Kademeli OCR. Fatura önce ucuz bir geçişle (düşük çözünürlük, tek metin bloğu PSM) okunur ve
+parse_invoice_data ile ayrıştırılır. Zorunlu alanlardan biri bulunamazsa veya kelimelerin
+ortalama güveni düşükse bir sonraki kademeye (daha yüksek çözünürlük, ön işleme, farklı PSM)
+geçilir. Hangi kademede durulduğu her fatura için kaydedilir.
+"""
+from typing import Any, Dict, List, NamedTuple, Optional, Union
+from ocr.invoice_parser import INVOICE_FIELDS, get_registry, parse_invoice_data
+from ocr.ocr_engine import clean_ocr_text
+
+class OCRTier(NamedTuple):
+    """
+    Bir OCR kademesi. scale PDF'lerde DPI'ı, görüntülerde piksel boyutunu çarpar. psm None ise
+    Tesseract'ın otomatik sayfa bölütlemesi kullanılır. enhance None ise kullanıcının ön işleme
+    ayarı, True ise kullanıcının hazır ayarı (kapalıysa varsayılan hazır ayar) uygulanır.
+    """
+    name: str
+    scale: float
+    psm: Optional[int]
+    enhance: Optional[bool]
+
+TIERS = (
+    OCRTier("hizli", 0.75, 6, None),
+    OCRTier("standart", 1.0, None, None),
+    OCRTier("yogun", 1.5, 11, True),
+)
+# Kademe sonucunun yeterli sayılması için bulunması gereken alanlar (desen anahtarları)
+REQUIRED_FIELDS = ("date", "total", "invoice_no", "tax")
+# OCR'lanan kelimelerin ortalama güveni bunun altındaysa bir sonraki kademeye geçilir
+MIN_TIER_CONFIDENCE = 70.0
+# Büyütülen görüntülerin genişlik sınırı (piksel; A4 300 DPI yaklaşık 2480)
+MAX_TIER_WIDTH = 3500
+
+def tiers_signature(tiers: List[OCRTier] = TIERS) -> str:
+    """Önbellek anahtarı için kademe tanımları; kademeler değişirse eski sonuçlar kullanılmaz."""
+    return repr([tuple(t) for t in tiers])
+
+def tier_enhance(tier: OCRTier, enhance: Union[bool, str]) -> Union[bool, str]:
+    if tier.enhance is None:
+        return enhance
+    return enhance or tier.enhance
+
+def tier_dpi(tier: OCRTier, dpi: int) -> int:
+    return max(72, int(round(dpi * tier.scale)))
+
+def image_scale(scale: float, width: int) -> float:
+    """Görüntü için ölçek; büyütme MAX_TIER_WIDTH ile sınırlanır, küçültme her zaman uygulanır."""
+    if scale <= 1.0:
+        return scale
+    return max(1.0, min(scale, MAX_TIER_WIDTH / max(1, width)))
+
+def mean_confidence(pages: Optional[List[Dict[str, Any]]]) -> Optional[float]:
+    """Sayfa kayıtlarındaki kelimelerin ortalama güveni; kelime yoksa None."""
+    confs = [row[5] for page in pages or [] for row in page["words"] if row[5] >= 0]
+    return sum(confs) / len(confs) if confs else None
+
+def missing_fields(result: Dict[str, Any]) -> List[str]:
+    """
+    OCR sonucunda bulunamayan zorunlu alanlar. Deseni tanımlı olmayan alanlar aranmaz; şablonla
+    okunan faturalarda yalnızca şablonda bölgesi olan alanlara bakılır.
+    """
+    required = [key for key in REQUIRED_FIELDS if get_registry().get(key)]
+    if result.get("fields"):
+        return [key for key in required if key in result["fields"] and result["fields"][key] == "bulunamadı"]
+    parsed = parse_invoice_data(clean_ocr_text(result["raw_text"]))
+    out_keys = {key: out_key for key, out_key, _, _ in INVOICE_FIELDS}
+    return [key for key in required if parsed.get(out_keys[key], "bulunamadı") == "bulunamadı"]
+
+def needs_escalation(result: Dict[str, Any], min_confidence: float = MIN_TIER_CONFIDENCE) -> bool:
+    """Zorunlu alanlardan biri eksikse veya ortalama kelime güveni düşükse True."""
+    if missing_fields(result):
+        return True
+    confidence = mean_confidence(result.get("words"))
+    return confidence is not None and confidence < min_confidence
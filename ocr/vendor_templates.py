@@ -0,0 +1,208 @@
+"""
+Tedarikçi şablonları. Sabit düzenli faturalar için her alanın sayfadaki kutusu (0-1 arası
+oransal koordinatlarla) vendor_templates.json dosyasında saklanır:
+
+    {"Axxion": {"vkn": "1234567890", "header_hash": "...", "fields": {"total": [0.6, 0.8, 0.95, 0.85]}}}
+
+Gelen sayfa, üst şeridinin algısal özeti (dHash) ile şablonlarla eşleştirilir; eşleşen faturalarda
+tam sayfa yerine yalnızca şablon bölgeleri OCR'lanır. Özet ve kutular ön işleme öncesi sayfaya göredir;
+ön işlemeden geçmiş sayfada kutular sayfa dönüşümüyle (bkz. ocr.geometry) taşınır.
+"""
+import copy
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from PIL import Image
+from ocr.geometry import image_transform, map_box
+from ocr.image_utils import dhash, hamming_distance
+from ocr.invoice_parser import get_registry
+from ocr.ocr_engine import extract_words_from_image
+from ocr.word_index import words_to_text
+
+TEMPLATE_FILE = os.path.join(os.path.dirname(__file__), "vendor_templates.json")
+# Üst şeridin sayfa yüksekliğine oranı ve özet boyutu (16x8 = 128 bit)
+HEADER_RATIO = 0.2
+HEADER_HASH_SIZE = (16, 8)
+HEADER_HASH_MIN_DIFF = 3
+# Bu kadar bitten fazla farklı olan üst şeritler aynı tedarikçi sayılmaz
+HEADER_HASH_MAX_DISTANCE = 12
+# Bölgeler kırpılırken her yöne bırakılan pay ve birleştirilmiş görüntüde bölgeler arası boşluk (piksel)
+REGION_PADDING = 4
+REGION_GAP = 24
+# Bölgeler tek görüntüde birleştirilip tek metin bloğu olarak okunur
+REGION_PSM = 6
+
+def header_hash(image: Image.Image, ratio: float = HEADER_RATIO) -> str:
+    """Sayfanın üst şeridinin algısal özetini onaltılık metin olarak döndürür."""
+    strip = image.crop((0, 0, image.width, max(1, int(image.height * ratio))))
+    width, height = HEADER_HASH_SIZE
+    return format(dhash(strip, width, height, HEADER_HASH_MIN_DIFF), f"0{width * height // 4}x")
+
+class TemplateRegistry:
+    """
+    vendor_templates.json dosyasını bellekte tutar. Dosyanın değişip değişmediği en fazla
+    check_interval saniyede bir kontrol edilir; yazma işlemleri atomiktir.
+    """
+
+    def __init__(self, path: str = TEMPLATE_FILE, check_interval: float = 1.0):
+        self.path = path
+        self.check_interval = check_interval
+        self._templates: Dict[str, Any] = {}
+        self._hashes: Dict[str, int] = {}
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._checked_at = 0.0
+        self._lock = threading.RLock()
+
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval and self._checked_at:
+            return
+        self._checked_at = now
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return
+        templates: Dict[str, Any] = {}
+        if stamp is not None:
+            with open(self.path, "r", encoding="utf-8") as f:
+                templates = json.load(f)
+        self._set_state(templates, stamp)
+
+    def _set_state(self, templates: Dict[str, Any], stamp: Optional[Tuple[int, int]]) -> None:
+        self._templates = templates
+        self._stamp = stamp
+        self._hashes = {name: int(t["header_hash"], 16) for name, t in templates.items() if t.get("header_hash")}
+
+    def _write(self, templates: Dict[str, Any]) -> None:
+        directory = os.path.dirname(self.path) or "."
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(templates, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._set_state(templates, self._file_stamp())
+        self._checked_at = time.monotonic()
+
+    def templates(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refresh()
+            return copy.deepcopy(self._templates)
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            template = self._templates.get(name)
+            return copy.deepcopy(template) if template is not None else None
+
+    def signature(self, name: str) -> Optional[str]:
+        """Şablonun içeriğinin özeti; şablon değiştiğinde eski önbellek kayıtlarını ayırt etmek için."""
+        template = self.get(name)
+        if template is None:
+            return None
+        return hashlib.sha1(json.dumps(template, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def set_field(self, name: str, field: str, box: Tuple[float, float, float, float],
+                  header: Optional[str] = None, vkn: Optional[str] = None) -> None:
+        """Şablona bir alan kutusu (sol, üst, sağ, alt; 0-1 arası) ekler; şablon yoksa oluşturur."""
+        left, top, right, bottom = (min(1.0, max(0.0, float(v))) for v in box)
+        if right <= left or bottom <= top:
+            raise ValueError("Geçersiz şablon kutusu")
+        with self._lock:
+            self._refresh()
+            templates = copy.deepcopy(self._templates)
+            template = templates.setdefault(name, {"vkn": None, "header_hash": None, "fields": {}})
+            template["fields"][field] = [round(left, 4), round(top, 4), round(right, 4), round(bottom, 4)]
+            if header:
+                template["header_hash"] = header
+            if vkn:
+                template["vkn"] = vkn
+            self._write(templates)
+
+    def remove(self, name: str) -> None:
+        with self._lock:
+            self._refresh()
+            if name in self._templates:
+                templates = copy.deepcopy(self._templates)
+                del templates[name]
+                self._write(templates)
+
+    def match(self, image: Image.Image) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Üst şeridi en yakın şablonu (ad, şablon) olarak döndürür; yeterince yakın şablon yoksa None."""
+        with self._lock:
+            self._refresh()
+            if not self._hashes:
+                return None
+            hashes = dict(self._hashes)
+        value = int(header_hash(image), 16)
+        name, distance = min(((n, hamming_distance(value, h)) for n, h in hashes.items()), key=lambda x: x[1])
+        if distance > HEADER_HASH_MAX_DISTANCE:
+            return None
+        template = self.get(name)
+        return (name, template) if template and template.get("fields") else None
+
+def _field_value(field: str, text: str) -> str:
+    # Bölge metninde alanın deseni aranır; desen eşleşmezse (ör. kutu yalnızca değeri içeriyorsa)
+    # bölgenin ilk satırı değer kabul edilir
+    text = text.strip()
+    if not text:
+        return "bulunamadı"
+    compiled = get_registry().compiled(field)
+    match = compiled.search(text) if compiled is not None else None
+    return match.group(0) if match else text.splitlines()[0].strip()
+
+def extract_template_fields(image: Image.Image, template: Dict[str, Any], lang: str,
+                            timeout: float = 0) -> Optional[Tuple[Dict[str, str], Dict[str, str]]]:
+    """
+    Şablon bölgelerini (görüntü ön işlemeden geçtiyse dönüşümüyle) kırpar, alt alta tek bir küçük
+    görüntüde birleştirir ve tek OCR çağrısıyla okur. (alan değerleri, bölge metinleri) döndürür. OCR başarısız olursa veya şablonda VKN varken
+    okunan vergi numarası farklıysa None döner; çağıran tam sayfa OCR'a geçer.
+    """
+    regions: List[Tuple[str, Image.Image]] = []
+    transform = image_transform(image)
+    for field, field_box in template["fields"].items():
+        left, top, right, bottom = map_box(transform, field_box)
+        box = (
+            max(0, int(left) - REGION_PADDING), max(0, int(top) - REGION_PADDING),
+            min(image.width, int(right) + REGION_PADDING), min(image.height, int(bottom) + REGION_PADDING),
+        )
+        regions.append((field, image.crop(box).convert("L")))
+    width = max(region.width for _, region in regions) + 2 * REGION_GAP
+    height = sum(region.height for _, region in regions) + REGION_GAP * (len(regions) + 1)
+    montage = Image.new("L", (width, height), 255)
+    bands: List[Tuple[str, int, int]] = []
+    y = REGION_GAP
+    for field, region in regions:
+        montage.paste(region, (REGION_GAP, y))
+        bands.append((field, y, y + region.height))
+        y += region.height + REGION_GAP
+    _, words = extract_words_from_image(montage, lang, timeout=timeout, psm=REGION_PSM)
+    if words is None:
+        return None
+    texts: Dict[str, str] = {}
+    for field, band_top, band_bottom in bands:
+        texts[field] = words_to_text(w for w in words if band_top <= w.top + w.height // 2 < band_bottom)
+    values = {field: _field_value(field, text) for field, text in texts.items()}
+    vkn = template.get("vkn")
+    if vkn and "tax" in values and vkn not in re.sub(r"\D", "", values["tax"]):
+        return None
+    return values, texts
+
+_registry = TemplateRegistry()
+
+def get_template_registry() -> TemplateRegistry:
+    return _registry
@@ -0,0 +1,134 @@
+"""
+Sayfa başına kelime kutuları ve bölge sorguları. Sayfa bir kez kelime düzeyinde OCR'lanır
+(Tesseract image_to_data); kutular önbellekte saklanır ve koordinatla seçilen alanın metni
+yeniden OCR yapılmadan bu dizinden okunur.
+"""
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from PIL import Image
+from ocr.geometry import TRANSFORM_KEY, Affine, invert, map_box, scale_transform
+
+# Izgara hücresi kenarı (piksel); 200 DPI'da yaklaşık bir satır yüksekliğinin birkaç katı
+GRID_CELL = 64
+# Bölgedeki kelimelerin ortalama güveni bunun altındaysa alan kırpılıp yeniden OCR'lanır
+MIN_REGION_CONFIDENCE = 60.0
+
+class Word(NamedTuple):
+    text: str
+    left: int
+    top: int
+    width: int
+    height: int
+    conf: float
+    block: int = 0
+    par: int = 0
+    line: int = 0
+
+def words_from_data(data: Dict[str, List[Any]]) -> List[Word]:
+    """pytesseract.image_to_data(..., output_type=Output.DICT) çıktısındaki kelimeleri döndürür."""
+    words = []
+    for i, text in enumerate(data.get("text", [])):
+        if int(data["level"][i]) != 5 or not str(text).strip():
+            continue
+        words.append(Word(
+            str(text).strip(), int(data["left"][i]), int(data["top"][i]), int(data["width"][i]),
+            int(data["height"][i]), float(data["conf"][i]), int(data["block_num"][i]),
+            int(data["par_num"][i]), int(data["line_num"][i]),
+        ))
+    return words
+
+def words_to_text(words: Iterable[Word]) -> str:
+    """Kelimeleri okuma sırasıyla satırlara birleştirir; paragraflar arasında boş satır bırakır."""
+    lines: List[str] = []
+    current: List[str] = []
+    previous: Optional[Tuple[int, int, int]] = None
+    for word in sorted(words, key=lambda w: (w.block, w.par, w.line, w.left)):
+        line_key = (word.block, word.par, word.line)
+        if previous is not None and line_key != previous:
+            lines.append(" ".join(current))
+            current = []
+            if line_key[:2] != previous[:2]:
+                lines.append("")
+        current.append(word.text)
+        previous = line_key
+    if current:
+        lines.append(" ".join(current))
+    return "\n".join(lines)
+
+def page_record(page: int, image: Image.Image, words: Sequence[Word]) -> Dict[str, Any]:
+    """
+    Önbelleğin "words" alanında saklanan sayfa kaydı; kelimeler kısa listeler olarak tutulur.
+    OCR'lanan görüntü ön işlemeden geçtiyse "transform" kaynak sayfadan bu görüntüye geometri dönüşümüdür.
+    """
+    record = {"page": page, "width": image.width, "height": image.height, "words": [list(w) for w in words]}
+    if image.info.get(TRANSFORM_KEY):
+        record["transform"] = list(image.info[TRANSFORM_KEY])
+    return record
+
+def page_transform(record: Dict[str, Any]) -> Affine:
+    """Sayfa kaydının oransal kaynak koordinatlarından kelime koordinatlarına dönüşümü."""
+    transform = record.get("transform")
+    return tuple(transform) if transform else scale_transform(record["width"], record["height"])
+
+def find_page(pages: Optional[List[Dict[str, Any]]], page: int = 1) -> Optional[Dict[str, Any]]:
+    for record in pages or []:
+        if record.get("page") == page:
+            return record
+    return None
+
+class WordIndex:
+    """
+    Kelime kutuları için düzgün ızgara dizini. Her kelime kapladığı hücrelere eklenir;
+    bölge sorgusu yalnızca bölgenin kestiği hücrelerdeki kelimelere bakar.
+    """
+
+    def __init__(self, words: Iterable[Word], width: int, height: int, cell: int = GRID_CELL,
+                 transform: Optional[Affine] = None):
+        self.words = list(words)
+        self.width = width
+        self.height = height
+        self.transform = transform or scale_transform(width, height)
+        self.cell = cell
+        self._grid: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for i, w in enumerate(self.words):
+            for cx in range(w.left // cell, (w.left + max(w.width, 1) - 1) // cell + 1):
+                for cy in range(w.top // cell, (w.top + max(w.height, 1) - 1) // cell + 1):
+                    self._grid[(cx, cy)].append(i)
+
+    @classmethod
+    def from_page(cls, record: Dict[str, Any], cell: int = GRID_CELL) -> "WordIndex":
+        return cls((Word(*row) for row in record["words"]), record["width"], record["height"], cell,
+                   page_transform(record))
+
+    def map_from(self, box: Tuple[int, int, int, int], source: Affine) -> Tuple[int, int, int, int]:
+        """
+        Aynı sayfanın başka bir görüntüsündeki (ör. önizleme; dönüşümü source) kutuyu dizinin
+        koordinatlarına çevirir. Ön işlemedeki döndürme ve kırpma iki yönde de hesaba katılır.
+        """
+        left, top, right, bottom = map_box(self.transform, map_box(invert(source), box))
+        return int(left), int(top), int(round(right)), int(round(bottom))
+
+    def query(self, box: Tuple[int, int, int, int], min_overlap: float = 0.5) -> List[Word]:
+        """(sol, üst, sağ, alt) kutusuyla alanının en az min_overlap kadarı kesişen kelimeleri okuma sırasıyla döndürür."""
+        left, top, right, bottom = box
+        if right <= left or bottom <= top:
+            return []
+        candidates = set()
+        for cx in range(max(0, left) // self.cell, (right - 1) // self.cell + 1):
+            for cy in range(max(0, top) // self.cell, (bottom - 1) // self.cell + 1):
+                candidates.update(self._grid.get((cx, cy), ()))
+        found = []
+        for i in candidates:
+            w = self.words[i]
+            overlap_w = min(right, w.left + w.width) - max(left, w.left)
+            overlap_h = min(bottom, w.top + w.height) - max(top, w.top)
+            if overlap_w > 0 and overlap_h > 0 and \
+                    overlap_w * overlap_h >= min_overlap * max(1, w.width * w.height):
+                found.append(w)
+        return sorted(found, key=lambda w: (w.block, w.par, w.line, w.left))
+
+    def region_text(self, box: Tuple[int, int, int, int], min_overlap: float = 0.5) -> Tuple[str, float]:
+        """Bölgedeki metni ve kelimelerin ortalama güvenini (0-100, kelime yoksa 0) döndürür."""
+        words = self.query(box, min_overlap)
+        confs = [w.conf for w in words if w.conf >= 0]
+        return words_to_text(words), (sum(confs) / len(confs) if confs else 0.0)
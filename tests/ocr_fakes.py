@@ -0,0 +1,35 @@
+"""Testlerde ortak kullanılan sahte OCR motorları ve görüntü yardımcıları."""
+import io
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from PIL import Image
+from ocr.engines import OCREngine
+from ocr.word_index import Word
+
+FULL_TEXT = 'Fatura No: ABC2023001 Tarih: 01.02.2023 Vergi No: 1234567890 Toplam: 1.234,56 TL'
+
+class GenislikMotoru(OCREngine):
+    """Yalnızca genişliği min_width pikselden büyük görüntülerde tüm alanları 'okuyan' sahte motor."""
+    name = 'genislik'
+
+    def __init__(self, min_width=800):
+        super().__init__()
+        self.min_width = min_width
+        self.calls = []
+
+    def _recognize(self, image, lang, timeout, psm):
+        return ' '.join(w.text for w in self._recognize_words(image, lang, timeout, psm))
+
+    def _recognize_words(self, image, lang, timeout, psm):
+        self.calls.append((image.width, psm))
+        text = FULL_TEXT if image.width > self.min_width else 'Toplam: 1.234,56 TL'
+        return [Word(t, 10 * i, 10, 8, 8, 90.0, 1, 1, 1) for i, t in enumerate(text.split())]
+
+    def _version_string(self):
+        return 'genislik-1'
+
+def png_bytes(width, height=600, dpi=None):
+    buffer = io.BytesIO()
+    Image.new('L', (width, height), 255).save(buffer, format='PNG', **({'dpi': dpi} if dpi else {}))
+    return buffer.getvalue()
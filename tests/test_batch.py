@@ -0,0 +1,52 @@
+import os
+import sys
+import tempfile
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from ocr.ocr_cache import OCRCache
+from ocr.pipeline import document_cache_key
+import ocr.batch as batch
+from ocr.batch import iter_ocr_batch
+
+def _sahte_isci(slot, data, mime, ocr_lang, enhance, timeout, pdf_options, use_templates, adaptive):
+    # İşçi süreçte çalışır: 'takilan' içeriği hiç ilerleme bildirmeden bekler
+    batch._heartbeats[slot] = time.time()
+    if data == b'takilan':
+        time.sleep(120)
+    return {'raw_text': f'Toplam: {data.decode()}', 'failed': False, 'ocr_ms': 0.0, 'template': None,
+            'fields': None, 'tier': None, 'words': []}
+
+def test_batch_isolates_failures_and_uses_cache():
+    cache = OCRCache(cache_dir=tempfile.mkdtemp())
+    cache.put(document_cache_key(b'onbellekte', 'image/png', 'tur', False), 'Toplam: 10,00 TL')
+    items = [('bozuk1.png', b'resim degil', 'image/png'), ('kayitli.png', b'onbellekte', 'image/png'),
+             ('bozuk2.png', b'yine resim degil', 'image/png')]
+    results = {r['name']: r for r in iter_ocr_batch(items, 'tur', False, workers=2, timeout=30, cache=cache)}
+    assert set(results) == {'bozuk1.png', 'kayitli.png', 'bozuk2.png'}
+    assert results['kayitli.png']['cached'] and results['kayitli.png']['raw_text'] == 'Toplam: 10,00 TL'
+    assert results['bozuk1.png']['error'] and results['bozuk2.png']['error']
+
+def test_batch_restarts_pool_on_hung_file():
+    cache = OCRCache(cache_dir=tempfile.mkdtemp())
+    worker, grace = batch._ocr_worker, batch.TIMEOUT_GRACE
+    batch._ocr_worker, batch.TIMEOUT_GRACE = _sahte_isci, 0.5
+    try:
+        items = [('takilan.png', b'takilan', 'image/png'), ('a.png', b'a', 'image/png'), ('b.png', b'b', 'image/png'),
+                 ('c.png', b'c', 'image/png')]
+        started = time.monotonic()
+        results = {r['name']: r for r in iter_ocr_batch(items, 'tur', False, workers=2, timeout=1, cache=cache)}
+        # Takılan iş havuzla birlikte sonlandırılır; sınır adım sayısına değil ilerlemeye göredir
+        assert time.monotonic() - started < 30
+        assert results['takilan.png']['error'].startswith('Zaman aşımı')
+        for name in ('a.png', 'b.png', 'c.png'):
+            # İşçilerin sonuçları çağıranın önbelleğine ana süreçte yazılır
+            assert results[name]['error'] is None and results[name]['raw_text'] == f'Toplam: {name[0]}'
+            assert cache.get(results[name]['key'])['raw_text'] == f'Toplam: {name[0]}'
+        assert cache.stats()['entries'] == len(cache._entries()) == 3
+    finally:
+        batch._ocr_worker, batch.TIMEOUT_GRACE = worker, grace
+
+if __name__ == '__main__':
+    test_batch_isolates_failures_and_uses_cache()
+    test_batch_restarts_pool_on_hung_file()
+    print('All tests passed.')
@@ -0,0 +1,57 @@
+import copy
+import io
+import json
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from PIL import Image
+from benchmarks.run import compare, main, run_benchmarks
+from benchmarks.synthetic import generate_invoice, generate_invoices, invoice_file, vkn_check_digit
+from ocr.invoice_parser import parse_invoice_data
+
+def test_synthetic_invoices_are_reproducible_and_labeled():
+    first = list(generate_invoices(30, seed=7))
+    assert [inv.text for inv in first] == [inv.text for inv in generate_invoices(30, seed=7)]
+    assert generate_invoice(7, 3).labels == first[3].labels
+    assert len({inv.layout for inv in first}) > 1
+    assert vkn_check_digit('123456789') == '0'
+    for inv in first:
+        vkn = inv.labels['vergi_no']
+        assert len(vkn) == 10 and vkn_check_digit(vkn[:9]) == vkn[-1]
+        result = parse_invoice_data(inv.text)
+        assert result['fatura_tarihi'] == inv.labels['fatura_tarihi'] and result['vergi_no'] == vkn
+
+def test_invoice_files_render():
+    invoice = generate_invoice(0, 1)
+    name, data, mime = invoice_file(invoice, 'png')
+    assert mime == 'image/png' and name.endswith('.png')
+    assert Image.open(io.BytesIO(data)).size == (1240, 1754)
+    _, pdf, mime = invoice_file(invoice, 'pdf')
+    assert mime == 'application/pdf' and pdf.startswith(b'%PDF')
+
+def test_run_and_compare_with_baseline():
+    result = run_benchmarks(count=20, only=['parse_invoice_data', 'store_append', 'export'], repeat=1)
+    assert {'parse_invoice_data', 'store_append', 'export_csv', 'export_parquet'} <= set(result['benchmarks'])
+    assert result['benchmarks']['parse_invoice_data']['accuracy']['vergi_no'] == 1.0
+    assert compare(result, result) == []
+    slower = copy.deepcopy(result)
+    slower['benchmarks']['store_append']['per_item_ms'] = result['benchmarks']['store_append']['per_item_ms'] * 2 + 1
+    slower['benchmarks']['parse_invoice_data']['accuracy']['vergi_no'] = 0.5
+    regressions = compare(slower, result)
+    assert len(regressions) == 2 and regressions[0].startswith('parse_invoice_data doğruluk')
+
+def test_main_reports_corpus_mismatch():
+    path = os.path.join(tempfile.mkdtemp(), 'taban.json')
+    assert main(['--count', '5', '--only', 'extract_fields', '--repeat', '1', '--save-baseline', '--baseline', path]) == 0
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f)['count'] == 5
+    # Farklı fatura sayısıyla alınan taban çizgisi hata izi yerine çıkış koduyla bildirilir
+    assert main(['--count', '6', '--only', 'extract_fields', '--repeat', '1', '--baseline', path]) == 2
+
+if __name__ == '__main__':
+    test_synthetic_invoices_are_reproducible_and_labeled()
+    test_invoice_files_render()
+    test_run_and_compare_with_baseline()
+    test_main_reports_corpus_mismatch()
+    print('All tests passed.')
@@ -0,0 +1,102 @@
+import io
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+from ocr.engines import OCREngine, set_engine
+from ocr.dedup import find_duplicate, invoice_key, page_hash, verification_boxes
+from ocr.word_index import Word
+from db.dedup_index import DedupEntry, DedupIndex
+from db.invoice_store import InvoiceStore
+
+class SabitOkuyucu(OCREngine):
+    """Birleştirilmiş bölge görüntüsünü eşit yükseklikte şeritlere bölüp her şeride bir kelime 'okuyan' sahte motor."""
+    name = 'sabit'
+
+    def __init__(self, text):
+        super().__init__()
+        self.words = text.split()
+
+    def _recognize(self, image, lang, timeout, psm):
+        return ' '.join(self.words)
+
+    def _recognize_words(self, image, lang, timeout, psm):
+        step = image.height / len(self.words)
+        return [Word(t, 30, int((i + 0.5) * step) - 6, 50, 12, 95.0, 1, i + 1, 1) for i, t in enumerate(self.words)]
+
+    def _version_string(self):
+        return 'sabit-1'
+
+def _page(seed=0):
+    image = Image.new('L', (1000, 1400), 255)
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((50, 40, 300, 180), fill=0)
+    for i in range(20):
+        draw.rectangle((60, 300 + i * 45, 60 + (i * 53) % 850, 320 + i * 45), fill=0)
+    if seed:
+        # Yeniden tarama: hafif bulanıklık ve gürültü
+        noisy = np.asarray(image.filter(ImageFilter.GaussianBlur(1)), dtype=float)
+        noisy += np.random.default_rng(seed).normal(0, 10, noisy.shape)
+        image = Image.fromarray(np.clip(noisy, 0, 255).astype('uint8'))
+    return image
+
+def _png(image):
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
+def test_dedup_index_lookups():
+    path = os.path.join(tempfile.mkdtemp(), 'dizin.duckdb')
+    store = InvoiceStore(path)
+    index = DedupIndex(store)
+    phash = page_hash(_page())
+    assert index.add(DedupEntry('ozet1', phash, '1234567890|ABC2023001|123456', 'a.pdf', 'k1'))
+    assert not index.add(DedupEntry('ozet1', phash, None, 'kopya.pdf', 'k2'))
+    index.add(DedupEntry('ozet2', phash ^ ((1 << 128) - 1), None, 'b.pdf', 'k3'))
+    assert index.find_exact('ozet1').file_name == 'a.pdf' and index.find_exact('yok') is None
+    assert index.find_key('1234567890|ABC2023001|123456').file_name == 'a.pdf'
+    # 7 bit farklı özet bulunur, 8 bit farklı (her banda bir bit) bulunmaz
+    near = phash ^ sum(1 << (16 * i) for i in range(7))
+    assert [(d, e.digest) for d, e in index.find_similar(near)] == [(7, 'ozet1')]
+    assert index.find_similar(phash ^ sum(1 << (16 * i) for i in range(8))) == []
+    index.close()
+    store.close()
+    reopened = DedupIndex(InvoiceStore(path))
+    assert len(reopened) == 2 and reopened.find_similar(phash)[0][1].digest == 'ozet1'
+    reopened.clear()
+    assert len(reopened) == 0 and reopened.find_exact('ozet1') is None
+
+def test_find_duplicate_confirms_perceptual_match():
+    fields = {'tax': 'Vergi No: 1234567890', 'invoice_no': 'Fatura No: ABC2023001', 'total': 'Toplam: 1.234,56'}
+    assert invoice_key(fields) == '1234567890|ABC2023001|123456'
+    assert invoice_key(dict(fields, total='bulunamadı')) is None
+    page = {'page': 1, 'width': 1000, 'height': 1400, 'words': [
+        ['Fatura', 100, 200, 80, 20, 95.0, 1, 1, 1], ['ABC2023001', 600, 200, 160, 20, 95.0, 1, 1, 1],
+        ['1.234,56', 700, 1200, 120, 20, 95.0, 2, 1, 1]]}
+    verification = verification_boxes([page], fields)
+    assert verification['invoice_no']['value'] == 'ABC2023001' and verification['total']['value'] == '123456'
+    assert verification['invoice_no']['box'] == [0.6, 200 / 1400, 0.76, 220 / 1400]
+
+    index = DedupIndex(InvoiceStore(os.path.join(tempfile.mkdtemp(), 'dizin.duckdb')))
+    original = _png(_page())
+    first = find_duplicate(index, original, 'image/png', 'tur')
+    assert first.kind is None and first.phash is not None
+    index.add(DedupEntry(first.digest, first.phash, invoice_key(fields), 'asil.png', 'k1'), verification)
+    assert find_duplicate(index, original, 'image/png', 'tur').kind == 'icerik'
+    previous = set_engine(SabitOkuyucu('ABC2023001 1.234,56'))
+    try:
+        # Aynı kâğıdın yeniden taranmışı: kutulardaki değerler aynı okunur
+        check = find_duplicate(index, _png(_page(seed=1)), 'image/png', 'tur')
+        assert check.kind == 'algisal' and check.entry.file_name == 'asil.png'
+        # Aynı düzende farklı fatura: algısal özet aynı ama fatura no farklı okunur
+        set_engine(SabitOkuyucu('ABC2023002 1.234,56'))
+        assert find_duplicate(index, _png(_page(seed=2)), 'image/png', 'tur').kind is None
+    finally:
+        set_engine(previous)
+
+if __name__ == '__main__':
+    test_dedup_index_lookups()
+    test_find_duplicate_confirms_perceptual_match()
+    print('All tests passed.')
@@ -0,0 +1,70 @@
+import importlib.util
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from PIL import Image
+from ocr.engines import OCREngine, PytesseractEngine, configure_engine, create_engine, engine_settings, get_engine, set_engine
+from ocr.word_index import Word
+
+class SabitMotor(OCREngine):
+    name = 'sabit'
+
+    def _recognize(self, image, lang, timeout, psm):
+        if lang == 'hata':
+            raise RuntimeError('dil yok')
+        return f'{lang}:{image.size[0]}'
+
+    def _recognize_words(self, image, lang, timeout, psm):
+        return [Word(self._recognize(image, lang, timeout, psm), 0, 0, *image.size, 90.0, 1, 1, 1)]
+
+    def _version_string(self):
+        return 'sabit-1'
+
+def test_engine_latency_stats():
+    engine = SabitMotor()
+    assert engine.latency_stats()['calls'] == 0
+    assert engine.image_to_string(Image.new('L', (7, 3)), 'tur') == 'tur:7'
+    try:
+        engine.image_to_string(Image.new('L', (7, 3)), 'hata')
+        assert False
+    except RuntimeError:
+        pass
+    stats = engine.latency_stats()
+    assert stats['calls'] == 2 and stats['errors'] == 1 and stats['max_ms'] >= stats['p50_ms'] >= 0
+    assert engine.version() == 'sabit-1'
+
+def test_create_and_configure_engine():
+    if importlib.util.find_spec('tesserocr') is None:
+        assert isinstance(create_engine('auto'), PytesseractEngine)
+        try:
+            create_engine('tesserocr')
+            assert False
+        except RuntimeError:
+            pass
+    previous = engine_settings()
+    configure_engine('pytesseract', '/yok/tesseract')
+    assert engine_settings() == ('pytesseract', '/yok/tesseract')
+    configure_engine(*previous)
+
+def test_engine_interface_and_set_engine():
+    class EksikMotor(OCREngine):
+        def _recognize(self, image, lang, timeout, psm):
+            return ''
+    # Soyut yöntemleri uygulamayan motor oluşturulamaz
+    try:
+        EksikMotor()
+        assert False
+    except TypeError:
+        pass
+    engine = SabitMotor()
+    previous = set_engine(engine)
+    try:
+        assert get_engine() is engine
+    finally:
+        assert set_engine(previous) is engine
+
+if __name__ == '__main__':
+    test_engine_latency_stats()
+    test_create_and_configure_engine()
+    test_engine_interface_and_set_engine()
+    print('All tests passed.')
@@ -0,0 +1,96 @@
+import csv
+import json
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import duckdb
+from db.export import RecordWriter, export_store, iter_sql_chunks, open_export, open_record_writer
+from db.invoice_store import InvoiceStore
+from utils.checkpoint import CheckpointManifest
+
+def test_record_writers_append():
+    folder = tempfile.mkdtemp()
+    columns = ['dosya_adi', 'total']
+    for fmt in ('jsonl', 'csv'):
+        path = os.path.join(folder, 'sonuc.' + fmt)
+        for run in range(2):
+            with open_record_writer(path, fmt, columns, batch_size=2) as writer:
+                assert writer.write({'dosya_adi': f'a{run}.pdf', 'total': '1,00'}) is False
+                assert writer.write({'dosya_adi': f'b{run}.pdf', 'total': None, 'fazla': 'x'}) is True
+                writer.write({'dosya_adi': f'c{run}.pdf', 'total': "O'Neil"})
+        with open(path, encoding='utf-8', newline='') as f:
+            rows = [json.loads(line) for line in f] if fmt == 'jsonl' else list(csv.DictReader(f))
+        assert [r['dosya_adi'] for r in rows] == ['a0.pdf', 'b0.pdf', 'c0.pdf', 'a1.pdf', 'b1.pdf', 'c1.pdf']
+        assert rows[2]['total'] == "O'Neil"
+    class EksikYazici(RecordWriter):
+        pass
+    # _write_rows'u uygulamayan yazıcı dışa aktarmanın ortasında değil, oluşturulurken hata verir
+    try:
+        EksikYazici(os.path.join(folder, 'eksik'), columns)
+        assert False
+    except TypeError:
+        pass
+
+def test_checkpoint_manifest_resume():
+    folder = tempfile.mkdtemp()
+    invoice = os.path.join(folder, 'fatura.pdf')
+    with open(invoice, 'wb') as f:
+        f.write(b'%PDF')
+    manifest_path = os.path.join(folder, 'manifest.jsonl')
+    manifest = CheckpointManifest(manifest_path)
+    assert not manifest.is_done(invoice, os.stat(invoice))
+    manifest.mark_done([(invoice, os.stat(invoice))])
+    manifest.close()
+    with open(manifest_path, 'a', encoding='utf-8') as f:
+        f.write('{"path": "yarim')
+    manifest = CheckpointManifest(manifest_path)
+    assert manifest.is_done(invoice, os.stat(invoice)) and len(manifest) == 1
+    other = os.path.join(folder, 'diger.pdf')
+    with open(other, 'wb') as f:
+        f.write(b'%PDF')
+    manifest.mark_done([(other, os.stat(other))])
+    manifest.close()
+    manifest = CheckpointManifest(manifest_path)
+    assert manifest.is_done(other, os.stat(other))
+    with open(invoice, 'ab') as f:
+        f.write(b'-1.7')
+    assert not manifest.is_done(invoice, os.stat(invoice))
+    manifest.close()
+
+def test_export_store_formats():
+    folder = tempfile.mkdtemp()
+    store = InvoiceStore(os.path.join(folder, 'faturalar.duckdb'))
+    store.append_many([{'dosya_adi': f"a{i}'.pdf", 'total': None if i % 2 else '1,00'} for i in range(7)])
+    for fmt in ('csv', 'json', 'sql', 'parquet', 'duckdb'):
+        path = export_store(store, fmt, os.path.join(folder, 'disa.' + fmt), chunk_rows=3)
+        con = duckdb.connect()
+        if fmt == 'csv':
+            rows = con.execute(f"SELECT dosya_adi, total FROM read_csv('{path}', all_varchar=true)").fetchall()
+        elif fmt == 'json':
+            with open(path, encoding='utf-8') as f:
+                rows = [(r['dosya_adi'], r['total']) for r in json.load(f)]
+        elif fmt == 'sql':
+            with open(path, encoding='utf-8') as f:
+                con.execute(f.read())
+            rows = con.execute('SELECT dosya_adi, total FROM fatura_df').fetchall()
+        elif fmt == 'parquet':
+            rows = con.execute(f"SELECT dosya_adi, total FROM '{path}'").fetchall()
+        else:
+            con.execute(f"ATTACH '{path}' AS disa")
+            rows = con.execute('SELECT dosya_adi, total FROM disa.faturalar').fetchall()
+        assert rows == [(f"a{i}'.pdf", None if i % 2 else '1,00') for i in range(7)], fmt
+        con.close()
+    # İndirme için açık dosya döner; geçici dosya geride kalmaz
+    with open_export(store, 'csv') as f:
+        assert f.read().decode('utf-8').count('.pdf') == 7
+    assert not os.path.exists(f.name)
+    store.close()
+    sql = ''.join(iter_sql_chunks(['a'], [(str(i),) for i in range(5)], 't', batch_rows=2))
+    assert sql.count('INSERT INTO') == 3
+
+if __name__ == '__main__':
+    test_record_writers_append()
+    test_checkpoint_manifest_resume()
+    test_export_store_formats()
+    print('All tests passed.')
@@ -0,0 +1,85 @@
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import db.dedup_index as dedup_index
+import db.invoice_store as invoice_store
+import ocr.batch as batch
+import ocr.ocr_cache as ocr_cache
+from db.dedup_index import DedupIndex
+from db.invoice_store import InvoiceStore
+from ocr.ocr_cache import OCRCache, content_hash
+from ocr.pdf_utils import PdfOptions
+from ocr.pipeline import document_cache_key
+from utils.invoice_jobs import process_invoice_files
+from utils.job_queue import Job
+from utils.profiling import BatchProfile
+from ocr_fakes import FULL_TEXT, png_bytes
+
+def _sahte_isci(slot, data, mime, ocr_lang, enhance, timeout, pdf_options, use_templates, adaptive):
+    # İşçi süreçte çalışır: her dosyayı aynı fatura metniyle "okur"
+    return {'raw_text': FULL_TEXT, 'failed': False, 'ocr_ms': 0.0, 'template': None, 'fields': None, 'tier': None,
+            'words': []}
+
+def _run_with_defaults(func):
+    # İş varsayılan depo, dizin ve önbelleği kullanır; test bunları geçici dizindekilerle değiştirir
+    folder = tempfile.mkdtemp()
+    saved = invoice_store._default_store, dedup_index._default_index, ocr_cache._default_cache
+    store = InvoiceStore(os.path.join(folder, 'faturalar.duckdb'))
+    index = DedupIndex(store)
+    invoice_store._default_store, dedup_index._default_index = store, index
+    ocr_cache._default_cache = OCRCache(cache_dir=os.path.join(folder, 'onbellek'))
+    worker, batch._ocr_worker = batch._ocr_worker, _sahte_isci
+    try:
+        return func(store, index)
+    finally:
+        batch._ocr_worker = worker
+        invoice_store._default_store, dedup_index._default_index, ocr_cache._default_cache = saved
+        store.close()
+
+def test_same_named_files_keep_their_own_dedup_entries():
+    def run(store, index):
+        # Farklı klasörlerden aynı adla yüklenen iki farklı fatura; ikisi de sonuçlardan önce havuza gönderilir
+        first, second = png_bytes(1000), png_bytes(900)
+        files = [('fatura.png', first, 'image/png'), ('fatura.png', second, 'image/png')]
+        profile = BatchProfile()
+        job = Job(1, 'yukleme')
+        assert process_invoice_files(job, files, 'tur', False, 2, PdfOptions(), profile=profile) == 2
+        for data in (first, second):
+            entry = index.find_exact(content_hash(data))
+            assert entry is not None and entry.cache_key == document_cache_key(data, 'image/png', 'tur', False, PdfOptions())
+        # Metinleri aynı olduğundan ikincisi ilkinin olası mükerreri olarak işaretlenir
+        assert sorted(store.to_df()['olasi_mukerrer'].fillna('')) == ['', 'fatura.png']
+        assert all('dedup' in f.stages for f in profile.files)
+        assert job.snapshot()['done'] == 2
+    _run_with_defaults(run)
+
+def test_files_are_indexed_and_flagged_when_skipping_is_off():
+    def run(store, index):
+        first, second = png_bytes(1000), png_bytes(900)
+        files = [('a.png', first, 'image/png'), ('b.png', second, 'image/png')]
+        job = Job(1, 'yukleme')
+        assert process_invoice_files(job, files, 'tur', False, 2, PdfOptions(), skip_duplicates=False) == 2
+        assert len(index) == 2 and index.find_exact(content_hash(second)).phash is not None
+        # Önce biten fatura asıl, diğeri onun olası mükerreri sayılır
+        flags = dict(zip(store.to_df()['dosya_adi'], store.to_df()['olasi_mukerrer'].fillna('')))
+        assert sorted(flags.values()) == ['', 'a.png' if flags['a.png'] == '' else 'b.png']
+    _run_with_defaults(run)
+
+def test_reuploaded_files_are_logged_and_resurfaced():
+    def run(store, index):
+        files = [('a.png', png_bytes(1000), 'image/png'), ('b.png', png_bytes(900), 'image/png')]
+        assert process_invoice_files(Job(1, 'ilk'), files, 'tur', False, 2, PdfOptions()) == 2
+        # Görünüm temizlendikten sonra aynı dosyalar yeniden yüklenir
+        view_start = store.max_id()
+        job = Job(2, 'tekrar')
+        assert process_invoice_files(job, files[:1], 'tur', False, 2, PdfOptions()) == 0
+        assert any('1 dosya daha önce işlendiği için atlandı' in m for m in job.snapshot()['messages'])
+        assert list(store.page(0, 5, after_id=view_start)['dosya_adi']) == ['a.png'] and store.count() == 2
+    _run_with_defaults(run)
+
+if __name__ == '__main__':
+    test_same_named_files_keep_their_own_dedup_entries()
+    test_files_are_indexed_and_flagged_when_skipping_is_off()
+    test_reuploaded_files_are_logged_and_resurfaced()
+    print('All tests passed.')
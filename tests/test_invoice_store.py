@@ -0,0 +1,36 @@
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from db.invoice_store import InvoiceStore
+
+def test_invoice_store_append_and_page():
+    path = os.path.join(tempfile.mkdtemp(), 'faturalar.duckdb')
+    store = InvoiceStore(path)
+    store.ensure_columns(['date', 'total'])
+    rows = [{'dosya_adi': f'f{i}.pdf', 'date': '01.01.2023', 'total': str(i), 'onbellek_anahtari': f'k{i}'}
+            for i in range(120)]
+    assert store.append_many(rows[:100]) == 100
+    store.append_many(rows[100:] + [{'dosya_adi': 'yeni.pdf', 'kdv': '%20'}])
+    assert store.count() == 121
+    assert 'kdv' in store.field_columns and 'onbellek_anahtari' not in store.page(0, 1).columns
+    assert list(store.page(50, 3)['dosya_adi']) == ['f50.pdf', 'f51.pdf', 'f52.pdf']
+    assert list(store.tail(2)['dosya_adi']) == ['f119.pdf', 'yeni.pdf']
+    assert store.existing_keys(['k5', 'yok']) == {'k5'}
+    # Temizlenen görünüm yalnızca sonraki kayıtları gösterir, geçmiş silinmez
+    assert store.max_id() == 121 and store.count(after_id=119) == 2
+    assert list(store.page(0, 5, after_id=119)['dosya_adi']) == ['f119.pdf', 'yeni.pdf']
+    assert list(store.tail(5, after_id=120)['dosya_adi']) == ['yeni.pdf']
+    # Yeniden yüklenen kayıtlar silinmeden görünümün sonuna taşınır
+    assert store.resurface(['k5', 'yok']) == 1 and store.count() == 121
+    assert list(store.tail(5, after_id=121)['dosya_adi']) == ['f5.pdf']
+    store.close()
+    store = InvoiceStore(path)
+    assert store.count() == 121 and store.max_id() == 122
+    store.clear()
+    assert store.count() == 0
+    store.close()
+
+if __name__ == '__main__':
+    test_invoice_store_append_and_page()
+    print('All tests passed.')
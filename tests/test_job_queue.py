@@ -0,0 +1,49 @@
+import os
+import sys
+import threading
+import time
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from utils.job_queue import CANCELLED, DONE, FAILED, RUNNING, JobQueue
+
+def _count(job, n, gate=None):
+    job.progress(0, n)
+    for i in range(n):
+        if gate is not None:
+            gate.wait(5)
+        if job.cancelled:
+            return i
+        job.progress(i + 1)
+        job.log(f'{i + 1}. adım')
+    return n
+
+def _fail(job):
+    raise ValueError('bozuk dosya')
+
+def test_job_queue_runs_and_reports():
+    queue = JobQueue()
+    job = queue.submit('sayma', _count, 3)
+    failing = queue.submit('hatalı', _fail)
+    queue.shutdown()
+    assert job.status == DONE and job.result == 3 and job.snapshot()['done'] == 3
+    assert job.snapshot()['messages'][-1] == '3. adım'
+    assert failing.status == FAILED and failing.error == 'bozuk dosya'
+    assert [j.id for j in queue.jobs()] == [failing.id, job.id] and queue.active() == []
+
+def test_job_queue_cancel():
+    queue = JobQueue()
+    gate = threading.Event()
+    running = queue.submit('uzun', _count, 100, gate)
+    waiting = queue.submit('bekleyen', _count, 1)
+    while running.status != RUNNING:
+        time.sleep(0.01)
+    assert queue.cancel(waiting.id) and waiting.status == CANCELLED
+    assert queue.cancel(running.id)
+    gate.set()
+    queue.shutdown()
+    assert running.status == CANCELLED and running.result < 100
+    assert not queue.cancel(running.id)
+
+if __name__ == '__main__':
+    test_job_queue_runs_and_reports()
+    test_job_queue_cancel()
+    print('All tests passed.')
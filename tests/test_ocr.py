@@ -1,26 +1,49 @@
-import os
-import sys
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from ocr.invoice_parser import list_patterns, set_pattern, get_pattern, parse_invoice_data
-
-def test_pattern_crud():
-    patterns = list_patterns()
-    assert isinstance(patterns, dict)
-    set_pattern('test_field', {'pattern': r'Test(\d+)', 'example': 'Test123', 'type': 'test'})
-    assert get_pattern('test_field') == r'Test(\d+)'
-    patterns = list_patterns()
-    assert 'test_field' in patterns
-
-def test_parse_invoice_data():
-    text = 'Fatura No: FTR20230001\nToplam: 1.234,56 TL\nTarih: 01.01.2023\nSatıcı: Axxion Yazılım\nVergi No: 1234567890'
-    result = parse_invoice_data(text)
-    assert result['fatura_tarihi'] == '01.01.2023'
-    assert result['toplam_tutar'] == '1.234,56'
-    assert result['fatura_no'] == 'FTR20230001'
-    assert result['satıcı_adı'] == 'Axxion Yazılım'
-    assert result['vergi_no'] == '1234567890'
-
-if __name__ == '__main__':
-    test_pattern_crud()
-    test_parse_invoice_data()
+import json
+import os
+import re
+import sys
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from ocr.invoice_parser import list_patterns, set_pattern, get_pattern, parse_invoice_data, PatternRegistry, DEFAULT_PATTERNS
+
+def test_pattern_crud():
+    patterns = list_patterns()
+    assert isinstance(patterns, dict)
+    set_pattern('test_field', {'pattern': r'Test(\d+)', 'example': 'Test123', 'type': 'test'})
+    assert get_pattern('test_field') == r'Test(\d+)'
+    patterns = list_patterns()
+    assert 'test_field' in patterns
+
+def test_parse_invoice_data():
+    text = 'Fatura No: FTR20230001\nToplam: 1.234,56 TL\nTarih: 01.01.2023\nSatıcı: Axxion Yazılım\nVergi No: 1234567890'
+    result = parse_invoice_data(text)
+    assert result['fatura_tarihi'] == '01.01.2023'
+    assert result['toplam_tutar'] == '1.234,56'
+    assert result['fatura_no'] == 'FTR20230001'
+    assert result['satıcı_adı'] == 'Axxion Yazılım'
+    assert result['vergi_no'] == '1234567890'
+
+def test_pattern_registry():
+    path = os.path.join(tempfile.mkdtemp(), 'patterns.json')
+    registry = PatternRegistry(path, check_interval=0)
+    assert set(registry.patterns()) == set(DEFAULT_PATTERNS)
+    registry.set('kdv', {'pattern': r'KDV\s*%?(\d+)', 'example': 'KDV %18', 'type': 'diğer'})
+    assert registry.compiled('kdv').search('KDV %18').group(1) == '18'
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'kdv': r'KDV\s*(\d+)', 'tekrar': r'(\d)\1'}, f)
+    os.utime(path, (0, 0))
+    assert set(registry.patterns()) == {'kdv', 'tekrar'}
+    text = 'Fatura 1122\nKDV 20'
+    matches = registry.match_all(text, {'kdv': re.IGNORECASE, 'tekrar': 0})
+    assert matches['kdv'].group(1) == '20'
+    assert matches['tekrar'].group(0) == re.search(r'(\d)\1', text).group(0)
+    # Koşullu grup birleşik desende başka desenin grubuna bakar; tek başına aranır
+    registry.set('kosullu', r'(<)?\d{4}(?(1)>)')
+    matches = registry.match_all('Fatura <1122 KDV 20', {'kdv': 0, 'kosullu': 0})
+    assert matches['kosullu'].group(0) == '1122' and matches['kdv'].group(1) == '20'
+
+if __name__ == '__main__':
+    test_pattern_crud()
+    test_parse_invoice_data()
+    test_pattern_registry()
     print('All tests passed.') 
\ No newline at end of file
@@ -0,0 +1,39 @@
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from ocr.ocr_cache import OCRCache, content_hash, make_cache_key
+
+def test_cache_hit_miss():
+    cache = OCRCache(cache_dir=tempfile.mkdtemp())
+    key = make_cache_key(content_hash(b'fatura'), 'tur', False, 'test')
+    assert cache.get(key) is None
+    cache.put(key, 'Toplam: 100,00 TL', words=[{'text': 'Toplam', 'box': [0, 0, 10, 10]}])
+    entry = cache.get(key)
+    assert entry['raw_text'] == 'Toplam: 100,00 TL'
+    assert entry['words'][0]['text'] == 'Toplam'
+    stats = cache.stats()
+    assert stats['hits'] == 1 and stats['misses'] == 1 and stats['entries'] == 1
+    assert make_cache_key(content_hash(b'fatura'), 'eng', False, 'test') != key
+
+def test_cache_lru_eviction():
+    cache = OCRCache(cache_dir=tempfile.mkdtemp(), max_bytes=2000)
+    keys = [make_cache_key(content_hash(bytes([i])), 'tur', False, 'test') for i in range(10)]
+    for i, key in enumerate(keys):
+        cache.put(key, 'x' * 300)
+        os.utime(cache._path(key), (i, i))
+    stats = cache.stats()
+    # İzlenen kayıt sayısı ve boyut, silmelerden sonra dizinle aynıdır
+    assert stats['size_bytes'] <= 2000 and stats['entries'] == len(cache._entries())
+    assert stats['size_bytes'] == sum(e.stat().st_size for e in cache._entries())
+    assert cache.get(keys[-1]) is not None
+    assert cache.get(keys[0]) is None
+    cache.put(keys[-1], 'y' * 300)
+    assert cache.stats()['entries'] == len(cache._entries())
+    cache.clear()
+    assert cache.stats()['entries'] == 0 and cache.stats()['size_bytes'] == 0
+
+if __name__ == '__main__':
+    test_cache_hit_miss()
+    test_cache_lru_eviction()
+    print('All tests passed.')
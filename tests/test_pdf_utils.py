@@ -0,0 +1,19 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from ocr.pdf_utils import PdfOptions, _page_chunks, has_text_layer, page_range
+
+def test_page_range_and_chunks():
+    assert page_range(PdfOptions(last_page=5), 60) == (1, 5)
+    assert page_range(PdfOptions(first_page=2, last_page=None), 3) == (2, 3)
+    assert list(_page_chunks([1, 2, 3, 5, 6, 9], 2)) == [(1, 2), (3, 3), (5, 6), (9, 9)]
+    assert list(_page_chunks([], 4)) == []
+
+def test_has_text_layer():
+    assert not has_text_layer('  \n\f ')
+    assert has_text_layer('Fatura No: FTR20230001 Toplam: 1.234,56 TL')
+
+if __name__ == '__main__':
+    test_page_range_and_chunks()
+    test_has_text_layer()
+    print('All tests passed.')
@@ -0,0 +1,63 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import numpy as np
+from PIL import Image, ImageDraw, ImageEnhance, ImageOps
+from ocr.geometry import map_box
+from ocr.preprocess import (binarize_adaptive, binarize_otsu, crop_borders, estimate_skew, preprocess,
+                            preset_signature, resample)
+
+def _text_image():
+    image = Image.new('L', (800, 1000), 255)
+    draw = ImageDraw.Draw(image)
+    for i in range(25):
+        draw.rectangle((80, 80 + i * 35, 700, 92 + i * 35), fill=0)
+    return image
+
+def test_deskew_and_crop():
+    image = _text_image()
+    for angle in (3.0, -2.0):
+        rotated = np.asarray(image.rotate(angle, expand=True, fillcolor=255))
+        assert abs(estimate_skew(rotated) - angle) <= 0.25
+        straightened, _ = preprocess(Image.fromarray(rotated), 'standart')
+        assert abs(estimate_skew(np.asarray(straightened))) <= 0.25
+    framed = np.pad(np.asarray(image), 40, constant_values=0)
+    cropped = crop_borders(framed)
+    assert cropped.shape[0] < 1000 and cropped.shape[1] < 800 and cropped.min() == 0 and cropped[0].min() == 255
+
+def test_binarize_resample_and_presets():
+    gray = np.asarray(_text_image().point(lambda v: 60 if v == 0 else 190))
+    assert set(np.unique(binarize_otsu(gray))) == {0, 255}
+    assert set(np.unique(binarize_adaptive(gray))) == {0, 255}
+    assert resample(gray, source_dpi=600).shape == (500, 400)
+    assert resample(gray, source_dpi=250).shape == gray.shape
+    photo = Image.fromarray((np.random.default_rng(0).random((300, 200)) * 120 + 70).astype(np.uint8)).convert('RGB')
+    old = ImageOps.autocontrast(ImageOps.grayscale(ImageEnhance.Contrast(photo).enhance(2.0)))
+    new, timings = preprocess(photo, 'klasik')
+    assert np.abs(np.asarray(old, dtype=int) - np.asarray(new)).max() <= 1
+    assert set(timings) == {'grayscale', 'contrast', 'toplam'}
+    assert preset_signature(False) == 'False' and preset_signature('tarama') != preset_signature('hizli')
+
+def _dark_center(gray, left, top, right, bottom):
+    ys, xs = np.nonzero(np.asarray(gray)[top:bottom, left:right] < 128)
+    return left + xs.mean(), top + ys.mean()
+
+def test_preprocess_records_page_transform():
+    image = _text_image()
+    # Metin satırlarından uzakta kare bir işaret
+    ImageDraw.Draw(image).rectangle((735, 960, 764, 989), fill=0)
+    skewed = image.rotate(3.0, fillcolor=255)
+    skewed.info['dpi'] = (100, 100)
+    result, _ = preprocess(skewed, 'tarama')
+    assert result.size != skewed.size
+    # Yeniden örnekleme, düzeltme ve kırpmadan sonra işaret dönüşümün gösterdiği yerdedir
+    cx, cy = _dark_center(skewed, 740, 935, 800, 1000)
+    x, y = map_box(result.info['transform'], (cx / 800, cy / 1000, cx / 800, cy / 1000))[:2]
+    mx, my = _dark_center(result, int(x) - 40, int(y) - 40, int(x) + 40, int(y) + 40)
+    assert abs(mx - x) < 3 and abs(my - y) < 3
+
+if __name__ == '__main__':
+    test_deskew_and_crop()
+    test_binarize_resample_and_presets()
+    test_preprocess_records_page_transform()
+    print('All tests passed.')
@@ -0,0 +1,76 @@
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from ocr.batch import iter_ocr_batch
+from ocr.engines import set_engine
+from ocr.ocr_cache import OCRCache
+from utils.profiling import BatchProfile, profile_file, profile_run, stage
+from ocr_fakes import GenislikMotoru, png_bytes
+
+def _topla(n):
+    with stage('topla'):
+        return sum(range(n))
+
+def test_stages_recorded_only_inside_profile():
+    with stage('disarida'):
+        _topla(10)
+    batch = BatchProfile()
+    for name in ('a.png', 'b.png'):
+        with profile_file(name) as profile:
+            with stage('hazirlik'):
+                _topla(1000)
+            _topla(1000)
+            _topla(1000)
+        batch.add(profile)
+    with batch.batch_stage('yazma'):
+        pass
+    assert set(profile.stages) == {'hazirlik', 'topla'} and profile.stages['topla']['count'] == 3
+    summary = {s['asama']: s for s in batch.summary()}
+    assert set(summary) == {'hazirlik', 'topla', 'yazma'} and summary['topla']['dosya'] == 2
+    assert summary['topla']['p50_ms'] <= summary['topla']['p95_ms'] <= summary['topla']['max_ms']
+    exported = json.loads(batch.to_json())
+    assert exported['dosya_sayisi'] == 2 and len(exported['dosyalar']) == 5
+    rows = list(csv.DictReader(io.StringIO(batch.to_csv())))
+    assert [r['dosya'] for r in rows].count('(toplu)') == 1
+
+def test_profile_run_reports_cpu_and_memory():
+    with profile_run() as run, profile_file('c.png') as profile:
+        with stage('bellek'):
+            buffer = bytearray(2 * 1024 * 1024)
+    assert profile.stages['bellek']['peak_kb'] >= 2048 and len(buffer)
+    report = run.report()
+    assert '== cProfile ==' in report and '== tracemalloc ==' in report
+
+def test_nested_stage_keeps_outer_peak():
+    with profile_run(cpu=False) as run, profile_file('d.png') as profile:
+        with stage('dis'):
+            buffer = bytearray(2 * 1024 * 1024)
+            del buffer
+            with stage('ic'):
+                pass
+    # İç aşamanın reset_peak() çağrısı dıştaki aşamanın tepe değerini silmez
+    assert profile.stages['dis']['peak_kb'] >= 2048 and profile.stages['ic']['peak_kb'] < 2048
+    assert run.snapshot is not None
+
+def test_batch_results_carry_stage_timings():
+    previous = set_engine(GenislikMotoru())
+    try:
+        cache = OCRCache(cache_dir=tempfile.mkdtemp())
+        items = [('x.png', png_bytes(2000), 'image/png')]
+        result = next(iter_ocr_batch(iter(items), 'tur', False, workers=1, cache=cache, use_templates=False))
+        assert {'cache', 'decode', 'ocr'} <= set(result['timings']['stages'])
+        cached = next(iter_ocr_batch(iter(items), 'tur', False, workers=1, cache=cache, use_templates=False))
+        assert cached['cached'] and set(cached['timings']['stages']) == {'cache'}
+    finally:
+        set_engine(previous)
+
+if __name__ == '__main__':
+    test_stages_recorded_only_inside_profile()
+    test_profile_run_reports_cpu_and_memory()
+    test_nested_stage_keeps_outer_peak()
+    test_batch_results_carry_stage_timings()
+    print('All tests passed.')
@@ -0,0 +1,60 @@
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from ocr.engines import set_engine
+from ocr.ocr_cache import OCRCache
+from ocr.pipeline import ocr_document
+from ocr.tiers import missing_fields, needs_escalation
+from ocr_fakes import FULL_TEXT, GenislikMotoru, png_bytes
+
+def test_missing_fields_and_escalation():
+    full = {'raw_text': FULL_TEXT, 'words': [], 'fields': None}
+    assert missing_fields(full) == [] and not needs_escalation(full)
+    partial = {'raw_text': 'Toplam: 1.234,56 TL', 'words': [], 'fields': None}
+    assert missing_fields(partial) == ['date', 'invoice_no', 'tax']
+    # Şablonda bölgesi olmayan alanlar eksik sayılmaz
+    assert missing_fields({'raw_text': '', 'fields': {'total': '5,00 TL', 'date': 'bulunamadı'}}) == ['date']
+    low = {'raw_text': FULL_TEXT, 'fields': None, 'words': [{'page': 1, 'width': 9, 'height': 9,
+                                                           'words': [['Toplam', 0, 0, 5, 5, 40.0, 1, 1, 1]]}]}
+    assert needs_escalation(low)
+
+def test_adaptive_ocr_escalates_until_fields_found():
+    engine = GenislikMotoru()
+    previous = set_engine(engine)
+    try:
+        cache = OCRCache(cache_dir=tempfile.mkdtemp())
+        # 1000 px: hızlı kademe (750 px) yetersiz, standart kademe yeterli
+        result = ocr_document(png_bytes(1000), 'image/png', 'tur', False, cache, use_templates=False)
+        assert result['tier'] == 'standart' and 'ABC2023001' in result['raw_text']
+        assert engine.calls == [(750, 6), (1000, None)]
+        assert ocr_document(png_bytes(1000), 'image/png', 'tur', False, cache, use_templates=False)['tier'] == 'standart'
+        # 2000 px: ilk kademede tüm alanlar bulunur
+        engine.calls = []
+        assert ocr_document(png_bytes(2000), 'image/png', 'tur', False, cache, use_templates=False)['tier'] == 'hizli'
+        assert engine.calls == [(1500, 6)]
+        # Kademeli OCR kapalıyken tek geçiş yapılır
+        engine.calls = []
+        single = ocr_document(png_bytes(600), 'image/png', 'tur', False, cache, use_templates=False, adaptive=False)
+        assert single['tier'] is None and engine.calls == [(600, None)]
+    finally:
+        set_engine(previous)
+
+def test_tier_scale_survives_preprocessing():
+    # Hiçbir kademede yeterli sonuç çıkmaz; her kademede OCR'lanan görüntü boyutu kaydedilir
+    engine = GenislikMotoru(min_width=10 ** 6)
+    previous = set_engine(engine)
+    try:
+        cache = OCRCache(cache_dir=tempfile.mkdtemp())
+        data = png_bytes(1654, 2339, dpi=(200, 200))
+        assert ocr_document(data, 'image/png', 'tur', 'standart', cache, use_templates=False)['tier'] == 'yogun'
+        # Ön işlemedeki yeniden örnekleme hızlı kademeyi 200 DPI'a geri büyütmez
+        assert [width for width, _ in engine.calls] == [1240, 1654, 2481]
+    finally:
+        set_engine(previous)
+
+if __name__ == '__main__':
+    test_missing_fields_and_escalation()
+    test_adaptive_ocr_escalates_until_fields_found()
+    test_tier_scale_survives_preprocessing()
+    print('All tests passed.')
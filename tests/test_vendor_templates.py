@@ -0,0 +1,97 @@
+import io
+import os
+import sys
+import tempfile
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import numpy as np
+from PIL import Image, ImageDraw
+from ocr.engines import OCREngine, set_engine
+from ocr.ocr_cache import OCRCache
+from ocr.pipeline import cached_document, ocr_image
+from ocr.vendor_templates import REGION_GAP, TemplateRegistry, header_hash
+from ocr.word_index import Word
+
+class BolgeMotoru(OCREngine):
+    """Şablon bölgelerinden oluşan görüntüyü saklayıp sabit bir tutar 'okuyan' sahte motor."""
+    name = 'bolge'
+
+    def __init__(self):
+        super().__init__()
+        self.images = []
+
+    def _recognize(self, image, lang, timeout, psm):
+        return '5,00 TL'
+
+    def _recognize_words(self, image, lang, timeout, psm):
+        self.images.append(image)
+        return [Word('5,00', REGION_GAP, REGION_GAP, 40, 10, 95.0, 1, 1, 1), Word('TL', REGION_GAP + 50, REGION_GAP, 20, 10, 95.0, 1, 1, 1)]
+
+    def _version_string(self):
+        return 'bolge-1'
+
+def _invoice(logo_x, shift=0):
+    image = Image.new('L', (1000, 1400), 255)
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((logo_x, 40, logo_x + 220, 180), fill=0)
+    draw.rectangle((600, 60 + shift, 950, 90 + shift), fill=90)
+    for i in range(20):
+        draw.rectangle((60, 400 + i * 40, 60 + (i * 37) % 800, 415 + i * 40), fill=0)
+    return image
+
+def test_template_registry_match():
+    path = os.path.join(tempfile.mkdtemp(), 'vendor_templates.json')
+    registry = TemplateRegistry(path, check_interval=0)
+    assert registry.match(_invoice(50)) is None
+    registry.set_field('Axxion', 'total', (0.6, 0.8, 0.95, 0.85), header_hash(_invoice(50)), '1234567890')
+    registry.set_field('Axxion', 'date', (0.6, 0.1, 0.95, 0.15))
+    registry.set_field('Beta', 'total', (0.1, 0.9, 0.4, 0.95), header_hash(_invoice(700)))
+    # Gövdesi farklı, üst şeridi aynı düzendeki fatura aynı tedarikçiye eşlenir
+    name, template = registry.match(_invoice(50, shift=2))
+    assert name == 'Axxion' and set(template['fields']) == {'total', 'date'} and template['vkn'] == '1234567890'
+    assert registry.match(_invoice(700))[0] == 'Beta'
+    assert TemplateRegistry(path).templates() == registry.templates()
+    try:
+        registry.set_field('Axxion', 'total', (0.5, 0.5, 0.4, 0.6))
+        assert False
+    except ValueError:
+        pass
+
+def test_cached_template_entry_invalidated_on_change():
+    folder = tempfile.mkdtemp()
+    registry = TemplateRegistry(os.path.join(folder, 'vendor_templates.json'), check_interval=0)
+    registry.set_field('Axxion', 'total', (0.6, 0.8, 0.95, 0.85), header_hash(_invoice(50)))
+    cache = OCRCache(cache_dir=os.path.join(folder, 'cache'))
+    meta = {'template': {'name': 'Axxion', 'signature': registry.signature('Axxion')}, 'fields': {'total': '5,00 TL'}}
+    cache.put('k', '5,00 TL', words=[], meta=meta)
+    cached = cached_document(cache, 'k', registry)
+    assert cached['template'] == 'Axxion' and cached['fields'] == {'total': '5,00 TL'}
+    assert cached_document(cache, 'k', None) is None
+    registry.set_field('Axxion', 'total', (0.6, 0.7, 0.95, 0.85))
+    assert cached_document(cache, 'k', registry) is None
+
+def test_template_applies_to_preprocessed_page():
+    page = _invoice(50)
+    ImageDraw.Draw(page).rectangle((600, 1120, 949, 1189), fill=0)
+    buffer = io.BytesIO()
+    page.save(buffer, format='PNG', dpi=(100, 100))
+    registry = TemplateRegistry(os.path.join(tempfile.mkdtemp(), 'vendor_templates.json'), check_interval=0)
+    # Şablon ön işleme öncesi sayfadan kaydedilir (arayüzdeki kayıtla aynı)
+    registry.set_field('Axxion', 'total', (0.6, 0.8, 0.95, 0.85), header_hash(page))
+    engine = BolgeMotoru()
+    previous = set_engine(engine)
+    try:
+        # Yeniden örnekleme ve kenar kırpma sayfa geometrisini değiştirir
+        result = ocr_image(buffer.getvalue(), 'image/png', 'tur', 'tarama', templates=registry)
+    finally:
+        set_engine(previous)
+    assert result['template'] == 'Axxion' and len(engine.images) == 1
+    # Kırpılan bölge işaretin tamamını kapsar: koyu alan bölgenin pay dışındaki kısmı kadardır
+    region = np.asarray(engine.images[0])[REGION_GAP:-REGION_GAP, REGION_GAP:-REGION_GAP]
+    ys, xs = np.nonzero(region < 128)
+    assert xs.max() - xs.min() >= region.shape[1] - 12 and ys.max() - ys.min() >= region.shape[0] - 12
+
+if __name__ == '__main__':
+    test_template_registry_match()
+    test_cached_template_entry_invalidated_on_change()
+    test_template_applies_to_preprocessed_page()
+    print('All tests passed.')
@@ -0,0 +1,49 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from PIL import Image
+from ocr.geometry import scale_transform
+from ocr.word_index import WordIndex, find_page, page_record, words_from_data, words_to_text
+
+def _data():
+    rows = [
+        # level, block, par, line, left, top, width, height, conf, text
+        (4, 1, 1, 1, 40, 40, 400, 30, -1, ''),
+        (5, 1, 1, 1, 40, 40, 120, 30, 95, 'Fatura'),
+        (5, 1, 1, 1, 170, 40, 60, 30, 93, 'No:'),
+        (5, 1, 1, 1, 240, 40, 200, 30, 91, 'ABC2023001'),
+        (5, 1, 1, 2, 40, 90, 150, 30, 40, 'Toplam:'),
+        (5, 1, 1, 2, 200, 90, 130, 30, 35, '1.234,56'),
+        (5, 2, 1, 1, 600, 700, 100, 30, 88, 'İmza'),
+        (5, 2, 1, 1, 720, 700, 10, 30, 0, ' '),
+    ]
+    keys = ['level', 'block_num', 'par_num', 'line_num', 'left', 'top', 'width', 'height', 'conf', 'text']
+    return {k: [r[i] for r in rows] for i, k in enumerate(keys)}
+
+def test_words_and_text():
+    words = words_from_data(_data())
+    assert [w.text for w in words] == ['Fatura', 'No:', 'ABC2023001', 'Toplam:', '1.234,56', 'İmza']
+    assert words_to_text(reversed(words)) == 'Fatura No: ABC2023001\nToplam: 1.234,56\n\nİmza'
+
+def test_region_query():
+    record = page_record(1, Image.new('L', (1000, 800)), words_from_data(_data()))
+    assert find_page([record], 1) is record and find_page([record], 2) is None
+    index = WordIndex.from_page(record, cell=64)
+    text, conf = index.region_text((160, 30, 450, 75))
+    assert text == 'No: ABC2023001' and abs(conf - 92) < 1e-9
+    # Kutunun yarısından azı seçilen kelime dahil edilmez
+    assert index.region_text((0, 30, 90, 75))[0] == ''
+    assert index.region_text((30, 85, 340, 125)) == ('Toplam: 1.234,56', 37.5)
+    assert index.region_text((0, 0, 1000, 800))[0].endswith('İmza')
+    assert index.map_from((80, 15, 225, 37), scale_transform(500, 400)) == (160, 30, 450, 74)
+    assert index.query((10, 10, 10, 50)) == []
+    # Kenarları kırpılarak OCR'lanan sayfada önizleme kutusu dönüşümle kaydırılır
+    cropped = Image.new('L', (950, 780))
+    cropped.info['transform'] = (1000.0, 0.0, -50.0, 0.0, 800.0, -20.0)
+    shifted = WordIndex.from_page(page_record(1, cropped, []))
+    assert shifted.map_from((80, 15, 225, 37), scale_transform(500, 400)) == (110, 10, 400, 54)
+
+if __name__ == '__main__':
+    test_words_and_text()
+    test_region_query()
+    print('All tests passed.')
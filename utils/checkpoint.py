@@ -0,0 +1,50 @@
+import json
+import os
+from typing import Dict, Iterable, Tuple
+
+class CheckpointManifest:
+    """
+    Toplu işlemde tamamlanan dosyaları JSON satırları olarak kaydeder.
+    Dosya yolu, boyutu ve değişiklik zamanı aynı olan kayıtlar yeniden işlenmez.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._done: Dict[str, Tuple[int, int]] = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Yarıda kesilmiş son satır yok sayılır
+                        continue
+                    self._done[entry["path"]] = (entry["size"], entry["mtime_ns"])
+        self._file = open(path, "a", encoding="utf-8")
+        if self._file.tell() > 0:
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    # Yarım kalan satır sonraki kayıtla birleşmesin
+                    self._file.write("\n")
+
+    def __len__(self) -> int:
+        return len(self._done)
+
+    def is_done(self, path: str, stat: os.stat_result) -> bool:
+        return self._done.get(path) == (stat.st_size, stat.st_mtime_ns)
+
+    def mark_done(self, entries: Iterable[Tuple[str, os.stat_result]]) -> None:
+        """Kayıtları manifeste ekler ve diske yazar."""
+        lines = []
+        for path, stat in entries:
+            self._done[path] = (stat.st_size, stat.st_mtime_ns)
+            lines.append(json.dumps({"path": path, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns},
+                                    ensure_ascii=False) + "\n")
+        if lines:
+            self._file.write("".join(lines))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._file.close()
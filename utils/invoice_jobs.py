@@ -0,0 +1,185 @@
+"""
+Yüklenen fatura dosyalarını işleyen arka plan işi (bkz. utils.job_queue). Streamlit'e bağımlı
+değildir; ilerleme ve mesajlar Job nesnesine yazılır, kayıtlar fatura deposuna parça parça eklenir.
+Aşama süreleri verilen BatchProfile'a yazılır (bkz. utils.profiling).
+"""
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from ocr.batch import iter_ocr_batch
+from ocr.dedup import find_duplicate, fingerprint, invoice_key, verification_boxes
+from ocr.invoice_parser import extract_fields, list_patterns
+from ocr.ocr_cache import content_hash, get_default_cache
+from ocr.ocr_engine import clean_ocr_text
+from ocr.pdf_utils import PdfOptions
+from ocr.pipeline import document_cache_key
+from db.dedup_index import DedupEntry, get_default_dedup_index
+from db.invoice_store import get_default_store
+from utils.job_queue import Job
+from utils.profiling import BatchProfile, profile_file, profile_run, stage
+
+INSERT_BATCH_SIZE = 500
+# Kayıtlar en geç bu kadar saniyede bir depoya yazılır; tablo iş sürerken de güncellenir
+FLUSH_INTERVAL = 2.0
+# İş günlüğünde özetlenen en yavaş aşama sayısı
+LOGGED_STAGES = 3
+
+def process_invoice_files(job: Job, files: List[Tuple[str, bytes, str]], ocr_lang: str, enhance: Union[bool, str],
+                          workers: int, pdf_options: PdfOptions, use_templates: bool = True, adaptive: bool = True,
+                          skip_duplicates: bool = True, profile: Optional[BatchProfile] = None,
+                          deep_profile: bool = False) -> int:
+    """
+    (dosya adı, içerik, MIME tipi) dosyalarını işçi havuzunda paralel işler ve fatura deposuna ekler.
+    Depoda zaten bulunan dosyalar yeniden OCR'lanmaz, kayıtları tablonun sonuna taşınır; hatalı dosyalar
+    diğerlerini durdurmaz.
+    Her dosya mükerrer dizinine eklenir; VKN, fatura no ve tutarı daha önceki bir faturayla aynı olanlar
+    "olasi_mukerrer" sütununda işaretlenir. skip_duplicates açıksa dizinde bulunan dosyalar OCR'lanmadan atlanır.
+    Dosya başına aşama süreleri profile'a yazılır. deep_profile açıksa iş tek süreçte cProfile ve
+    tracemalloc ile izlenir ve rapor profile.report'a yazılır (süreler bu çalıştırmada yavaşlar).
+    İptal edilirse o ana kadar işlenenler depoda kalır. Eklenen kayıt sayısını döndürür.
+    """
+    profile = profile if profile is not None else BatchProfile()
+    args = (job, files, ocr_lang, enhance, workers, pdf_options, use_templates, adaptive, skip_duplicates, profile)
+    try:
+        if not deep_profile:
+            return _process_files(*args)
+        with profile_run() as run:
+            # İşçi süreçlerindeki kod izlenemediğinden OCR da bu süreçte yapılır
+            added = _process_files(*args[:4], 1, *args[5:])
+        profile.report = run.report()
+        return added
+    finally:
+        profile.finish()
+        summary = profile.summary()[:LOGGED_STAGES]
+        if summary:
+            job.log("En yavaş aşamalar (p50/p95): " + " · ".join(
+                f"{s['asama']} {s['p50_ms']:.0f}/{s['p95_ms']:.0f} ms" for s in summary))
+
+def _process_files(job: Job, files: List[Tuple[str, bytes, str]], ocr_lang: str, enhance: Union[bool, str],
+                   workers: int, pdf_options: PdfOptions, use_templates: bool, adaptive: bool,
+                   skip_duplicates: bool, profile: BatchProfile) -> int:
+    store = get_default_store()
+    cache = get_default_cache()
+    dedup_index = get_default_dedup_index()
+    keyed: Dict[str, Tuple[str, bytes, str, str]] = {}
+    with profile.batch_stage("cache_key"):
+        for name, data, mime in files:
+            # İçerik özeti bir kez hesaplanır; önbellek anahtarı ve mükerrer araması aynı özeti kullanır
+            digest = content_hash(data)
+            keyed.setdefault(document_cache_key(data, mime, ocr_lang, enhance, pdf_options, adaptive, digest),
+                             (name, data, mime, digest))
+    with profile.batch_stage("store_lookup"):
+        existing = store.existing_keys(keyed)
+    if existing:
+        # Yeniden OCR'lanmazlar; kayıtları temizlenmiş görünümde de görünsün diye tablonun sonuna taşınır
+        with profile.batch_stage("store_resurface"):
+            store.resurface(existing)
+        job.log(f"{len(existing)} dosya daha önce işlendiği için atlandı; kayıtları tablonun sonuna taşındı")
+    pending = [(key,) + item for key, item in keyed.items() if key not in existing]
+    job.progress(0, len(pending))
+    if not pending:
+        return 0
+    # Aynı adlı farklı dosyalar olabileceğinden kontroller ve OCR öncesi ölçümler (sonuç gelince aynı
+    # profile eklenir) önbellek anahtarıyla tutulur; anahtar iter_ocr_batch'e verilir ve sonuçta geri döner
+    checks: Dict[str, Any] = {}
+    early: Dict[str, Dict[str, Any]] = {}
+    done = 0
+
+    def screened() -> Iterator[Tuple[str, bytes, str, str]]:
+        # Mükerrer kontrolü dosya OCR'a gönderilirken yapılır; iter_ocr_batch bir sonraki dosyayı
+        # ancak boş işçi olduğunda ister, bu sırada havuzdaki dosyaların OCR'ı sürer
+        nonlocal done
+        for key, name, data, mime, digest in pending:
+            if job.cancelled:
+                return
+            with profile_file(name) as file_profile, stage("dedup"):
+                if skip_duplicates:
+                    check = find_duplicate(dedup_index, data, mime, ocr_lang, digest=digest)
+                else:
+                    # Atlama kapalıyken de dosya dizine eklenir ve olası mükerrer olarak işaretlenebilir
+                    check = fingerprint(data, mime, digest=digest)
+            if check.kind is None:
+                checks[key] = check
+                early[key] = file_profile.to_dict()
+                yield name, data, mime, key
+                continue
+            profile.add(file_profile)
+            if check.kind == "icerik":
+                job.log(f"{name} atlandı: {check.entry.file_name} ile aynı dosya daha önce işlendi")
+            else:
+                job.log(f"{name} atlandı: {check.entry.file_name} faturasının yeniden taranmış kopyası")
+            # Yeniden taranan kopya da dizine eklenir; bir sonraki yüklemede içerik özetiyle bulunur
+            dedup_index.add(check.entry._replace(digest=check.digest, phash=check.phash))
+            done += 1
+            job.progress(done)
+
+    added = 0
+    rows = []
+    flushed_at = time.monotonic()
+    ocr_times = []
+    tier_counts: Dict[str, int] = {}
+    batch = iter_ocr_batch(screened(), ocr_lang, enhance, workers=min(workers, len(pending)), cache=cache,
+                           pdf_options=pdf_options, use_templates=use_templates, adaptive=adaptive)
+    try:
+        for ocr_result in batch:
+            done += 1
+            job.progress(done)
+            with profile_file(ocr_result["name"], ocr_result["timings"]) as file_profile:
+                row = _result_row(job, ocr_result, dedup_index, checks)
+            if ocr_result["key"] in early:
+                file_profile.merge(early.pop(ocr_result["key"]))
+            profile.add(file_profile)
+            if row is not None:
+                if not ocr_result["cached"]:
+                    ocr_times.append(ocr_result["ocr_ms"])
+                if ocr_result["tier"]:
+                    tier_counts[ocr_result["tier"]] = tier_counts.get(ocr_result["tier"], 0) + 1
+                rows.append(row)
+            if len(rows) >= INSERT_BATCH_SIZE or (rows and time.monotonic() - flushed_at >= FLUSH_INTERVAL):
+                with profile.batch_stage("store_append"):
+                    added += store.append_many(rows)
+                rows = []
+                flushed_at = time.monotonic()
+            if job.cancelled:
+                job.log(f"İptal edildi: {done}/{len(pending)} dosya işlendi")
+                break
+    finally:
+        # Üretecin kapatılması bekleyen OCR işlerini iptal eder
+        batch.close()
+        with profile.batch_stage("store_append"):
+            added += store.append_many(rows)
+    if ocr_times:
+        job.log(f"Ortalama OCR süresi: {sum(ocr_times) / len(ocr_times):.0f} ms/dosya ({len(ocr_times)} dosya)")
+    if tier_counts:
+        job.log("OCR kademeleri: " + " · ".join(f"{name}: {count}" for name, count in tier_counts.items()))
+    return added
+
+def _result_row(job: Job, ocr_result: Dict[str, Any], dedup_index: Any,
+                checks: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """OCR sonucundan tablo kaydını oluşturur; hatalı dosyalarda mesaj yazıp None döndürür."""
+    if ocr_result["error"]:
+        job.log(f"{ocr_result['name']} işlenirken hata oluştu: {ocr_result['error']}")
+        return None
+    try:
+        with stage("clean"):
+            text = clean_ocr_text(ocr_result["raw_text"])
+        # RegEx ile toplu işleme (tüm alanlar, derlenmiş desenlerle tek tarama)
+        result = {"dosya_adi": ocr_result["name"], "onbellek_anahtari": ocr_result["key"],
+                  "sablon": ocr_result["template"], "ocr_kademesi": ocr_result["tier"]}
+        with stage("regex"):
+            if ocr_result["fields"]:
+                # Şablonda bölgesi olmayan alanlar bulunamadı sayılır
+                result.update(dict.fromkeys(list_patterns(), "bulunamadı"))
+                result.update(ocr_result["fields"])
+            else:
+                result.update(extract_fields(text))
+        with stage("dedup_index"):
+            key = invoice_key(result)
+            earlier = dedup_index.find_key(key)
+            result["olasi_mukerrer"] = earlier.file_name if earlier else None
+            check = checks[ocr_result["key"]]
+            dedup_index.add(DedupEntry(check.digest, check.phash, key, ocr_result["name"], ocr_result["key"]),
+                            verification_boxes(ocr_result["words"], result))
+        return result
+    except Exception as e:
+        job.log(f"{ocr_result['name']} işlenirken hata oluştu: {e}")
+        return None
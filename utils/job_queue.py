@@ -0,0 +1,166 @@
+"""
+Arka plan iş kuyruğu. Uzun süren işler (ör. toplu fatura işleme) Streamlit betiğinden ayrı bir
+iş parçacığında çalışır; sayfa yeniden çalıştırıldığında işler kesilmez. Kuyruk süreç geneldir
+ve bellekte tutulur; sunucu yeniden başlatılırsa bekleyen işler kaybolur (işlenen faturalar
+depoya parça parça yazıldığından kaybolmaz).
+"""
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+PENDING = "bekliyor"
+RUNNING = "çalışıyor"
+DONE = "tamamlandı"
+CANCELLED = "iptal edildi"
+FAILED = "hata"
+FINISHED_STATUSES = (DONE, CANCELLED, FAILED)
+# Bellekte tutulan bitmiş iş ve iş başına mesaj sayısı
+JOB_HISTORY = 50
+MAX_MESSAGES = 200
+
+class Job:
+    """Kuyruktaki bir işin durumu. İş fonksiyonu ilerlemeyi ve mesajları bu nesne üzerinden bildirir."""
+
+    def __init__(self, job_id: int, name: str):
+        self.id = job_id
+        self.name = name
+        self.status = PENDING
+        self.done = 0
+        self.total = 0
+        self.messages: List[str] = []
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        """İş fonksiyonu uzun döngülerde bunu kontrol edip erken çıkmalıdır."""
+        return self._cancel.is_set()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def progress(self, done: int, total: Optional[int] = None) -> None:
+        with self._lock:
+            self.done = done
+            if total is not None:
+                self.total = total
+
+    def log(self, message: str) -> None:
+        with self._lock:
+            self.messages.append(message)
+            del self.messages[:-MAX_MESSAGES]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Arayüzde gösterilmek üzere işin tutarlı bir kopyası."""
+        with self._lock:
+            elapsed = None
+            if self.started_at is not None:
+                elapsed = (self.finished_at or time.time()) - self.started_at
+            return {"id": self.id, "name": self.name, "status": self.status, "done": self.done,
+                    "total": self.total, "messages": list(self.messages), "result": self.result,
+                    "error": self.error, "elapsed": elapsed}
+
+class JobQueue:
+    """
+    İşleri sırayla (veya max_workers kadar paralel) çalıştıran kuyruk. İş fonksiyonu ilk argüman
+    olarak Job nesnesini alır; dönüş değeri job.result olur.
+    """
+
+    def __init__(self, max_workers: int = 1, history: int = JOB_HISTORY):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fatura-is")
+        self._jobs: "OrderedDict[int, Job]" = OrderedDict()
+        self._futures: Dict[int, Future] = {}
+        self._history = history
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def submit(self, name: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Job:
+        with self._lock:
+            job = Job(self._next_id, name)
+            self._next_id += 1
+            self._jobs[job.id] = job
+            self._futures[job.id] = self._executor.submit(self._run, job, func, args, kwargs)
+            self._trim()
+        return job
+
+    def _run(self, job: Job, func: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> None:
+        if job.cancelled:
+            job.status = CANCELLED
+            job.finished_at = time.time()
+            return
+        job.started_at = time.time()
+        job.status = RUNNING
+        try:
+            job.result = func(job, *args, **kwargs)
+            job.status = CANCELLED if job.cancelled else DONE
+        except Exception as e:
+            job.error = f"{e}"
+            job.log(traceback.format_exc(limit=3))
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._futures.pop(job.id, None)
+
+    def _trim(self) -> None:
+        # En eski bitmiş işler atılır; bekleyen ve çalışan işler her zaman tutulur
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self._history)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: int) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> List[Job]:
+        """İşleri yeniden eskiye döndürür."""
+        with self._lock:
+            return list(reversed(self._jobs.values()))
+
+    def active(self) -> List[Job]:
+        return [job for job in self.jobs() if not job.finished]
+
+    def cancel(self, job_id: int) -> bool:
+        """Bekleyen işi kuyruktan çıkarır, çalışan işe iptal isteği gönderir."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            future = self._futures.get(job_id)
+        if job is None or job.finished:
+            return False
+        job.cancel()
+        if future is not None and future.cancel():
+            job.status = CANCELLED
+            job.finished_at = time.time()
+            with self._lock:
+                self._futures.pop(job_id, None)
+        return True
+
+    def shutdown(self, cancel: bool = False) -> None:
+        """Kuyruğu kapatır ve işlerin bitmesini bekler; cancel True ise önce tüm işler iptal edilir."""
+        if cancel:
+            for job in self.active():
+                self.cancel(job.id)
+        self._executor.shutdown(wait=True)
+
+_default_queue: Optional[JobQueue] = None
+_default_queue_lock = threading.Lock()
+
+def get_job_queue() -> JobQueue:
+    """Süreç genelinde paylaşılan iş kuyruğunu döndürür (tüm tarayıcı oturumları aynı kuyruğu görür)."""
+    global _default_queue
+    with _default_queue_lock:
+        if _default_queue is None:
+            _default_queue = JobQueue()
+        return _default_queue
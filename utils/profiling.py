@@ -0,0 +1,287 @@
+"""
+İşlem hattı için aşama bazlı süre ölçümü. Kod içinde `with stage("ocr"):` ile
+işaretlenen aşamalar, o an etkin bir dosya profili varsa (profile_file) duvar süresi, CPU süresi
+ve (tracemalloc açıksa) en yüksek bellek artışıyla kaydedilir; etkin profil yoksa maliyet yok
+denecek kadar azdır. Dosya profilleri BatchProfile'da toplanıp yüzdelik özetlere çevrilir.
+
+Ayrıntılı inceleme için profile_run() tek bir çalıştırmayı cProfile ve tracemalloc ile izler.
+"""
+import contextvars
+import cProfile
+import csv
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_current: "contextvars.ContextVar[Optional[FileProfile]]" = contextvars.ContextVar("dosya_profili", default=None)
+# Açık aşamaların tracemalloc tepe değerleri (dıştan içe); iç aşama reset_peak() yaptığında dıştakinin
+# o ana kadarki tepesi burada saklanır
+_open_peaks: "contextvars.ContextVar[Tuple[List[int], ...]]" = contextvars.ContextVar("acik_tepeler", default=())
+METRICS = ("wall_ms", "cpu_ms", "peak_kb")
+# Toplu işlem düzeyindeki aşamalar (ör. depoya yazma) bu adla kaydedilir
+BATCH_ROW = "(toplu)"
+
+def _cpu_seconds() -> float:
+    # Yalnızca çağıran iş parçacığının CPU süresi. os.times().children_* süreç genelidir ve başka
+    # iş parçacıklarının alt süreçlerini de sayar; tesseract alt sürecinin süresi duvar süresinde görünür.
+    return time.thread_time()
+
+def _max_rss_kb() -> Optional[float]:
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux'ta KB, macOS'ta bayt
+    return rss / 1024 if os.uname().sysname == "Darwin" else float(rss)
+
+class FileProfile:
+    """Bir dosyanın aşama ölçümleri: aşama -> {"wall_ms", "cpu_ms", "peak_kb", "count"}."""
+
+    def __init__(self, name: str, record: Optional[Dict[str, Any]] = None,
+                 listener: Optional[Callable[[str], None]] = None):
+        self.name = name
+        # Her aşama tamamlandığında aşama adıyla çağrılır (ör. işçi süreçlerinde canlılık sinyali)
+        self.listener = listener
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.max_rss_kb: Optional[float] = None
+        # Toplu işlem profili iş parçacığında yazılırken arayüzden okunabilir
+        self._lock = threading.Lock()
+        if record:
+            self.merge(record)
+
+    def add(self, stage_name: str, wall_ms: float, cpu_ms: float, peak_kb: Optional[float] = None) -> None:
+        with self._lock:
+            item = self.stages.setdefault(stage_name, {"wall_ms": 0.0, "cpu_ms": 0.0, "peak_kb": None, "count": 0})
+            item["wall_ms"] += wall_ms
+            item["cpu_ms"] += cpu_ms
+            item["count"] += 1
+            if peak_kb is not None:
+                item["peak_kb"] = max(item["peak_kb"] or 0.0, peak_kb)
+        if self.listener is not None:
+            self.listener(stage_name)
+
+    def stage_items(self) -> List[Tuple[str, Dict[str, Any]]]:
+        """Aşama ölçümlerinin tutarlı bir kopyası."""
+        with self._lock:
+            return [(stage_name, dict(item)) for stage_name, item in self.stages.items()]
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Süreçler arasında taşınabilir kayıt (bkz. merge)."""
+        return {"stages": dict(self.stage_items()), "max_rss_kb": self.max_rss_kb}
+
+    def merge(self, record: Dict[str, Any]) -> None:
+        """Başka bir süreçte (ör. OCR işçisinde) ölçülen to_dict() kaydını ekler."""
+        with self._lock:
+            if record.get("max_rss_kb") is not None:
+                self.max_rss_kb = max(self.max_rss_kb or 0.0, record["max_rss_kb"])
+            for stage_name, item in record["stages"].items():
+                target = self.stages.setdefault(stage_name, {"wall_ms": 0.0, "cpu_ms": 0.0, "peak_kb": None, "count": 0})
+                target["wall_ms"] += item["wall_ms"]
+                target["cpu_ms"] += item["cpu_ms"]
+                target["count"] += item.get("count", 1)
+                if item.get("peak_kb") is not None:
+                    target["peak_kb"] = max(target["peak_kb"] or 0.0, item["peak_kb"])
+
+@contextmanager
+def profile_file(name: str, record: Optional[Dict[str, Any]] = None,
+                 listener: Optional[Callable[[str], None]] = None) -> Iterator[FileProfile]:
+    """
+    Blok içindeki stage() ölçümlerini name dosyasının profiline yazar. record verilirse (ör. işçi
+    sürecinden dönen to_dict() kaydı) profil bu ölçümlerle başlar; listener her aşamanın sonunda çağrılır.
+    """
+    profile = FileProfile(name, record, listener)
+    token = _current.set(profile)
+    try:
+        yield profile
+    finally:
+        _current.reset(token)
+        rss = _max_rss_kb()
+        if rss is not None:
+            profile.max_rss_kb = max(profile.max_rss_kb or 0.0, rss)
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Bir aşamayı ölçer. Etkin dosya profili yoksa hiçbir şey yapmaz. Bellek yalnızca tracemalloc
+    izleme yaparken ölçülür; iç içe aşamalarda iç aşamanın tepe değeri dıştakine de yansıtılır.
+    """
+    profile = _current.get()
+    if profile is None:
+        yield
+        return
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        current, peak = tracemalloc.get_traced_memory()
+        outer = _open_peaks.get()
+        if outer:
+            # reset_peak() dıştaki aşamanın tepesini de sileceği için önce saklanır
+            outer[-1][0] = max(outer[-1][0], peak)
+        own = [current]
+        token = _open_peaks.set(outer + (own,))
+        base = current
+        tracemalloc.reset_peak()
+    wall_started = time.perf_counter()
+    cpu_started = _cpu_seconds()
+    try:
+        yield
+    finally:
+        peak_kb = None
+        if tracing:
+            _open_peaks.reset(token)
+            peak = max(tracemalloc.get_traced_memory()[1], own[0])
+            if outer:
+                outer[-1][0] = max(outer[-1][0], peak)
+            peak_kb = (peak - base) / 1024
+        profile.add(name, (time.perf_counter() - wall_started) * 1000, (_cpu_seconds() - cpu_started) * 1000, peak_kb)
+
+class BatchProfile:
+    """Bir toplu işlemdeki dosya profilleri ve aşama bazında yüzdelik özetleri."""
+
+    def __init__(self):
+        self.files: List[FileProfile] = []
+        self._batch = FileProfile(BATCH_ROW)
+        # İş parçacığı dosya eklerken arayüz rows()/summary() ile okur
+        self._lock = threading.Lock()
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        # profile_run() ile alınan cProfile/tracemalloc raporu
+        self.report: Optional[str] = None
+
+    def add(self, profile: FileProfile) -> None:
+        with self._lock:
+            self.files.append(profile)
+
+    def _profiles(self) -> List[FileProfile]:
+        with self._lock:
+            return list(self.files) + [self._batch]
+
+    @contextmanager
+    def batch_stage(self, name: str) -> Iterator[None]:
+        """Tek bir dosyaya ait olmayan aşamaları (ör. toplu depoya yazma) ölçer."""
+        token = _current.set(self._batch)
+        try:
+            with stage(name):
+                yield
+        finally:
+            _current.reset(token)
+
+    def finish(self) -> None:
+        self.finished = time.perf_counter()
+
+    def rows(self) -> List[Dict[str, Any]]:
+        """Dosya x aşama satırları (dışa aktarma için)."""
+        rows = []
+        for profile in self._profiles():
+            for stage_name, item in profile.stage_items():
+                rows.append({"dosya": profile.name, "asama": stage_name, "wall_ms": round(item["wall_ms"], 3),
+                             "cpu_ms": round(item["cpu_ms"], 3),
+                             "peak_kb": None if item["peak_kb"] is None else round(item["peak_kb"], 1),
+                             "count": item["count"]})
+        return rows
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """
+        Aşama başına dosya sayısı, toplam süre ve duvar süresinin ortalama/p50/p95/en yüksek değerleri,
+        ortalama CPU süresi ve en yüksek bellek artışı; toplam süreye göre büyükten küçüğe.
+        """
+        values: Dict[str, Dict[str, List[float]]] = {}
+        for profile in self._profiles():
+            for stage_name, item in profile.stage_items():
+                metrics = values.setdefault(stage_name, {metric: [] for metric in METRICS})
+                metrics["wall_ms"].append(item["wall_ms"])
+                metrics["cpu_ms"].append(item["cpu_ms"])
+                if item["peak_kb"] is not None:
+                    metrics["peak_kb"].append(item["peak_kb"])
+        summary = []
+        for stage_name, metrics in values.items():
+            wall = np.array(metrics["wall_ms"], dtype=np.float64)
+            summary.append({
+                "asama": stage_name,
+                "dosya": len(wall),
+                "toplam_ms": float(wall.sum()),
+                "ortalama_ms": float(wall.mean()),
+                "p50_ms": float(np.percentile(wall, 50)),
+                "p95_ms": float(np.percentile(wall, 95)),
+                "max_ms": float(wall.max()),
+                "cpu_ortalama_ms": float(np.mean(metrics["cpu_ms"])),
+                "peak_kb": float(max(metrics["peak_kb"])) if metrics["peak_kb"] else None,
+            })
+        return sorted(summary, key=lambda s: s["toplam_ms"], reverse=True)
+
+    def to_json(self) -> str:
+        elapsed = (self.finished or time.perf_counter()) - self.started
+        files = self._profiles()[:-1]
+        rss = [p.max_rss_kb for p in files if p.max_rss_kb is not None]
+        return json.dumps({"dosya_sayisi": len(files), "sure_sn": round(elapsed, 3),
+                           "en_yuksek_rss_kb": max(rss) if rss else None,
+                           "ozet": self.summary(), "dosyalar": self.rows(), "rapor": self.report},
+                          ensure_ascii=False, indent=2)
+
+    def to_csv(self) -> str:
+        out = io.StringIO()
+        writer = csv.DictWriter(out, fieldnames=["dosya", "asama", "wall_ms", "cpu_ms", "peak_kb", "count"])
+        writer.writeheader()
+        writer.writerows(self.rows())
+        return out.getvalue()
+
+class ProfileRun:
+    """profile_run() sonucu: cProfile istatistikleri ve tracemalloc'un en çok bellek ayıran satırları."""
+
+    def __init__(self):
+        self.profiler: Optional[cProfile.Profile] = None
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+
+    def stats_text(self, limit: int = 30, sort: str = "cumulative") -> str:
+        if self.profiler is None:
+            return ""
+        out = io.StringIO()
+        pstats.Stats(self.profiler, stream=out).strip_dirs().sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+    def memory_text(self, limit: int = 15) -> str:
+        if self.snapshot is None:
+            return ""
+        return "\n".join(str(stat) for stat in self.snapshot.statistics("lineno")[:limit])
+
+    def report(self) -> str:
+        parts = []
+        if self.profiler is not None:
+            parts.append("== cProfile ==\n" + self.stats_text())
+        if self.snapshot is not None:
+            parts.append("== tracemalloc ==\n" + self.memory_text())
+        return "\n".join(parts)
+
+@contextmanager
+def profile_run(cpu: bool = True, memory: bool = True) -> Iterator[ProfileRun]:
+    """
+    Bloğu cProfile (cpu) ve tracemalloc (memory) ile izler. Yalnızca bu süreçteki kod görülür;
+    işçi süreçlerindeki OCR'ı da kapsamak için blok içinde tek süreçle çalışılmalıdır. İzleme
+    kodu birkaç kat yavaşlatır; süre ölçümleri bu çalıştırmada karşılaştırma için kullanılmamalıdır.
+    """
+    run = ProfileRun()
+    started_tracing = memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    if cpu:
+        run.profiler = cProfile.Profile()
+        run.profiler.enable()
+    try:
+        yield run
+    finally:
+        if run.profiler is not None:
+            run.profiler.disable()
+        if memory:
+            run.snapshot = tracemalloc.take_snapshot()
+        if started_tracing:
+            tracemalloc.stop()
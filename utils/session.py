@@ -1,10 +1,34 @@
-import pandas as pd
-import streamlit as st
-
-def get_or_init_fatura_df() -> pd.DataFrame:
-    if 'fatura_df' not in st.session_state:
-        st.session_state['fatura_df'] = pd.DataFrame({col: pd.Series(dtype='str') for col in ["fatura_tarihi", "toplam_tutar", "fatura_no", "satıcı_adı", "vergi_no"]})
-    return st.session_state['fatura_df']
-
-def reset_fatura_df():
-    st.session_state['fatura_df'] = pd.DataFrame({col: pd.Series(dtype='str') for col in ["fatura_tarihi", "toplam_tutar", "fatura_no", "satıcı_adı", "vergi_no"]}) 
\ No newline at end of file
+import streamlit as st
+from typing import Iterable
+from db.dedup_index import get_default_dedup_index
+from db.invoice_store import InvoiceStore, get_default_store
+
+def get_fatura_store(fields: Iterable[str] = ()) -> InvoiceStore:
+    """Fatura deposunu döndürür; tanımlı desen alanları için sütunların var olmasını sağlar."""
+    store = get_default_store()
+    store.ensure_columns(fields)
+    return store
+
+def get_table_page(page_count: int) -> int:
+    """Tablo sayfa seçicisinin oturumdaki değerini (1'den başlar) sayfa sayısına göre sınırlar."""
+    page = min(max(1, st.session_state.get('fatura_sayfa', 1)), max(1, page_count))
+    st.session_state['fatura_sayfa'] = page
+    return page
+
+def table_start() -> int:
+    """Tablo görünümünde gösterilen ilk kayıttan önceki id; görünüm temizlenmediyse 0."""
+    return st.session_state.get('tablo_baslangic', 0)
+
+def reset_fatura_df():
+    # Yalnızca bu oturumdaki görünümü temizler; kayıtlı geçmiş ve mükerrer dizini korunur
+    st.session_state['tablo_baslangic'] = get_default_store().max_id()
+    st.session_state['fatura_sayfa'] = 1
+
+def delete_fatura_history():
+    # Kayıtlı geçmişi kalıcı olarak siler; aynı faturalar yeniden yüklenebilsin diye mükerrer dizini de sıfırlanır
+    get_default_store().clear()
+    get_default_dedup_index().clear()
+    st.session_state['tablo_baslangic'] = 0
+    st.session_state['fatura_sayfa'] = 1
+    # Sonraki silme yeniden onay ister
+    st.session_state['gecmis_silme_onayi'] = False